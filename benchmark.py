@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks y control de regresiones del simulador – Ejercicio 72
+------------------------------------------------------------------
+Mide eventos por segundo, costo por fila registrada, pico de memoria (tracemalloc) y tiempo de armado
+de los DataFrames para horizontes de 60 a 10^6 minutos y cargas de liviana a saturada.
+Con una semilla fija verifica además que las métricas (trazas doradas) no cambien con las optimizaciones.
+
+    python benchmark.py                 # compara contra benchmark_base.json (si existe)
+    python benchmark.py --guardar       # corre y guarda la base
+    python benchmark.py --rapido        # solo escenarios cortos
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+import simulador as motor
+
+SEMILLA_BENCHMARK = 12345
+RUTA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_base.json')
+
+# Media entre llegadas por nivel de carga (el resto de los parámetros son los del enunciado)
+CARGAS = {
+    'liviana': 6.0,
+    'normal': 3.0,
+    'saturada': 1.5,
+}
+
+# Con el vector de estado completo cada fila copia los pacientes activos: con carga saturada
+# las colas crecen sin límite y el registro se vuelve cuadrático, por eso sus horizontes son menores
+ESCENARIOS = (
+    [{'modo': 'estadisticas', 'carga': carga, 'horizonte': horizonte}
+     for carga in CARGAS for horizonte in (60, 1_000, 10_000, 100_000, 1_000_000)]
+    + [{'modo': 'vector', 'carga': carga, 'horizonte': horizonte}
+       for carga in ('liviana', 'normal') for horizonte in (60, 1_000, 10_000, 100_000)]
+    + [{'modo': 'vector', 'carga': 'saturada', 'horizonte': horizonte} for horizonte in (60, 1_000, 2_000)]
+)
+HORIZONTE_RAPIDO = 10_000
+
+# -----------------------------------------------------------
+# 1) Mediciones
+# -----------------------------------------------------------
+
+def nombre_escenario(escenario: dict) -> str:
+    return f"{escenario['modo']}/{escenario['carga']}/{escenario['horizonte']}"
+
+def parametros_escenario(escenario: dict) -> dict:
+    return dict(media_llegada=CARGAS[escenario['carga']], tiempo_simulacion=escenario['horizonte'], semilla=SEMILLA_BENCHMARK)
+
+def correr_contando(registro=None, **parametros) -> tuple[int, float, int]:
+    """Corre el motor contando eventos. Devuelve (eventos, tiempo_promedio_espera, llamadas_perdidas)"""
+    generador = motor.motor_centro_salud(registro=registro, **parametros)
+    siguiente = generador.__next__
+    eventos = 0
+    try:
+        while True:
+            siguiente()
+            eventos += 1
+    except StopIteration as fin:
+        tiempo_promedio_espera, llamadas_perdidas, _ = fin.value
+    return eventos, tiempo_promedio_espera, llamadas_perdidas
+
+def mediana_tiempo(funcion, repeticiones: int):
+    """Mediana del tiempo de pared de varias repeticiones (robusta a corridas con ruido) y el resultado de la última"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos), resultado
+
+def pico_memoria(funcion) -> float:
+    """Pico de memoria asignada (MB) durante la llamada, según tracemalloc"""
+    tracemalloc.start()
+    try:
+        funcion()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+def huella_vector(df_vector: pd.DataFrame, df_pacientes: pd.DataFrame) -> str:
+    """Hash del vector de estado y del registro de pacientes (traza dorada de las corridas con vector)"""
+    huella = hashlib.sha256()
+    huella.update(pd.util.hash_pandas_object(df_vector, index=True).to_numpy().tobytes())
+    huella.update(pd.util.hash_pandas_object(df_pacientes.astype({'Paciente': str}), index=False).to_numpy().tobytes())
+    return huella.hexdigest()
+
+def medir_escenario(escenario: dict) -> dict:
+    parametros = parametros_escenario(escenario)
+    repeticiones = 5 if escenario['horizonte'] <= HORIZONTE_RAPIDO else 1
+
+    segundos, (eventos, tiempo_promedio, perdidas) = mediana_tiempo(lambda: correr_contando(**parametros), repeticiones)
+    medicion = {
+        'eventos': eventos,
+        'segundos': segundos,
+        'eventos_por_segundo': eventos / segundos,
+        'tiempo_promedio_espera': tiempo_promedio,
+        'llamadas_perdidas': perdidas,
+    }
+
+    if escenario['modo'] == 'estadisticas':
+        medicion['pico_memoria_mb'] = pico_memoria(lambda: correr_contando(**parametros))
+        return medicion
+
+    # Con vector de estado: el costo extra sobre la corrida sin vector es el de registrar las filas
+    def correr_con_registro():
+        registro = motor.RegistroVectorEstado()
+        correr_contando(registro=registro, **parametros)
+        return registro
+
+    segundos_vector, registro = mediana_tiempo(correr_con_registro, repeticiones)
+    segundos_dataframe, (df_vector, df_pacientes) = mediana_tiempo(
+        lambda: (registro.a_dataframe(), registro.pacientes_dataframe()), repeticiones
+    )
+    segundos_pagina, _ = mediana_tiempo(
+        lambda: motor.armar_vector_mostrado(df_vector, df_pacientes, df_vector.index[:100]), repeticiones
+    )
+    medicion.update({
+        'filas': registro.filas,
+        'segundos_con_vector': segundos_vector,
+        'microsegundos_por_fila': max(segundos_vector - segundos, 0.0) / registro.filas * 1e6,
+        'segundos_dataframe': segundos_dataframe,
+        'segundos_primera_pagina': segundos_pagina,
+        'pico_memoria_mb': pico_memoria(lambda: correr_con_registro().pacientes_dataframe()),
+        'huella_vector': huella_vector(df_vector, df_pacientes),
+    })
+    return medicion
+
+# -----------------------------------------------------------
+# 2) Comparación contra la base
+# -----------------------------------------------------------
+
+# Métricas que deben coincidir exactamente (trazas doradas)
+METRICAS_EXACTAS = ['eventos', 'tiempo_promedio_espera', 'llamadas_perdidas', 'filas', 'huella_vector']
+# Métricas de rendimiento: (nombre, True si más es mejor)
+METRICAS_RENDIMIENTO = [('eventos_por_segundo', True), ('pico_memoria_mb', False)]
+EVENTOS_MINIMOS_RENDIMIENTO = 10_000
+
+def comparar(actual: dict, base: dict, tolerancia: float) -> tuple[pd.DataFrame, list]:
+    """Tabla de comparación por escenario y lista de problemas (traza distinta o regresión mayor a tolerancia)"""
+    filas, problemas = [], []
+    for nombre, medicion in actual.items():
+        anterior = base.get(nombre)
+        if anterior is None:
+            continue
+        for metrica in METRICAS_EXACTAS:
+            if metrica in medicion and medicion[metrica] != anterior.get(metrica):
+                problemas.append(f"{nombre}: {metrica} cambió ({anterior.get(metrica)} -> {medicion[metrica]})")
+        fila = {'Escenario': nombre}
+        # Las corridas muy cortas se miden con demasiado ruido para juzgar el rendimiento
+        if medicion['eventos'] < EVENTOS_MINIMOS_RENDIMIENTO:
+            continue
+        for metrica, mas_es_mejor in METRICAS_RENDIMIENTO:
+            cociente = medicion[metrica] / anterior[metrica] if anterior.get(metrica) else float('nan')
+            fila[f'{metrica}_base'] = anterior.get(metrica)
+            fila[metrica] = medicion[metrica]
+            fila[f'{metrica}_cociente'] = cociente
+            empeoro = cociente < 1 - tolerancia if mas_es_mejor else cociente > 1 + tolerancia
+            if empeoro:
+                problemas.append(f"{nombre}: {metrica} empeoró ({anterior[metrica]:.4g} -> {medicion[metrica]:.4g})")
+        filas.append(fila)
+    return pd.DataFrame(filas), problemas
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks y trazas doradas del simulador")
+    parser.add_argument('--guardar', action='store_true', help="guardar los resultados como nueva base")
+    parser.add_argument('--rapido', action='store_true', help=f"solo horizontes hasta {HORIZONTE_RAPIDO} minutos")
+    parser.add_argument('--base', default=RUTA_BASE, help="archivo JSON de la base")
+    parser.add_argument('--tolerancia', type=float, default=0.25, help="empeoramiento relativo admitido en rendimiento")
+    parser.add_argument('--filtro', default='', help="solo escenarios cuyo nombre contenga este texto")
+    argumentos = parser.parse_args()
+
+    escenarios = [
+        e for e in ESCENARIOS
+        if (not argumentos.rapido or e['horizonte'] <= HORIZONTE_RAPIDO) and argumentos.filtro in nombre_escenario(e)
+    ]
+    resultados = {}
+    for escenario in escenarios:
+        nombre = nombre_escenario(escenario)
+        resultados[nombre] = medir_escenario(escenario)
+        medicion = resultados[nombre]
+        print(f"{nombre:32s} {medicion['eventos']:>9d} eventos  {medicion['eventos_por_segundo']:>10.0f} ev/s  "
+              f"{medicion['pico_memoria_mb']:>8.1f} MB", flush=True)
+
+    base = {}
+    if os.path.exists(argumentos.base):
+        with open(argumentos.base, encoding='utf-8') as archivo:
+            base = json.load(archivo)['escenarios']
+
+    if argumentos.guardar:
+        # Se conservan los escenarios de la base que no se corrieron esta vez (p. ej. con --rapido)
+        with open(argumentos.base, 'w', encoding='utf-8') as archivo:
+            json.dump({'semilla': SEMILLA_BENCHMARK, 'python': sys.version.split()[0],
+                       'escenarios': {**base, **resultados}}, archivo, indent=1)
+        print(f"Base guardada en {argumentos.base}")
+        return 0
+
+    if not base:
+        print("No hay base para comparar: correr con --guardar")
+        return 0
+    df_comparacion, problemas = comparar(resultados, base, argumentos.tolerancia)
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(df_comparacion.to_string(index=False, float_format=lambda x: f"{x:.3g}"))
+    for problema in problemas:
+        print("REGRESION:", problema)
+    return 1 if problemas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
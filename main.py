@@ -2,546 +2,650 @@
 """
 Simulador discreto – Ejercicio 72 
 ------------------------------------------------------------------
+Interfaz Streamlit. El motor y los análisis están en simulador.py, que no depende de streamlit.
 """
 
-import random
+import math
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from collections import OrderedDict
 from itertools import count
+from typing import Optional
 import streamlit as st
+import altair as alt
 import pandas as pd
 import numpy as np
 
+from simulador import (
+    EVENTOS, FORMATOS_EXPORTACION, METRICAS, AlmacenResultados, CorridaGuardada, PerfilMotor, armar_vector_mostrado,
+    barrer_parametros, correr_estado_estacionario, correr_replicaciones, correr_replicaciones_secuenciales,
+    exportar_centro_salud, generar_semillas, medir, simular_centro_salud,
+)
+
 # -----------------------------------------------------------
-# 1) Generadores de números aleatorios
+# Interfaz Streamlit MANTENIDA INTACTA
 # -----------------------------------------------------------
 
-def gen_exponencial(media: float) -> tuple[float, float]:
-    """Genera variable aleatoria exponencial negativa"""
-    u = random.random()
-    intervalo = -media * np.log(1 - u)
-    return u, intervalo
+# Caché compartida entre reruns y sesiones: acotada en cantidad de entradas y en tiempo de vida (segundos)
+CACHE_MAX_ENTRADAS = 16
+CACHE_TTL = 3600
 
-def gen_uniforme(a: float, b: float) -> tuple[float, float]:
-    """Genera variable aleatoria uniforme"""
-    u = random.random()
-    valor = a + (b - a) * u
-    return u, valor
+TAMANOS_PAGINA = [50, 100, 250, 500]
 
-# -----------------------------------------------------------
-# 2) Clase Paciente
-# -----------------------------------------------------------
+# Corridas en segundo plano, compartidas por todas las sesiones
+TRABAJOS_SIMULTANEOS = 2   # Corridas ejecutándose a la vez
+TRABAJOS_EN_COLA = 8       # Corridas esperando turno; más allá se rechazan
+TRABAJOS_POR_SESION = 1    # Corridas activas (en cola o ejecutándose) por sesión
+EVENTOS_POR_AVISO = 2000   # Cada cuántos eventos se actualiza el avance y se revisa la cancelación
+REFRESCO_AVANCE = 0.5      # Segundos entre refrescos del panel de avance
+ESPERA_INMEDIATA = 0.3     # Las corridas cortas se esperan al enviarlas, así se muestran sin pasar por el panel
 
-class Paciente:
-    def __init__(self, id: str, reloj_llegada: float, es_inicial=False):
-        self.id = id
-        self.tiene_obra_social = None  
-        self.tiempo_inicio_espera = reloj_llegada if not es_inicial else None  # Para pacientes iniciales no sabemos cuándo empezaron
-        self.primera_vez = True
-        self.vuelve_de_cooperadora = False
-        self.estado_actual = None
-        self.es_inicial = es_inicial  # Marca si es uno de los 4 pacientes iniciales
-        
-    def set_obra_social(self, tiene_obra_social: bool):
-        self.tiene_obra_social = tiene_obra_social
-        
-    def marcar_retorno_cooperadora(self):
-        self.primera_vez = False
-        self.vuelve_de_cooperadora = True
+# Replicaciones ya simuladas, en disco: sobreviven a reinicios y las comparten los barridos y las replicaciones
+RUTA_ALMACEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'resultados.sqlite')
+ALMACEN_MAX_BYTES = 256 * 2**20
+# Las corridas exportadas desde la interfaz quedan siempre dentro de esta carpeta
+CARPETA_CORRIDAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corridas')
 
-# -----------------------------------------------------------
-# 3) Clase Llamada
-# -----------------------------------------------------------
+def ruta_corrida(nombre: str) -> str:
+    """Carpeta de una corrida dentro de CARPETA_CORRIDAS. Rechaza rutas absolutas, '..' y enlaces que salgan de ella"""
+    if not nombre.strip() or os.path.isabs(nombre) or '..' in nombre.replace('\\', '/').split('/'):
+        raise ValueError(f"La carpeta debe ser un nombre relativo dentro de {os.path.basename(CARPETA_CORRIDAS)}/, sin '..'")
+    base = os.path.realpath(CARPETA_CORRIDAS)
+    ruta = os.path.realpath(os.path.join(base, nombre))
+    if ruta == base or os.path.commonpath([ruta, base]) != base:
+        raise ValueError(f"La carpeta debe quedar dentro de {os.path.basename(CARPETA_CORRIDAS)}/")
+    return ruta
+
+class CacheAcotada:
+    """Caché LRU compartida entre sesiones, acotada en cantidad de entradas y en tiempo de vida (segundos)"""
+
+    def __init__(self, max_entradas: int, ttl: float):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas = OrderedDict()  # clave -> (momento de guardado, valor)
+        self._lock = threading.Lock()
+        
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            if time.monotonic() - entrada[0] > self.ttl:
+                del self._entradas[clave]
+                return None
+            self._entradas.move_to_end(clave)
+            return entrada[1]
+    
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._entradas[clave] = (time.monotonic(), valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+@st.cache_resource
+def cache_corridas() -> CacheAcotada:
+    """Una sola instancia por servidor, compartida por todas las sesiones"""
+    return CacheAcotada(CACHE_MAX_ENTRADAS, CACHE_TTL)
+
+def simular_cacheado(parametros: dict, captura: dict, semilla: int, perfil: Optional[PerfilMotor] = None, observador=None,
+                     cache: Optional[CacheAcotada] = None):
+    """Salida tipada del motor memorizada por (parámetros, captura, semilla); las páginas se arman al mostrar.
+    observador se pasa al motor (ver motor_centro_salud) y no forma parte de la clave. También se guarda el checkpoint
+    final: al subir el horizonte la corrida sigue desde ahí en lugar de empezar de cero.
+    Con perfil la corrida se hace siempre, para medirla. El resultado se comparte entre sesiones: no debe modificarse.
+    cache: por defecto la del servidor (fuera del hilo de streamlit hay que pasarla)"""
+    cache = cache or cache_corridas()
+    clave = repr((sorted(parametros.items()), sorted(captura.items()), semilla))
+    resultado = cache.obtener(clave) if perfil is None else None
+    if resultado is not None:
+        return resultado
+    
+    # Si ya se corrió lo mismo con un horizonte menor se sigue desde su checkpoint final (salvo al medir)
+    clave_checkpoint = repr(('checkpoint', sorted((nombre, valor) for nombre, valor in parametros.items() if nombre != 'tiempo_simulacion'),
+                             sorted(captura.items()), semilla))
+    checkpoint = cache.obtener(clave_checkpoint)
+    reanudar = checkpoint if perfil is None and checkpoint is not None and checkpoint.horizonte <= parametros['tiempo_simulacion'] else None
+    checkpoints = []
+    resultado = simular_centro_salud(**parametros, **captura, semilla=semilla, perfil=perfil, observador=observador,
+                                     reanudar=reanudar, al_checkpoint=checkpoints.append)
+    cache.guardar(clave, resultado)
+    if checkpoint is None or checkpoints[-1].horizonte > checkpoint.horizonte:
+        cache.guardar(clave_checkpoint, checkpoints[-1])
+    return resultado
+
+class SimulacionCancelada(Exception):
+    """La lanza el observador del motor para cortar una corrida cancelada"""
+
+class LimiteTrabajos(Exception):
+    """No se acepta la corrida: la sesión o el servidor llegaron a su límite de trabajos"""
 
-class Llamada:
-    def __init__(self, id: str, reloj_llegada: float):
+class TrabajoSimulacion:
+    """Corrida del vector de estado en segundo plano. Su avance se actualiza desde el observador del motor
+    cada EVENTOS_POR_AVISO eventos, y ahí mismo se revisa si fue cancelada"""
+
+    def __init__(self, id: int, sesion: str, parametros: dict, captura: dict, semilla: int, perfil: Optional[PerfilMotor],
+                 cache: CacheAcotada):
         self.id = id
-        self.reloj_llegada = reloj_llegada
-        self.estado_actual = 'ESPERANDO'  # ESPERANDO o SIENDO_ATENDIDA
+        self.sesion = sesion
+        self.parametros = parametros
+        self.captura = captura
+        self.semilla = semilla
+        self.perfil = perfil
+        self.cache = cache
+        self.estado = 'en_cola'  # en_cola, corriendo, terminado, cancelado o error
+        self.futuro = None
+        self.reloj = 0.0
+        self.eventos = 0
+        self.tiempo_promedio_espera = 0.0
+        self.llamadas_perdidas = 0
+        self.inicio = None
+        self.fin = None
+        self.resultado = None
+        self.error = None
+        self._cancelar = threading.Event()
+    
+    @property
+    def activo(self) -> bool:
+        return self.estado in ('en_cola', 'corriendo')
+    
+    @property
+    def cancelando(self) -> bool:
+        return self._cancelar.is_set()
+    
+    @property
+    def progreso(self) -> float:
+        return min(self.reloj / self.parametros['tiempo_simulacion'], 1.0)
+    
+    @property
+    def eventos_por_segundo(self) -> float:
+        if self.inicio is None:
+            return 0.0
+        segundos = (self.fin or time.monotonic()) - self.inicio
+        return self.eventos / segundos if segundos > 0 else 0.0
+    
+    def observar(self, reloj, largo_colas, espera_acumulada, personas_esperaron, llamadas_perdidas):
+        self.eventos += 1
+        if self.eventos % EVENTOS_POR_AVISO:
+            return
+        self.reloj = reloj
+        self.tiempo_promedio_espera = espera_acumulada / personas_esperaron if personas_esperaron else 0.0
+        self.llamadas_perdidas = llamadas_perdidas
+        if self._cancelar.is_set():
+            raise SimulacionCancelada()
+    
+    def correr(self):
+        """Se ejecuta en un hilo del gestor"""
+        if self._cancelar.is_set():
+            self.estado = 'cancelado'
+            return
+        self.estado = 'corriendo'
+        self.inicio = time.monotonic()
+        try:
+            self.resultado = simular_cacheado(self.parametros, self.captura, self.semilla, perfil=self.perfil,
+                                              observador=self.observar, cache=self.cache)
+            self.reloj = self.resultado[4]['Tiempo_simulado']
+            self.tiempo_promedio_espera, self.llamadas_perdidas = self.resultado[1], self.resultado[2]
+            self.estado = 'terminado'
+        except SimulacionCancelada:
+            self.estado = 'cancelado'
+        except Exception as error:
+            self.error = error
+            self.estado = 'error'
+        finally:
+            self.fin = time.monotonic()
+    
+    def cancelar(self):
+        self._cancelar.set()
+        # Si todavía no empezó se saca de la cola directamente
+        if self.futuro is not None and self.futuro.cancel():
+            self.estado = 'cancelado'
 
-# -----------------------------------------------------------
-# 4) Simulación del centro de salud   
-# -----------------------------------------------------------
+class GestorTrabajos:
+    """Hilos que corren las simulaciones de todas las sesiones. Limita las corridas simultáneas, las que
+    esperan turno y las activas por sesión, así pocos usuarios con corridas largas no acaparan el servidor.
+    Los hilos comparten la caché de corridas: el resultado no se copia entre procesos"""
 
-def simular_centro_salud(
-    media_llegada: float = 3.0,
-    a1: float = 1.0, b1: float = 3.0,  # Mesa de turnos
-    a2: float = 0.8, b2: float = 2.4,  # Cooperadora
-    p_sin_obra: float = 0.45,  # 45% sin obra social
-    tiempo_informe: float = 0.1667,  # 10 segundos = 0.1667 min
-    intervalo_llamadas: float = 3.0,
-    c1: float = 0.5, c2: float = 1.5,  # Duración llamadas
-    ini_pacientes_mesa: int = 4,
-    ini_pacientes_coop: int = 2,
-    minutos_proxima_llamada: float = 2.0,
-    tiempo_simulacion: float = 60.0
-):
-    """Simulación    del centro de salud"""
-    
-    # INICIALIZACIÓN
-    reloj = 0.0
-    contador_pacientes = count(start=1)
-    contador_cooperadora = count(start=1)
-    contador_llamadas = count(start=1)
-    
-    # Eventos programados
-    rnd_primera_llegada, tiempo_primera_llegada = gen_exponencial(media_llegada)
-    prox_llegada_paciente = reloj + tiempo_primera_llegada
-    prox_llegada_llamada = minutos_proxima_llamada
-    fin_atencion = float('inf')
-    fin_informe_obra_social = float('inf')
-    fin_abono_consulta = float('inf')
-    fin_llamada = float('inf')
-    
-    # Estados de servidores
-    mesa_libre = True
-    cooperadora_libre = True
-    linea_ocupada = False  # NUEVA VARIABLE: indica si la línea telefónica está ocupada
-    
-    # COLAS SEPARADAS
-    cola_pacientes_mesa_normal = []    # Pacientes nuevos esperando turno
-    cola_pacientes_mesa_retorno = []   # Pacientes que vuelven de cooperadora
-    cola_cooperadora = []              # Pacientes esperando pagar
-    
-    # Objetos siendo atendidos
-    paciente_en_mesa = None
-    llamada_esperando = None  # CORREGIDO: Llamada esperando en la línea
-    llamada_siendo_atendida = None  # CORREGIDO: Llamada siendo atendida
-    paciente_en_cooperadora = None
-    
-    # Lista DINÁMICA de todos los objetos activos
-    objetos_activos = []
-    
-    # Variables para tracking de RNDs
-    ultimo_rnd_llegada = rnd_primera_llegada
-    ultimo_tiempo_entre_llegadas = tiempo_primera_llegada
-    ultimo_rnd_obra_social = None
-    ultimo_obra_social_str = ""
-    ultimo_rnd_atencion = None
-    ultimo_tiempo_atencion = None
-    ultimo_rnd_abono = None
-    ultimo_tiempo_abono = None
-    ultimo_rnd_llamada = None
-    ultimo_tiempo_llamada = None
-    
-    # CONDICIONES INICIALES CORREGIDAS
-    
-    # 4 pacientes esperando para sacar turno
-    pacientes_iniciales = []
-    for i in range(ini_pacientes_mesa):
-        pac = Paciente(f"P{next(contador_pacientes)}", 0.0, es_inicial=True)
-        pacientes_iniciales.append(pac)
-        objetos_activos.append(pac)
-    
-    # El primer paciente pasa INMEDIATAMENTE a ser atendido
-    if pacientes_iniciales:
-        primer_paciente = pacientes_iniciales.pop(0)
-        primer_paciente.estado_actual = 'SAMT'
-        paciente_en_mesa = primer_paciente
-        mesa_libre = False
-        
-        # Calcular obra social y tiempo de atención inmediatamente
-        ultimo_rnd_obra_social = random.random()
-        tiene_obra_social = ultimo_rnd_obra_social >= p_sin_obra
-        primer_paciente.set_obra_social(tiene_obra_social)
-        ultimo_obra_social_str = "Con obra social" if tiene_obra_social else "Sin obra social"
-        
-        if tiene_obra_social:
-            ultimo_rnd_atencion, ultimo_tiempo_atencion = gen_uniforme(a1, b1)
-            fin_atencion = reloj + ultimo_tiempo_atencion
-        else:
-            fin_informe_obra_social = reloj + tiempo_informe
-    
-    # Los otros 3 pacientes van a la cola
-    for pac in pacientes_iniciales:
-        pac.estado_actual = 'EAMT'
-        cola_pacientes_mesa_normal.append(pac)
-    
-    # 2 pacientes esperando pagar consulta
-    pacientes_cooperadora = []
-    for i in range(ini_pacientes_coop):
-        pac = Paciente(f"CP{next(contador_cooperadora)}", 0.0, es_inicial=True)
-        pac.set_obra_social(False)
-        pac.primera_vez = False
-        pacientes_cooperadora.append(pac)
-        objetos_activos.append(pac)
-    
-    # El primero pasa INMEDIATAMENTE a pagar
-    if pacientes_cooperadora:
-        primer_coop = pacientes_cooperadora.pop(0)
-        primer_coop.estado_actual = 'AC'
-        paciente_en_cooperadora = primer_coop
-        cooperadora_libre = False
-        
-        ultimo_rnd_abono, ultimo_tiempo_abono = gen_uniforme(a2, b2)
-        fin_abono_consulta = reloj + ultimo_tiempo_abono
-    
-    # El otro espera en cola
-    for pac in pacientes_cooperadora:
-        pac.estado_actual = 'EAC'
-        cola_cooperadora.append(pac)
-    
-    # Estadísticas CORREGIDAS
-    llamadas_perdidas = 0
-    tiempo_espera_acumulado = 0.0
-    cantidad_personas_esperaron = 0
-    
-    # Vector de estado
-    vector_estado = []
-    
-    # Variable para mantener los IDs conocidos
-    ids_conocidos = []
-    
-    def formatear_numero(num):
-        if num == float('inf') or num == float('-inf'):
-            return ""
-        if isinstance(num, (int, float)):
-            return f"{num:.4f}" if num != int(num) else f"{int(num)}"
-        return str(num)
-    
-    def obtener_pacientes_activos():
-        """Obtiene SOLO los PACIENTES activos con sus posiciones fijas"""
-        pacientes = []
-        
-        # Crear un diccionario para mantener las posiciones de los pacientes
-        pacientes_dict = {}
-        
-        # 1. Paciente siendo atendido en mesa
-        if paciente_en_mesa:
-            pacientes_dict[paciente_en_mesa.id] = {
-                'id': paciente_en_mesa.id,
-                'estado': paciente_en_mesa.estado_actual,
-                'hora_inicio_espera': formatear_numero(paciente_en_mesa.tiempo_inicio_espera) if paciente_en_mesa.tiempo_inicio_espera is not None else ""
-            }
-        
-        # 2. Pacientes en cola mesa (retorno NO tiene hora inicio porque no esperan)
-        for pac in cola_pacientes_mesa_retorno:
-            pacientes_dict[pac.id] = {
-                'id': pac.id,
-                'estado': pac.estado_actual,
-                'hora_inicio_espera': ""  # NO ESPERAN - van directo
-            }
-                
-        for pac in cola_pacientes_mesa_normal:
-            pacientes_dict[pac.id] = {
-                'id': pac.id,
-                'estado': pac.estado_actual, 
-                'hora_inicio_espera': formatear_numero(pac.tiempo_inicio_espera) if pac.tiempo_inicio_espera is not None else ""
-            }
-        
-        # 3. Paciente en cooperadora
-        if paciente_en_cooperadora:
-            pacientes_dict[paciente_en_cooperadora.id] = {
-                'id': paciente_en_cooperadora.id,
-                'estado': paciente_en_cooperadora.estado_actual,
-                'hora_inicio_espera': ""  # No esperan en cooperadora
-            }
-            
-        # 4. Pacientes en cola cooperadora
-        for pac in cola_cooperadora:
-            pacientes_dict[pac.id] = {
-                'id': pac.id,
-                'estado': pac.estado_actual,
-                'hora_inicio_espera': ""  # No esperan en cooperadora
-            }
-        
-        # Convertir a lista ordenada por ID para mantener consistencia
-        pacientes = list(pacientes_dict.values())
-                
-        return pacientes
-    
-    def registrar_estado(evento: str):
-        nonlocal ids_conocidos  # Acceder a la variable del ámbito superior
-        
-        # OBTENER SOLO PACIENTES ACTIVOS
-        pacientes = obtener_pacientes_activos()
-        
-        # Determinar estado de mesa (CORREGIDO)
-        estado_mesa = 'Libre'
-        if llamada_siendo_atendida:
-            estado_mesa = 'AtendendoLlamada'
-        elif not mesa_libre:
-            estado_mesa = 'Ocupado'
-        
-        # Contar colas
-        cola_pacientes_count = len(cola_pacientes_mesa_retorno) + len(cola_pacientes_mesa_normal)
-        cola_llamadas_count = 1 if llamada_esperando else 0
-        cola_coop_count = len(cola_cooperadora)
-        
-        fila = {
-            'Evento': evento,
-            'Reloj': formatear_numero(reloj),
-            'RND_llegada_paciente': formatear_numero(ultimo_rnd_llegada) if ultimo_rnd_llegada else "",
-            'Tiempo_entre_llegadas': formatear_numero(ultimo_tiempo_entre_llegadas) if ultimo_tiempo_entre_llegadas else "",
-            'Proxima_llegada': formatear_numero(prox_llegada_paciente),
-            'RND_obra_social': formatear_numero(ultimo_rnd_obra_social) if ultimo_rnd_obra_social else "",
-            'Obra_Social': ultimo_obra_social_str,
-            'fin_informe_obra_social': formatear_numero(fin_informe_obra_social),
-            'RND_tiempo_atencion': formatear_numero(ultimo_rnd_atencion) if ultimo_rnd_atencion else "",
-            'Tiempo_de_atencion': formatear_numero(ultimo_tiempo_atencion) if ultimo_tiempo_atencion else "",
-            'fin_atencion': formatear_numero(fin_atencion),
-            'RND_abono_consulta': formatear_numero(ultimo_rnd_abono) if ultimo_rnd_abono else "",
-            'Tiempo_de_abono_de_consulta': formatear_numero(ultimo_tiempo_abono) if ultimo_tiempo_abono else "",
-            'fin_abono_consulta': formatear_numero(fin_abono_consulta),
-            'Proxima_llegada_llamada': formatear_numero(prox_llegada_llamada),
-            'RND_llamada': formatear_numero(ultimo_rnd_llamada) if ultimo_rnd_llamada else "",
-            'Tiempo_de_llamada': formatear_numero(ultimo_tiempo_llamada) if ultimo_tiempo_llamada else "",
-            'fin_llamada': formatear_numero(fin_llamada),
-            
-            # Estados de empleados
-            'Empleado_mesa_estado': estado_mesa,
-            'Empleado_mesa_cola_pacientes': cola_pacientes_count,
-            'Empleado_mesa_cola_llamadas': cola_llamadas_count,
-            'Empleado_cooperadora_estado': 'Libre' if cooperadora_libre else 'Ocupado',
-            'Empleado_cooperadora_cola': cola_coop_count,
-            
-            'Cantidad_de_llamadas_perdidas_por_tener_la_linea_ocupada': llamadas_perdidas,
-            'Acum_tiempo_de_espera': formatear_numero(tiempo_espera_acumulado),
-            'Cantidad_de_personas_que_esperan': cantidad_personas_esperaron
+    def __init__(self, cache: CacheAcotada, simultaneos: int, en_cola: int, por_sesion: int):
+        self.cache = cache
+        self.en_cola = en_cola
+        self.por_sesion = por_sesion
+        self._pool = ThreadPoolExecutor(max_workers=simultaneos, thread_name_prefix='simulacion')
+        self._trabajos = {}  # id -> TrabajoSimulacion, hasta que la sesión lo retira (o vence)
+        self._ids = count(1)
+        self._lock = threading.Lock()
+    
+    def enviar(self, sesion: str, parametros: dict, captura: dict, semilla: int,
+               perfil: Optional[PerfilMotor] = None) -> TrabajoSimulacion:
+        with self._lock:
+            # Los terminados que ninguna sesión retiró (p. ej. pestañas cerradas) se descartan al vencer
+            for id, trabajo in list(self._trabajos.items()):
+                if not trabajo.activo and time.monotonic() - (trabajo.fin or 0.0) > CACHE_TTL:
+                    del self._trabajos[id]
+            activos = [trabajo for trabajo in self._trabajos.values() if trabajo.activo]
+            if sum(trabajo.sesion == sesion for trabajo in activos) >= self.por_sesion:
+                raise LimiteTrabajos("Ya hay una corrida en curso: esperá a que termine o cancelala")
+            if sum(trabajo.estado == 'en_cola' for trabajo in activos) >= self.en_cola:
+                raise LimiteTrabajos("El servidor está ocupado con otras corridas: probá de nuevo en unos minutos")
+            trabajo = TrabajoSimulacion(next(self._ids), sesion, parametros, captura, semilla, perfil, self.cache)
+            self._trabajos[trabajo.id] = trabajo
+            trabajo.futuro = self._pool.submit(trabajo.correr)
+        return trabajo
+    
+    def obtener(self, id: int) -> Optional[TrabajoSimulacion]:
+        return self._trabajos.get(id)
+    
+    def retirar(self, id: int) -> Optional[TrabajoSimulacion]:
+        with self._lock:
+            return self._trabajos.pop(id, None)
+
+@st.cache_resource
+def almacen_resultados() -> AlmacenResultados:
+    """Una sola instancia por servidor; el archivo lo pueden compartir varios servidores"""
+    return AlmacenResultados(RUTA_ALMACEN, ALMACEN_MAX_BYTES)
+
+@st.cache_resource
+def gestor_trabajos() -> GestorTrabajos:
+    """Una sola instancia por servidor, compartida por todas las sesiones"""
+    return GestorTrabajos(cache_corridas(), TRABAJOS_SIMULTANEOS, TRABAJOS_EN_COLA, TRABAJOS_POR_SESION)
+
+def id_sesion() -> str:
+    if 'id_sesion' not in st.session_state:
+        st.session_state['id_sesion'] = uuid.uuid4().hex
+    return st.session_state['id_sesion']
+
+@st.fragment(run_every=REFRESCO_AVANCE)
+def mostrar_avance_trabajo(id_trabajo: int):
+    """Se refresca solo (sin rerun de la página) mientras la corrida avanza; al terminar hace un rerun completo
+    para que main recoja el resultado"""
+    trabajo = gestor_trabajos().obtener(id_trabajo)
+    if trabajo is None or not trabajo.activo:
+        st.rerun()
+    tiempo_sim = trabajo.parametros['tiempo_simulacion']
+    if trabajo.estado == 'en_cola':
+        st.progress(0.0, text="En cola: esperando que se libere el servidor ...")
+    else:
+        st.progress(trabajo.progreso, text=f"Reloj: {trabajo.reloj:.2f} / {tiempo_sim} min")
+    col_eventos, col_perdidas, col_espera = st.columns(3)
+    col_eventos.metric("Eventos por segundo", f"{trabajo.eventos_por_segundo:,.0f}", help=f"{trabajo.eventos:,} eventos")
+    col_perdidas.metric("Llamadas perdidas (parcial)", trabajo.llamadas_perdidas)
+    col_espera.metric("Tiempo promedio de espera (parcial)", f"{trabajo.tiempo_promedio_espera:.3f} min")
+    st.button("Cancelar corrida", on_click=trabajo.cancelar, disabled=trabajo.cancelando)
+
+def recoger_trabajo():
+    """Si la corrida de la sesión ya terminó, la pasa a st.session_state['simulacion'].
+    Devuelve el id del trabajo si sigue activo"""
+    id_trabajo = st.session_state.get('trabajo')
+    if id_trabajo is None:
+        return None
+    trabajo = gestor_trabajos().obtener(id_trabajo)
+    if trabajo is not None and trabajo.activo:
+        return id_trabajo
+    
+    gestor_trabajos().retirar(id_trabajo)
+    del st.session_state['trabajo']
+    if trabajo is None:
+        return None
+    if trabajo.estado == 'terminado':
+        st.session_state['simulacion'] = {
+            'parametros': trabajo.parametros,
+            'captura': trabajo.captura,
+            'semilla': trabajo.semilla,
+            'resultado': trabajo.resultado,
+            'perfil': trabajo.perfil,
         }
-        
-        # CREAR DICCIONARIO DE PACIENTES POR POSICIÓN FIJA
-        # Agregar nuevos IDs
-        for pac in pacientes:
-            if pac['id'] not in ids_conocidos:
-                ids_conocidos.append(pac['id'])
-        
-        # Crear lista ordenada de IDs
-        ids_ordenados = ids_conocidos.copy()  # Mantener orden de inserción
-        
-        # Crear mapeo por posición fija
-        pacientes_dict = {pac['id']: pac for pac in pacientes}
-        
-        # Llenar columnas de pacientes usando posiciones fijas
-        for i, id_paciente in enumerate(ids_ordenados, 1):
-            if id_paciente in pacientes_dict:
-                # Paciente activo
-                pac = pacientes_dict[id_paciente]
-                fila[f'Paciente_{i}_Estado'] = pac['estado']
-                fila[f'Paciente_{i}_Hora_inicio_espera'] = pac['hora_inicio_espera']
-            else:
-                # Paciente destruido - campos vacíos
-                fila[f'Paciente_{i}_Estado'] = ""
-                fila[f'Paciente_{i}_Hora_inicio_espera'] = ""
-        
-        vector_estado.append(fila)
-    
-    # Registrar estado inicial
-    registrar_estado("Inicializacion")
-    
-    # Función auxiliar para atender siguiente en mesa
-    def atender_siguiente_en_mesa():
-        """LÓGICA   : Prioridad Llamadas > Pacientes Retorno > Pacientes Normales"""
-        nonlocal mesa_libre, paciente_en_mesa, llamada_siendo_atendida, llamada_esperando, linea_ocupada
-        nonlocal ultimo_rnd_obra_social, ultimo_obra_social_str
-        nonlocal ultimo_rnd_atencion, ultimo_tiempo_atencion, fin_atencion, fin_informe_obra_social
-        nonlocal ultimo_rnd_llamada, ultimo_tiempo_llamada, fin_llamada
-        nonlocal tiempo_espera_acumulado, cantidad_personas_esperaron
-        
-        # PRIORIDAD 1: Llamada esperando en línea
-        if llamada_esperando:
-            mesa_libre = False
-            linea_ocupada = True
-            llamada_siendo_atendida = llamada_esperando
-            llamada_esperando = None
-            llamada_siendo_atendida.estado_actual = 'SIENDO_ATENDIDA'
-            
-            ultimo_rnd_llamada, ultimo_tiempo_llamada = gen_uniforme(c1, c2)
-            fin_llamada = reloj + ultimo_tiempo_llamada
-            return
-        
-        # PRIORIDAD 2: Pacientes de retorno (NO ESPERAN - van directo)
-        paciente_a_atender = None
-        if cola_pacientes_mesa_retorno:
-            paciente_a_atender = cola_pacientes_mesa_retorno.pop(0)
-            # PACIENTES DE RETORNO NO ESPERAN - no se cuenta tiempo
-        # PRIORIDAD 3: Pacientes normales
-        elif cola_pacientes_mesa_normal:
-            paciente_a_atender = cola_pacientes_mesa_normal.pop(0)
-            # CÁLCULO CORREGIDO: Solo si no es paciente inicial
-            if not paciente_a_atender.es_inicial and paciente_a_atender.tiempo_inicio_espera is not None:
-                tiempo_espera = reloj - paciente_a_atender.tiempo_inicio_espera
-                tiempo_espera_acumulado += tiempo_espera
-                cantidad_personas_esperaron += 1
-        
-        if paciente_a_atender:
-            mesa_libre = False
-            paciente_en_mesa = paciente_a_atender
-            paciente_a_atender.estado_actual = 'SAMT'
-            
-            if paciente_a_atender.tiene_obra_social is None:
-                ultimo_rnd_obra_social = random.random()
-                tiene_obra_social = ultimo_rnd_obra_social >= p_sin_obra
-                paciente_a_atender.set_obra_social(tiene_obra_social)
-                ultimo_obra_social_str = "Con obra social" if tiene_obra_social else "Sin obra social"
-            
-            if paciente_a_atender.tiene_obra_social or paciente_a_atender.vuelve_de_cooperadora:
-                ultimo_rnd_atencion, ultimo_tiempo_atencion = gen_uniforme(a1, b1)
-                fin_atencion = reloj + ultimo_tiempo_atencion
+    elif trabajo.estado == 'cancelado':
+        st.toast(f"Corrida cancelada en el minuto {trabajo.reloj:.2f}")
+    else:
+        st.error(f"La corrida falló: {trabajo.error!r}")
+    return None
+
+def mostrar_vector_paginado(df_resultado: pd.DataFrame, df_pacientes: pd.DataFrame, perfil: Optional[PerfilMotor] = None):
+    """Muestra una página del vector de estado. Solo esa página se formatea y se arma con multi-índice,
+    con las columnas de los pacientes activos en ella"""
+    paginar_vector(
+        len(df_resultado),
+        lambda inicio, cantidad: (df_resultado, df_pacientes, df_resultado.index[inicio:inicio + cantidad]),
+        lambda numero: int(df_resultado.index.searchsorted(numero, side='left')),
+        lambda minuto: int(df_resultado['Reloj'].searchsorted(minuto, side='left')),
+        perfil,
+    )
+
+def paginar_vector(total: int, leer_pagina, posicion_evento, posicion_minuto, perfil: Optional[PerfilMotor] = None):
+    """Controles de página, salto a evento y salto a minuto sobre cualquier origen de filas.
+    leer_pagina(inicio, cantidad) -> (df_vector, df_pacientes, filas a mostrar);
+    posicion_evento / posicion_minuto -> posición de la primera fila que cumple"""
+    col_tamano, col_pagina, col_evento, col_minuto = st.columns(4)
+    tamano = col_tamano.selectbox("Filas por página", TAMANOS_PAGINA, index=1)
+    paginas = max(1, math.ceil(total / tamano))
+    if st.session_state.get('pagina_vector', 1) > paginas:
+        st.session_state['pagina_vector'] = paginas
+    
+    def ir_a_posicion(posicion: int):
+        # Sin filas (p. ej. una ventana de captura vacía) solo existe la página 1
+        st.session_state['pagina_vector'] = min(max(posicion, 0), total - 1) // tamano + 1 if total > 0 else 1
+    
+    def ir_a_evento():
+        if st.session_state['ir_evento'] is not None:
+            ir_a_posicion(posicion_evento(st.session_state['ir_evento']))
+    
+    def ir_a_minuto():
+        if st.session_state['ir_minuto'] is not None:
+            ir_a_posicion(posicion_minuto(st.session_state['ir_minuto']))
+    
+    pagina = col_pagina.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, step=1, key='pagina_vector')
+    col_evento.number_input("Ir a evento N°", min_value=0, value=None, step=1, key='ir_evento', on_change=ir_a_evento)
+    col_minuto.number_input("Ir a minuto", min_value=0.0, value=None, step=1.0, key='ir_minuto', on_change=ir_a_minuto)
+    
+    inicio = (pagina - 1) * tamano
+    df_vector, df_pacientes, filas = leer_pagina(inicio, tamano)
+    with medir(perfil, 'multiindice'):
+        df_mostrado = armar_vector_mostrado(df_vector, df_pacientes, filas)
+    st.dataframe(df_mostrado, use_container_width=True, height=500)
+    st.caption(f"Filas {inicio + 1} a {inicio + len(filas)} de {total}" if total > 0 else "Sin filas capturadas")
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, ttl=CACHE_TTL, show_spinner=False)
+def replicaciones_cacheadas(parametros: dict, replicaciones: int, semilla: int, nivel_confianza: float):
+    """Replicaciones memorizadas por (parámetros, cantidad, semilla, nivel de confianza)"""
+    return correr_replicaciones(
+        parametros, replicaciones=replicaciones, semilla=semilla, nivel_confianza=nivel_confianza,
+        almacen=almacen_resultados()
+    )
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, ttl=CACHE_TTL, show_spinner=False)
+def replicaciones_secuenciales_cacheadas(parametros: dict, precision_relativa: float, max_replicaciones: int,
+                                         semilla: int, nivel_confianza: float):
+    """Replicaciones hasta precisión objetivo, memorizadas por sus argumentos"""
+    return correr_replicaciones_secuenciales(
+        parametros, precision_relativa=precision_relativa, nivel_confianza=nivel_confianza,
+        max_replicaciones=max_replicaciones, semilla=semilla, almacen=almacen_resultados()
+    )
+
+def mostrar_replicaciones(parametros: dict, semilla: Optional[int] = None):
+    """Modo Replicaciones: N corridas independientes en paralelo, sin vector de estado"""
+    st.sidebar.markdown("### 🔁 Replicaciones")
+    hasta_precision = st.sidebar.checkbox("Hasta alcanzar una precisión objetivo", value=False)
+    if hasta_precision:
+        precision_relativa = st.sidebar.number_input(
+            "Semiamplitud relativa objetivo (%)", 0.1, 50.0, 5.0, 0.5,
+            help="Se agregan replicaciones por lotes hasta que el IC de ambas métricas sea menor a este % de su media"
+        ) / 100
+        replicaciones = st.sidebar.number_input("Máximo de replicaciones", 10, 100000, 2000, 100)
+    else:
+        replicaciones = st.sidebar.number_input("Cantidad de replicaciones", 2, 10000, 100, 10)
+    nivel_confianza = st.sidebar.slider("Nivel de confianza", 0.80, 0.99, 0.95, 0.01)
+    
+    if st.sidebar.button("Ejecutar Replicaciones", type="primary"):
+        semilla_corrida = semilla if semilla is not None else generar_semillas(1)[0]
+        with st.spinner("Ejecutando replicaciones ..."):
+            if hasta_precision:
+                df_replicaciones, df_resumen, informe = replicaciones_secuenciales_cacheadas(
+                    parametros, precision_relativa, replicaciones, semilla_corrida, nivel_confianza
+                )
             else:
-                fin_informe_obra_social = reloj + tiempo_informe
-                ultimo_rnd_atencion = None
-                ultimo_tiempo_atencion = None
-        else:
-            mesa_libre = True
-            ultimo_rnd_obra_social = None
-            ultimo_obra_social_str = ""
-            ultimo_rnd_atencion = None
-            ultimo_tiempo_atencion = None
-    
-    def atender_siguiente_paciente_cooperadora():
-        nonlocal cooperadora_libre, paciente_en_cooperadora, ultimo_rnd_abono, ultimo_tiempo_abono, fin_abono_consulta
-        
-        if cola_cooperadora:
-            cooperadora_libre = False
-            paciente_en_cooperadora = cola_cooperadora.pop(0)
-            paciente_en_cooperadora.estado_actual = 'AC'
-            ultimo_rnd_abono, ultimo_tiempo_abono = gen_uniforme(a2, b2)
-            fin_abono_consulta = reloj + ultimo_tiempo_abono
+                inicio = time.perf_counter()
+                df_replicaciones, df_resumen = replicaciones_cacheadas(parametros, replicaciones, semilla_corrida, nivel_confianza)
+                informe = {'Replicaciones': replicaciones, 'Segundos': time.perf_counter() - inicio}
+            st.session_state['replicaciones'] = {
+                'semilla': semilla_corrida,
+                'nivel_confianza': nivel_confianza,
+                'resultado': (df_replicaciones, df_resumen),
+                'informe': informe,
+            }
+    
+    corrida = st.session_state.get('replicaciones')
+    if corrida is None:
+        return
+    df_replicaciones, df_resumen = corrida['resultado']
+    nivel_confianza = corrida['nivel_confianza']
+    informe = corrida['informe']
+    
+    st.markdown("## 📈 Estadísticas sobre las Replicaciones")
+    st.caption(f"Semilla base: {corrida['semilla']} - {informe['Replicaciones']} replicaciones en {informe['Segundos']:.2f} s")
+    if informe.get('Precision_alcanzada') is False:
+        st.warning(f"No se alcanzó la precisión objetivo (corte por {informe['Motivo']})")
+    etiquetas = {
+        'Llamadas_perdidas': "🔴 A) Llamadas Perdidas",
+        'Tiempo_promedio_espera': "⏱️ B) Tiempo Promedio de Espera",
+    }
+    col1, col2 = st.columns(2)
+    for columna, metrica in zip((col1, col2), ('Llamadas_perdidas', 'Tiempo_promedio_espera')):
+        resumen = df_resumen.loc[metrica]
+        with columna:
+            st.metric(
+                etiquetas[metrica],
+                value=f"{resumen['Media']:.3f}",
+                help=f"IC {nivel_confianza:.0%}: [{resumen['IC_inferior']:.3f} ; {resumen['IC_superior']:.3f}] - Desvío: {resumen['Desvio']:.3f}"
+            )
+            st.caption(f"IC {nivel_confianza:.0%}: [{resumen['IC_inferior']:.3f} ; {resumen['IC_superior']:.3f}]")
+            frecuencias, bordes = np.histogram(df_replicaciones[metrica], bins='auto')
+            st.bar_chart(pd.Series(frecuencias, index=[f"{b:.2f}" for b in bordes[:-1]], name='Replicaciones'))
+    
+    st.dataframe(df_resumen, use_container_width=True)
+    with st.expander("Métricas por replicación"):
+        st.dataframe(df_replicaciones, use_container_width=True)
+
+PARAMETROS_BARRIBLES = {
+    'media_llegada': "Media entre llegadas (min)",
+    'intervalo_llamadas': "Intervalo llamadas (min)",
+    'p_sin_obra': "Proporción sin obra social",
+    'a1': "Mesa de turno – Mín (min)",
+    'b1': "Mesa de turno – Máx (min)",
+    'a2': "Cooperadora – Mín (min)",
+    'b2': "Cooperadora – Máx (min)",
+    'c1': "Duración de llamada – Mín (min)",
+    'c2': "Duración de llamada – Máx (min)",
+    'tiempo_informe': "Tiempo informar obra social (min)",
+    'empleados_mesa': "Empleados de mesa",
+    'cajeros_cooperadora': "Cajeros de cooperadora",
+    'lineas_telefonicas': "Líneas telefónicas",
+}
+# Cantidades de servidores: su grilla se redondea a enteros
+PARAMETROS_ENTEROS = {'empleados_mesa', 'cajeros_cooperadora', 'lineas_telefonicas'}
+
+def grafico_barrido(df: pd.DataFrame, nombres: list, metrica: str):
+    """Un parámetro: línea con banda de confianza. Dos parámetros: mapa de calor y líneas por valor del segundo"""
+    media, inferior, superior = f'{metrica}_media', f'{metrica}_IC_inferior', f'{metrica}_IC_superior'
+    eje_x = nombres[0]
+    color = alt.Color(f'{nombres[1]}:N') if len(nombres) > 1 else alt.value('steelblue')
+    base = alt.Chart(df).encode(x=alt.X(f'{eje_x}:Q', title=PARAMETROS_BARRIBLES[eje_x]))
+    banda = base.mark_area(opacity=0.25).encode(y=alt.Y(f'{inferior}:Q', title=metrica), y2=f'{superior}:Q', color=color)
+    linea = base.mark_line(point=True).encode(y=f'{media}:Q', color=color, tooltip=nombres + [media, inferior, superior])
+    lineas = banda + linea
+    if len(nombres) == 1:
+        return lineas
+    
+    eje_y = nombres[1]
+    mapa = alt.Chart(df).mark_rect().encode(
+        x=alt.X(f'{eje_x}:O', title=PARAMETROS_BARRIBLES[eje_x]),
+        y=alt.Y(f'{eje_y}:O', title=PARAMETROS_BARRIBLES[eje_y], sort='descending'),
+        color=alt.Color(f'{media}:Q', title=metrica),
+        tooltip=nombres + [media, inferior, superior]
+    )
+    return alt.vconcat(mapa, lineas)
+
+def mostrar_barrido(parametros: dict, semilla: Optional[int] = None):
+    """Modo Barrido: grilla de uno o dos parámetros x replicaciones en paralelo, con resultados parciales"""
+    st.sidebar.markdown("### 🗺️ Barrido de parámetros")
+    grilla = {}
+    for eje in ("X", "Y"):
+        opciones = [n for n in PARAMETROS_BARRIBLES if n not in grilla]
+        if eje == "Y":
+            opciones = [None] + opciones
+        nombre = st.sidebar.selectbox(
+            f"Parámetro eje {eje}", opciones,
+            format_func=lambda n: PARAMETROS_BARRIBLES[n] if n else "(ninguno)", key=f'barrido_parametro_{eje}'
+        )
+        if nombre is None:
+            continue
+        col_desde, col_hasta, col_puntos = st.sidebar.columns(3)
+        desde = col_desde.number_input("Desde", value=float(parametros[nombre]), key=f'barrido_desde_{eje}_{nombre}')
+        hasta = col_hasta.number_input("Hasta", value=float(parametros[nombre]) * 2, key=f'barrido_hasta_{eje}_{nombre}')
+        puntos = col_puntos.number_input("Puntos", 2, 50, 5, key=f'barrido_puntos_{eje}_{nombre}')
+        if nombre in PARAMETROS_ENTEROS:
+            grilla[nombre] = np.unique(np.round(np.linspace(max(desde, 1), max(hasta, 1), puntos))).astype(int).tolist()
         else:
-            cooperadora_libre = True
-            ultimo_rnd_abono = None
-            ultimo_tiempo_abono = None
+            grilla[nombre] = np.round(np.linspace(desde, hasta, puntos), 4).tolist()
+    
+    replicaciones = st.sidebar.number_input("Replicaciones por punto", 2, 1000, 10)
+    nivel_confianza = st.sidebar.slider("Nivel de confianza", 0.80, 0.99, 0.95, 0.01)
+    metrica = st.sidebar.selectbox("Métrica", METRICAS)
+    
+    if st.sidebar.button("Ejecutar Barrido", type="primary"):
+        total = math.prod(len(valores) for valores in grilla.values())
+        progreso = st.progress(0.0, text="Barrido en curso ...")
+        parcial = st.empty()
+        filas = []
+        ultimo_dibujo = 0.0
+        for fila in barrer_parametros(parametros, grilla, replicaciones=replicaciones, semilla=semilla,
+                                      nivel_confianza=nivel_confianza, almacen=almacen_resultados()):
+            filas.append(fila)
+            progreso.progress(len(filas) / total, text=f"{len(filas)} de {total} puntos")
+            # Se redibuja a lo sumo dos veces por segundo
+            if time.monotonic() - ultimo_dibujo > 0.5:
+                parcial.altair_chart(grafico_barrido(pd.DataFrame(filas), list(grilla), metrica), use_container_width=True)
+                ultimo_dibujo = time.monotonic()
+        progreso.empty()
+        parcial.empty()
+        st.session_state['barrido'] = {
+            'grilla': grilla,
+            'resultado': pd.DataFrame(filas).sort_values(list(grilla)).reset_index(drop=True),
+        }
     
-    # MOTOR DE SIMULACIÓN CORREGIDO
-    while reloj < tiempo_simulacion:
-        
-        # Encontrar próximo evento
-        eventos_programados = [
-            ('llegada_paciente', prox_llegada_paciente),
-            ('llegada_llamada', prox_llegada_llamada),
-            ('fin_atencion', fin_atencion),
-            ('fin_informe_obra_social', fin_informe_obra_social),
-            ('fin_abono_consulta', fin_abono_consulta),
-            ('fin_llamada', fin_llamada)
-        ]
-        
-        eventos_validos = [(evento, tiempo) for evento, tiempo in eventos_programados if tiempo < float('inf')]
-        
-        if not eventos_validos:
-            break
-            
-        proximo_evento, momento_evento = min(eventos_validos, key=lambda x: x[1])
-        reloj = momento_evento
-        
-        # PROCESAMIENTO DE EVENTOS CORREGIDO
-        if proximo_evento == 'llegada_paciente':
-            # Generar próxima llegada
-            ultimo_rnd_llegada, ultimo_tiempo_entre_llegadas = gen_exponencial(media_llegada)
-            prox_llegada_paciente = reloj + ultimo_tiempo_entre_llegadas
-            
-            # Crear nuevo paciente DINÁMICAMENTE
-            nuevo_pac = Paciente(f"P{next(contador_pacientes)}", reloj)
-            nuevo_pac.estado_actual = 'EAMT'
-            cola_pacientes_mesa_normal.append(nuevo_pac)
-            objetos_activos.append(nuevo_pac)
-            
-            registrar_estado("llegada_paciente")
-            
-        elif proximo_evento == 'llegada_llamada':
-            # Programar próxima llamada
-            prox_llegada_llamada = reloj + intervalo_llamadas
-            
-            # LÓGICA    SEGÚN ESPECIFICACIONES:
-            if linea_ocupada:
-                # La línea YA está ocupada (hay llamada siendo atendida O esperando) -> SE PIERDE
-                llamadas_perdidas += 1
-                ultimo_rnd_llamada = None
-                ultimo_tiempo_llamada = None
-                registrar_estado("llegada_llamada")
-            elif not mesa_libre:
-                # Mesa ocupada por paciente pero línea libre -> llamada ESPERA en la línea
-                nueva_llamada = Llamada(f"L{next(contador_llamadas)}", reloj)
-                llamada_esperando = nueva_llamada
-                nueva_llamada.estado_actual = 'ESPERANDO'
-                objetos_activos.append(nueva_llamada)
-                linea_ocupada = True
-                ultimo_rnd_llamada = None
-                ultimo_tiempo_llamada = None
-                registrar_estado("llegada_llamada")
-            else:
-                # Mesa libre -> atender llamada inmediatamente
-                nueva_llamada = Llamada(f"L{next(contador_llamadas)}", reloj)
-                llamada_siendo_atendida = nueva_llamada
-                nueva_llamada.estado_actual = 'SIENDO_ATENDIDA'
-                objetos_activos.append(nueva_llamada)
-                mesa_libre = False
-                linea_ocupada = True
-                
-                ultimo_rnd_llamada, ultimo_tiempo_llamada = gen_uniforme(c1, c2)
-                fin_llamada = reloj + ultimo_tiempo_llamada
-                registrar_estado("llegada_llamada")
-                
-        elif proximo_evento == 'fin_llamada':
-            # TERMINA LLAMADA - LIBERAR LÍNEA
-            if llamada_siendo_atendida:
-                objetos_activos.remove(llamada_siendo_atendida)  # REMOVER de objetos activos
-                llamada_siendo_atendida = None
-            
-            linea_ocupada = False  # LIBERAR LÍNEA
-            fin_llamada = float('inf')
-            ultimo_rnd_llamada = None
-            ultimo_tiempo_llamada = None
-            
-            atender_siguiente_en_mesa()
-            
-            registrar_estado("fin_llamada")
-            
-        elif proximo_evento == 'fin_atencion':
-            # TERMINA ATENCIÓN DE PACIENTE - DESTRUIR COMPLETAMENTE
-            if paciente_en_mesa:
-                # El paciente se DESTRUYE completamente - no se reutiliza
-                objetos_activos.remove(paciente_en_mesa)  # REMOVER de objetos activos
-                paciente_en_mesa = None
-            
-            fin_atencion = float('inf')
-            atender_siguiente_en_mesa()
-            registrar_estado("fin_atencion")
-            
-        elif proximo_evento == 'fin_informe_obra_social':
-            # PACIENTE SIN OBRA SOCIAL VA A COOPERADORA (MANTIENE EL MISMO OBJETO)
-            if paciente_en_mesa:
-                # El paciente CONTINÚA existiendo pero cambia de lugar
-                paciente_en_mesa.estado_actual = 'EAC' if not cooperadora_libre else 'AC'
-                
-                if cooperadora_libre:
-                    # Va directo a ser atendido en cooperadora
-                    paciente_en_cooperadora = paciente_en_mesa
-                    paciente_en_cooperadora.estado_actual = 'AC'
-                    cooperadora_libre = False
-                    ultimo_rnd_abono, ultimo_tiempo_abono = gen_uniforme(a2, b2)
-                    fin_abono_consulta = reloj + ultimo_tiempo_abono
-                else:
-                    # Va a cola de cooperadora
-                    cola_cooperadora.append(paciente_en_mesa)
-                
-                paciente_en_mesa = None
-            
-            fin_informe_obra_social = float('inf')
-            atender_siguiente_en_mesa()
-            registrar_estado("fin_informe_obra_social")
-            
-        elif proximo_evento == 'fin_abono_consulta':
-            # PACIENTE VUELVE A COLA DE MESA DE TURNOS (MANTIENE EL MISMO OBJETO)
-            if paciente_en_cooperadora:
-                # El paciente CONTINÚA existiendo pero vuelve a mesa
-                paciente_en_cooperadora.marcar_retorno_cooperadora()
-                paciente_en_cooperadora.estado_actual = 'EAMT'
-                # NO SE ASIGNA tiempo_inicio_espera porque los de retorno NO ESPERAN
-                cola_pacientes_mesa_retorno.append(paciente_en_cooperadora)
-                paciente_en_cooperadora = None
-            
-            fin_abono_consulta = float('inf')
-            atender_siguiente_paciente_cooperadora()
-            registrar_estado("fin_abono_consulta")
-    
-    # PROCESAMIENTO DE RESULTADOS
-    df_vector = pd.DataFrame(vector_estado)
-    tiempo_promedio_espera = tiempo_espera_acumulado / cantidad_personas_esperaron if cantidad_personas_esperaron > 0 else 0.0
-    
-    return df_vector, tiempo_promedio_espera, llamadas_perdidas, len(ids_conocidos)
+    corrida = st.session_state.get('barrido')
+    if corrida is None:
+        return
+    st.markdown("## 🗺️ Resultados del Barrido")
+    st.altair_chart(grafico_barrido(corrida['resultado'], list(corrida['grilla']), metrica), use_container_width=True)
+    st.dataframe(corrida['resultado'], use_container_width=True)
 
-# -----------------------------------------------------------
-# Interfaz Streamlit MANTENIDA INTACTA
-# -----------------------------------------------------------
+def mostrar_estado_estacionario(parametros: dict, semilla: Optional[int] = None):
+    """Modo Estado estacionario: una corrida larga, descarte del calentamiento y medias por lotes"""
+    st.sidebar.markdown("### 📏 Estado estacionario")
+    horizonte = st.sidebar.number_input("Horizonte (min)", 1_000, 10_000_000, 1_000_000, 100_000)
+    lotes = st.sidebar.number_input("Cantidad de lotes", 5, 100, 20)
+    nivel_confianza = st.sidebar.slider("Nivel de confianza", 0.80, 0.99, 0.95, 0.01)
+    
+    if st.sidebar.button("Ejecutar Corrida Larga", type="primary"):
+        semilla_corrida = semilla if semilla is not None else generar_semillas(1)[0]
+        clave = repr(('estacionario', sorted(parametros.items()), horizonte, lotes, nivel_confianza, semilla_corrida))
+        resultado = cache_corridas().obtener(clave)
+        if resultado is None:
+            progreso = st.progress(0.0, text="Corrida larga en curso ...")
+            resultado = correr_estado_estacionario(
+                parametros, tiempo_simulacion=horizonte, lotes=lotes, nivel_confianza=nivel_confianza, semilla=semilla_corrida,
+                al_avanzar=lambda reloj: progreso.progress(min(reloj / horizonte, 1.0), text=f"Reloj: {reloj:,.0f} / {horizonte:,} min")
+            )
+            progreso.empty()
+            cache_corridas().guardar(clave, resultado)
+        st.session_state['estacionario'] = {'semilla': semilla_corrida, 'nivel_confianza': nivel_confianza, 'resultado': resultado}
+    
+    corrida = st.session_state.get('estacionario')
+    if corrida is None:
+        return
+    df_serie, df_lotes, df_resumen, informe = corrida['resultado']
+    nivel_confianza = corrida['nivel_confianza']
+    
+    st.markdown("## 📏 Estado Estacionario (medias por lotes)")
+    st.caption(
+        f"Semilla: {corrida['semilla']} - {informe['Eventos']:,} eventos en {informe['Segundos']:.1f} s - "
+        f"calentamiento descartado: {informe['Calentamiento_min']:,.0f} min - "
+        f"{informe['Lotes']} lotes de {informe['Duracion_lote_min']:,.0f} min"
+    )
+    if informe['Calentamiento_truncado']:
+        st.warning("El largo de las colas no se estabiliza en la primera mitad de la corrida: "
+                   "el sistema puede estar saturado y los intervalos no son confiables.")
+    
+    etiquetas = {
+        'Llamadas_perdidas_por_hora': "🔴 A) Llamadas Perdidas por hora",
+        'Tiempo_promedio_espera': "⏱️ B) Tiempo Promedio de Espera",
+        'Largo_promedio_colas': "👥 Largo promedio de las colas",
+    }
+    for columna, metrica in zip(st.columns(3), etiquetas):
+        resumen = df_resumen.loc[metrica]
+        columna.metric(
+            etiquetas[metrica], value=f"{resumen['Media']:.3f}",
+            help=f"Autocorrelación entre lotes: {resumen['Autocorrelacion_lotes']:.2f}"
+        )
+        columna.caption(f"IC {nivel_confianza:.0%}: [{resumen['IC_inferior']:.3f} ; {resumen['IC_superior']:.3f}]")
+    
+    serie = df_serie.reset_index()[['Desde', 'Largo_promedio_colas', 'Media_movil']]
+    curvas = alt.Chart(serie).transform_fold(['Largo_promedio_colas', 'Media_movil'], as_=['Serie', 'Valor']).mark_line().encode(
+        x=alt.X('Desde:Q', title='Minuto'), y=alt.Y('Valor:Q', title='Largo de las colas'), color='Serie:N'
+    )
+    corte = alt.Chart(pd.DataFrame({'Desde': [informe['Calentamiento_min']]})).mark_rule(color='red', strokeDash=[4, 4]).encode(x='Desde:Q')
+    st.altair_chart(curvas + corte, use_container_width=True)
+    
+    st.dataframe(df_resumen, use_container_width=True)
+    with st.expander("Medias por lote"):
+        st.dataframe(df_lotes, use_container_width=True)
+
+@st.cache_resource(max_entries=CACHE_MAX_ENTRADAS)
+def abrir_corrida_guardada(carpeta: str, modificado: float) -> CorridaGuardada:
+    """Un lector por carpeta (se reabre si cambian los metadatos), compartido entre reruns"""
+    return CorridaGuardada(carpeta)
+
+def mostrar_corrida_guardada(parametros: dict, captura: dict, semilla: Optional[int] = None):
+    """Modo Corrida guardada: exporta la corrida a disco por lotes y pagina una corrida guardada
+    leyendo solo los lotes de la página visible"""
+    st.sidebar.markdown("### 💾 Corrida en disco")
+    nombre_carpeta = st.sidebar.text_input(f"Carpeta (dentro de {os.path.basename(CARPETA_CORRIDAS)}/)", value="corrida")
+    formato = st.sidebar.selectbox("Formato", FORMATOS_EXPORTACION, index=1,
+                                   help="parquet requiere pyarrow y xlsx requiere openpyxl")
+    # En disco la memoria no depende del horizonte: se permite uno mucho mayor que el del vector en pantalla
+    tiempo_sim = st.sidebar.number_input("Horizonte a exportar (min)", 10, 10_000_000, int(parametros['tiempo_simulacion']))
+    col_exportar, col_abrir = st.sidebar.columns(2)
+    try:
+        carpeta = ruta_corrida(nombre_carpeta)
+    except ValueError as error:
+        st.sidebar.error(str(error))
+        carpeta = None
+    
+    if col_exportar.button("Exportar", type="primary", disabled=carpeta is None):
+        semilla_corrida = semilla if semilla is not None else generar_semillas(1)[0]
+        progreso = st.progress(0.0, text="Exportando ...")
+        ventana = {opcion: valor for opcion, valor in captura.items() if opcion != 'ultimas_filas'}
+        try:
+            exportar_centro_salud(
+                carpeta, formato, **{**parametros, 'tiempo_simulacion': tiempo_sim}, **ventana, semilla=semilla_corrida,
+                al_avanzar=lambda avance: progreso.progress(min(avance[0] / tiempo_sim, 1.0), text=f"Reloj: {avance[0]:.2f} / {tiempo_sim} min")
+            )
+        except ImportError as error:
+            st.error(str(error))
+        else:
+            st.session_state['carpeta_corrida'] = carpeta
+        progreso.empty()
+    if col_abrir.button("Abrir", disabled=carpeta is None):
+        st.session_state['carpeta_corrida'] = carpeta
+    
+    carpeta_abierta = st.session_state.get('carpeta_corrida')
+    if carpeta_abierta is None:
+        return
+    ruta_metadatos = os.path.join(carpeta_abierta, 'metadatos.json')
+    if not os.path.exists(ruta_metadatos):
+        st.warning(f"No hay una corrida guardada en {os.path.relpath(carpeta_abierta, os.path.dirname(CARPETA_CORRIDAS))}")
+        return
+    corrida = abrir_corrida_guardada(carpeta_abierta, os.path.getmtime(ruta_metadatos))
+    
+    st.markdown("## 💾 Corrida Guardada")
+    st.caption(f"{os.path.relpath(carpeta_abierta, os.path.dirname(CARPETA_CORRIDAS))} ({corrida.formato}) - semilla: {corrida.metadatos['parametros'].get('semilla')}")
+    
+    def leer_pagina(inicio: int, cantidad: int):
+        df_vector, df_pacientes = corrida.leer(inicio, cantidad)
+        return df_vector, df_pacientes, df_vector.index
+    
+    try:
+        paginar_vector(corrida.total, leer_pagina, corrida.posicion_evento, corrida.posicion_minuto)
+    except ImportError as error:
+        st.error(str(error))
+        return
+    
+    col1, col2 = st.columns(2)
+    col1.metric("🔴 A) Llamadas Perdidas", value=corrida.metadatos['llamadas_perdidas'])
+    col2.metric("⏱️ B) Tiempo Promedio de Espera", value=f"{corrida.metadatos['tiempo_promedio_espera']:.3f} min")
 
 def main():
     st.set_page_config(page_title="Centro de Salud - Simulación ", layout="wide")
@@ -609,152 +713,131 @@ def main():
     ini_coop = st.sidebar.number_input("Pacientes esperando pago", 0, 20, 2)
     min_llamada = st.sidebar.number_input("Minutos para próxima llamada", 0.0, 10.0, 2.0, 0.1)
     
+    # Capacidad
+    st.sidebar.markdown("### 👥 Capacidad")
+    empleados_mesa = st.sidebar.number_input("Empleados en mesa de turnos", 1, 100, 1)
+    cajeros_coop = st.sidebar.number_input("Cajeros en cooperadora", 1, 100, 1)
+    lineas = st.sidebar.number_input("Líneas telefónicas", 1, 100, 1)
+    
     tiempo_sim = st.sidebar.number_input("Tiempo de simulación (min)", 10, 500, 60)
+    semilla = st.sidebar.number_input("Semilla", min_value=0, max_value=2**31 - 1, value=None, step=1, placeholder="Aleatoria")
+    
+    parametros = dict(
+        media_llegada=media_llegada,
+        a1=a1, b1=b1, a2=a2, b2=b2,
+        p_sin_obra=p_sin_obra,
+        intervalo_llamadas=intervalo_llamadas,
+        c1=c1, c2=c2,
+        tiempo_informe=tiempoInforme,
+        ini_pacientes_mesa=ini_mesa,
+        ini_pacientes_coop=ini_coop,
+        minutos_proxima_llamada=min_llamada,
+        empleados_mesa=empleados_mesa,
+        cajeros_cooperadora=cajeros_coop,
+        lineas_telefonicas=lineas,
+        tiempo_simulacion=tiempo_sim
+    )
+    
+    st.sidebar.divider()
+    modo = st.sidebar.radio("Modo", ["Vector de estado", "Replicaciones", "Barrido", "Estado estacionario", "Corrida guardada"], horizontal=True)
+    if modo == "Replicaciones":
+        mostrar_replicaciones(parametros, semilla)
+        return
+    if modo == "Barrido":
+        mostrar_barrido(parametros, semilla)
+        return
+    if modo == "Estado estacionario":
+        mostrar_estado_estacionario(parametros, semilla)
+        return
+    
+    # Ventana de captura del vector de estado (la última fila se muestra siempre)
+    with st.sidebar.expander("🔍 Captura del vector de estado"):
+        desde_evento = st.number_input("Desde evento N°", min_value=0, value=0, step=1)
+        desde_tiempo = st.number_input("Desde minuto", min_value=0.0, value=0.0, step=1.0)
+        cantidad_filas = st.number_input("Cantidad de filas (0 = todas)", min_value=0, value=0, step=10)
+        conservar_ultimas = st.checkbox("Conservar las últimas filas en lugar de las primeras", value=False)
+        filtro_eventos = st.multiselect("Tipos de evento", EVENTOS, default=EVENTOS)
+    perfilar = st.sidebar.checkbox("⏱️ Medir tiempos de la corrida", value=False,
+                                   help="Cuenta eventos y mide el tiempo de cada tipo, del registro y del armado de tablas")
+    
+    captura = dict(
+        desde_evento=desde_evento,
+        desde_tiempo=desde_tiempo,
+        max_filas=cantidad_filas if cantidad_filas and not conservar_ultimas else None,
+        ultimas_filas=cantidad_filas if cantidad_filas and conservar_ultimas else None,
+        filtro_eventos=filtro_eventos if len(filtro_eventos) < len(EVENTOS) else None
+    )
+    if modo == "Corrida guardada":
+        mostrar_corrida_guardada(parametros, captura, semilla)
+        return
     
-    # Botón de simulación
+    # Botón de simulación: la corrida se envía a un hilo del servidor y la sesión guarda solo su id,
+    # así no bloquea la página, se puede cancelar y sobrevive a los reruns
     if st.sidebar.button("Ejecutar Simulación   ", type="primary"):
-        
-        # Ejecutar simulación
-        with st.spinner("Ejecutando simulación  ..."):
-            df_resultado, tiempo_promedio, llamadas_perdidas, max_pacientes = simular_centro_salud(
-                media_llegada=media_llegada,
-                a1=a1, b1=b1, a2=a2, b2=b2,
-                p_sin_obra=p_sin_obra,
-                intervalo_llamadas=intervalo_llamadas,
-                c1=c1, c2=c2,
-                tiempo_informe=tiempoInforme,
-                ini_pacientes_mesa=ini_mesa,
-                ini_pacientes_coop=ini_coop,
-                minutos_proxima_llamada=min_llamada,
-                tiempo_simulacion=tiempo_sim
-            )
-        
-        # Vector de estado (VISUAL MANTENIDO IGUAL)
-        st.markdown("## 📊 Simulacion Realizada")
+        # Sin semilla se sortea una, así la corrida se puede repetir (y cachear)
+        semilla_corrida = semilla if semilla is not None else generar_semillas(1)[0]
+        try:
+            trabajo = gestor_trabajos().enviar(id_sesion(), parametros, captura, semilla_corrida,
+                                               PerfilMotor() if perfilar else None)
+            st.session_state['trabajo'] = trabajo.id
+            wait([trabajo.futuro], timeout=ESPERA_INMEDIATA)
+        except LimiteTrabajos as error:
+            st.sidebar.warning(str(error))
+    
+    id_trabajo = recoger_trabajo()
+    if id_trabajo is not None:
+        mostrar_avance_trabajo(id_trabajo)
+    
+    corrida = st.session_state.get('simulacion')
+    if corrida is None:
+        return
+    df_resultado, tiempo_promedio, llamadas_perdidas, df_pacientes, indicadores = corrida['resultado']
+    
+    # Vector de estado (VISUAL MANTENIDO IGUAL)
+    st.markdown("## 📊 Simulacion Realizada")
+    st.caption(f"Semilla: {corrida['semilla']}")
+    if (corrida['parametros'] != parametros or corrida['captura'] != captura
+            or (semilla is not None and semilla != corrida['semilla'])):
+        st.info("Los parámetros cambiaron desde la última ejecución: se muestran los resultados anteriores.")
+    
+    mostrar_vector_paginado(df_resultado, df_pacientes, corrida['perfil'])
 
-        # Crear DataFrame con multi-índice completo
-        df_multi = df_resultado.copy()
-        
-        # Crear las columnas con multi-índice
-        nuevas_columnas = []
-        
-        # Columnas básicas (nivel 1 solo)
-        nuevas_columnas.extend([
-            ('','', 'Evento'),
-            ('','', 'Reloj')
-        ])
-        
-        # Llegada paciente
-        nuevas_columnas.extend([
-            ('', 'llegada_paciente', 'RND llegada paciente'),
-            ('', 'llegada_paciente', 'Tiempo entre llegadas'),
-            ('', 'llegada_paciente', 'Proxima llegada')
-        ])
-        
-        # Obra social
-        nuevas_columnas.extend([
-            ('Obra Social','', 'RND obra social'),
-            ('Obra Social','', 'Obra Social'),
-            ('','', 'fin_informe_obra_social')
-        ])
-        
-        # Atención
-        nuevas_columnas.extend([
-            ('', 'fin_atencion', 'RND tiempo atencion'),
-            ('','fin_atencion', 'Tiempo de atencion'),
-            ('','fin_atencion', 'fin de atencion')
-        ])
-        
-        # Cooperadora
-        nuevas_columnas.extend([
-            ('','fin_abono_consulta', 'RND abono consulta'),
-            ('','fin_abono_consulta', 'Tiempo de abono de consulta'),
-            ('','fin_abono_consulta', 'fin abono consulta')
-        ])
-        
-        # Llamadas
-        nuevas_columnas.extend([
-            ('','', 'Proxima llegada llamada'),
-            ('','fin_llamada', 'RND llamada'),
-            ('','fin_llamada', 'Tiempo de llamada'),
-            ('','fin_llamada', 'fin llamada')
-        ])
-        
-        # Objetos permanentes
-        nuevas_columnas.extend([
-            ('', 'Empleado mesa de turno', 'Estado'),
-            ('', 'Empleado mesa de turno', 'Cola Pacientes'),
-            ('', 'Empleado mesa de turno', 'Cola Llamadas'),
-            ('', 'Empleado cooperadora', 'Estado'),
-            ('', 'Empleado cooperadora', 'Cola')
-        ])
-        
-        # Estadísticas
-        nuevas_columnas.extend([
-            ('', 'Estadística A)', 'Cantidad de llamadas perdidas por tener la línea ocupada'),
-            ('', 'Estadística B)', 'Acum tiempo de espera'),
-            ('', 'Estadística B)', 'Cantidad de personas que esperan')
-        ])
-        
-        # Objetos temporales DINÁMICOS - Usar el valor retornado por la simulación
-        # Crear columnas para todos los pacientes necesarios
-        for i in range(1, max_pacientes + 1):
-            etiqueta = f"Paciente {i}"
-            nuevas_columnas.extend([
-                ('', etiqueta, 'Estado'),
-                ('', etiqueta, 'Hora inicio espera')
-            ])
-
-        # Crear mapeo de columnas originales a nuevas
-        columnas_originales = [
-            'Evento', 'Reloj',
-            'RND_llegada_paciente', 'Tiempo_entre_llegadas', 'Proxima_llegada',
-            'RND_obra_social', 'Obra_Social', 'fin_informe_obra_social',
-            'RND_tiempo_atencion', 'Tiempo_de_atencion', 'fin_atencion',
-            'RND_abono_consulta', 'Tiempo_de_abono_de_consulta', 'fin_abono_consulta',
-            'Proxima_llegada_llamada', 'RND_llamada', 'Tiempo_de_llamada', 'fin_llamada',
-            'Empleado_mesa_estado', 'Empleado_mesa_cola_pacientes', 'Empleado_mesa_cola_llamadas',
-            'Empleado_cooperadora_estado', 'Empleado_cooperadora_cola',
-            'Cantidad_de_llamadas_perdidas_por_tener_la_linea_ocupada',
-            'Acum_tiempo_de_espera', 'Cantidad_de_personas_que_esperan'
-        ]
-        
-        # Agregar columnas de pacientes temporales dinámicamente
-        for i in range(1, max_pacientes + 1):
-            columnas_originales.extend([
-                f'Paciente_{i}_Estado',
-                f'Paciente_{i}_Hora_inicio_espera'
-            ])
-        
-        # Filtrar solo las columnas que existen
-        columnas_existentes = [col for col in columnas_originales if col in df_multi.columns]
-        nuevas_columnas_filtradas = nuevas_columnas[:len(columnas_existentes)]
-        
-        # Crear DataFrame con multi-índice
-        df_reordenado = df_multi[columnas_existentes].copy()
-        
-        # Crear el multi-índice
-        multi_index = pd.MultiIndex.from_tuples(nuevas_columnas_filtradas)
-        df_reordenado.columns = multi_index
-        
-        st.dataframe(df_reordenado, use_container_width=True, height=500)
-
-        # Mostrar estadísticas principales
-        st.markdown("## 📈 Estadísticas Calculadas")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric(
-                "🔴 A) Llamadas Perdidas", 
-                value=llamadas_perdidas,
-                help="Llamadas perdidas SOLO cuando la línea ya está ocupada por otra llamada"
-            )
-        with col2:
-            st.metric(
-                "⏱️ B) Tiempo Promedio de Espera", 
-                value=f"{tiempo_promedio:.3f} min",
-                help="Tiempo promedio de espera de pacientes en colas (excluyendo los 4 iniciales)"
-            )
+    # Mostrar estadísticas principales
+    st.markdown("## 📈 Estadísticas Calculadas")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric(
+            "🔴 A) Llamadas Perdidas", 
+            value=llamadas_perdidas,
+            help="Llamadas perdidas SOLO cuando la línea ya está ocupada por otra llamada"
+        )
+    with col2:
+        st.metric(
+            "⏱️ B) Tiempo Promedio de Espera", 
+            value=f"{tiempo_promedio:.3f} min",
+            help="Tiempo promedio de espera de pacientes en colas (excluyendo los 4 iniciales)"
+        )
+    
+    # Indicadores ponderados en el tiempo (acumulados por el motor, sin reconstruirlos del vector)
+    col_cola_mesa, col_cola_coop, col_mesa, col_coop, col_linea = st.columns(5)
+    col_cola_mesa.metric("Cola mesa (promedio)", f"{indicadores['Largo_promedio_cola_mesa']:.3f}")
+    col_cola_coop.metric("Cola cooperadora (promedio)", f"{indicadores['Largo_promedio_cola_cooperadora']:.3f}")
+    col_mesa.metric("Utilización mesa", f"{indicadores['Utilizacion_mesa']:.1%}",
+                    help=f"Atendiendo llamadas: {indicadores['Utilizacion_mesa_llamadas']:.1%}")
+    col_coop.metric("Utilización cooperadora", f"{indicadores['Utilizacion_cooperadora']:.1%}")
+    col_linea.metric("Línea telefónica ocupada", f"{indicadores['Fraccion_linea_ocupada']:.1%}")
+    
+    if corrida['perfil'] is not None:
+        with st.expander("⏱️ Perfil de la corrida"):
+            resumen = corrida['perfil'].a_dict()
+            st.dataframe(corrida['perfil'].a_dataframe(), use_container_width=True)
+            col_registro, col_tablas, col_multi = st.columns(3)
+            col_registro.metric("registrar_estado", f"{resumen['registrar_estado']['segundos'] * 1e3:.1f} ms",
+                                help=f"{resumen['registrar_estado']['llamadas']} llamadas")
+            col_tablas.metric("Armado de DataFrames", f"{resumen['secciones'].get('armado_dataframes', 0.0) * 1e3:.1f} ms")
+            col_multi.metric("Multi-índice", f"{resumen['secciones'].get('multiindice', 0.0) * 1e3:.1f} ms",
+                             help="Acumulado en las páginas mostradas desde la corrida")
         
         
 
@@ -0,0 +1,476 @@
+# -*- coding: utf-8 -*-
+"""
+Servicio de simulación – Ejercicio 72
+------------------------------------------------------------------
+Servicio HTTP/JSON local (solo biblioteca estándar + simulador.py) que encola corridas en un pool de procesos
+acotado. Cada replicación es una tarea del pool: las tareas idénticas en curso se comparten y las terminadas
+se recuerdan, así muchos clientes pidiendo el mismo barrido cuestan una sola vez.
+
+    python servicio.py --puerto 8765 --procesos 4 --almacen resultados.sqlite
+
+    POST /trabajos                      un escenario (objeto) o {"escenarios": [...]}; ?esperar=segundos (hasta 60)
+    GET  /trabajos/<id>                 estado y métricas
+    GET  /trabajos/<id>/vector          vector de estado paginado (?inicio=0&cantidad=100), si se pidió "vector": true
+    GET  /estado                        ocupación del servicio
+
+Un escenario lleva los parámetros de simular_centro_salud (modelo, tiempo_simulacion y ventana de captura),
+"semilla", "replicaciones", "nivel_confianza" y "vector". Sin semilla se sortea una (y no se deduplica).
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import math
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from simulador import (
+    EVENTOS, OPCIONES_CAPTURA, PARAMETROS_MODELO, AlmacenResultados, generar_semillas, intervalo_confianza, motor_centro_salud,
+    simular_centro_salud, simular_indicadores, vector_estado_ancho,
+)
+
+OPCIONES_TRABAJO = ['semilla', 'replicaciones', 'nivel_confianza', 'vector']
+OPCIONES_ENTERAS = ['semilla', 'replicaciones', 'desde_evento', 'max_filas', 'ultimas_filas']
+MAX_REPLICACIONES = 10_000
+MAX_FILAS_PAGINA = 1_000
+MAX_ESPERA = 60.0  # Segundos que un pedido puede bloquear un hilo del servidor con ?esperar=
+# Una tarea lanzada no se puede cancelar: se acota el horizonte de cada corrida (minutos simulados)
+MAX_TIEMPO_SIMULACION = 100_000.0
+MAX_TIEMPO_VECTOR = 10_000.0  # Con vector de estado la memoria crece con el horizonte
+
+class ServicioOcupado(Exception):
+    """La cola de tareas del pool está llena"""
+
+# -----------------------------------------------------------
+# 1) Tareas del pool (se ejecutan en otro proceso)
+# -----------------------------------------------------------
+
+def _ejecutar_tarea(tipo: str, parametros: dict, semilla: int):
+    """'metricas': dict con las métricas e indicadores. 'vector': además el vector de estado y el registro de pacientes"""
+    if tipo == 'metricas':
+        return simular_indicadores(semilla=semilla, **parametros)
+    df_vector, tiempo_promedio_espera, llamadas_perdidas, df_pacientes, indicadores = simular_centro_salud(semilla=semilla, **parametros)
+    metricas = {'Tiempo_promedio_espera': tiempo_promedio_espera, 'Llamadas_perdidas': llamadas_perdidas, **indicadores}
+    return metricas, df_vector, df_pacientes
+
+def _clave(*partes) -> str:
+    return json.dumps(partes, sort_keys=True, separators=(',', ':'))
+
+def _sin_nan(valor):
+    """JSON estricto: NaN e infinito pasan a null"""
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    if isinstance(valor, dict):
+        return {clave: _sin_nan(v) for clave, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_sin_nan(v) for v in valor]
+    return valor
+
+# -----------------------------------------------------------
+# 2) Trabajos: un escenario, con una o varias tareas
+# -----------------------------------------------------------
+
+class Trabajo:
+    """Un escenario pedido. Su id es el hash del escenario normalizado: pedidos idénticos son el mismo trabajo"""
+
+    def __init__(self, id: str, escenario: dict, semillas: list, futuros: list):
+        self.id = id
+        self.escenario = escenario
+        self.semillas = semillas
+        self.futuros = futuros
+        self.creado = time.time()
+
+    @property
+    def terminado(self) -> bool:
+        return all(futuro.done() for futuro in self.futuros)
+
+    def errores(self) -> list:
+        """Excepciones de las tareas terminadas con error (una tarea cancelada cuenta como error)"""
+        return [futuro.exception() if not futuro.cancelled() else RuntimeError("Tarea cancelada")
+                for futuro in self.futuros if futuro.done() and (futuro.cancelled() or futuro.exception() is not None)]
+
+    def esperar(self, segundos: float):
+        limite = time.monotonic() + segundos
+        for futuro in self.futuros:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return
+            try:
+                futuro.result(timeout=restante)
+            except Exception:
+                pass  # El error se informa en a_dict
+
+    def a_dict(self) -> dict:
+        completadas = sum(futuro.done() for futuro in self.futuros)
+        respuesta = {'id': self.id, 'escenario': self.escenario, 'completadas': completadas, 'total': len(self.futuros)}
+        errores = self.errores()
+        if errores:
+            return {**respuesta, 'estado': 'error', 'error': repr(errores[0])}
+        if completadas < len(self.futuros):
+            return {**respuesta, 'estado': 'en_curso'}
+
+        respuesta['estado'] = 'terminado'
+        if self.escenario.get('vector'):
+            metricas, df_vector, _ = self.futuros[0].result()
+            return {**respuesta, 'metricas': metricas, 'filas': len(df_vector)}
+        if not self.escenario.get('replicaciones'):
+            return {**respuesta, 'metricas': self.futuros[0].result()}
+
+        replicaciones = [{'Semilla': semilla, **futuro.result()} for semilla, futuro in zip(self.semillas, self.futuros)]
+        nivel_confianza = self.escenario.get('nivel_confianza', 0.95)
+        metricas = [nombre for nombre in replicaciones[0] if nombre != 'Semilla']
+        respuesta['resumen'] = {
+            metrica: intervalo_confianza([r[metrica] for r in replicaciones], nivel_confianza) for metrica in metricas
+        }
+        respuesta['replicaciones'] = replicaciones
+        return respuesta
+
+    def pagina_vector(self, inicio: int, cantidad: int) -> dict:
+        """Filas [inicio, inicio + cantidad) del vector de estado, con las columnas de los pacientes activos en ellas"""
+        _, df_vector, df_pacientes = self.futuros[0].result()
+        filas = df_vector.index[inicio:inicio + cantidad]
+        df = vector_estado_ancho(df_vector, df_pacientes, filas)
+        pagina = json.loads(df.to_json(orient='split'))
+        return {'id': self.id, 'total': len(df_vector), 'inicio': inicio, 'columnas': ['Fila'] + pagina['columns'],
+                'filas': [[fila] + valores for fila, valores in zip(pagina['index'], pagina['data'])]}
+
+# -----------------------------------------------------------
+# 3) Servicio: pool acotado, deduplicación y resultados recientes
+# -----------------------------------------------------------
+
+class ServicioSimulacion:
+    """Reparte tareas en un pool de procesos. Una tarea idéntica a otra en curso comparte su Future, y las
+    terminadas se recuerdan (LRU) para los pedidos que lleguen después. Con almacén, además se buscan y se
+    guardan en disco, así sobreviven a un reinicio. max_pendientes acota las tareas encoladas o en ejecución:
+    más allá se rechaza con ServicioOcupado"""
+
+    def __init__(self, procesos: Optional[int] = None, max_pendientes: int = 10_000,
+                 max_resultados: int = 20_000, max_trabajos: int = 2_000, almacen: Optional[AlmacenResultados] = None):
+        self.procesos = procesos or os.cpu_count() or 1
+        self._pool = self._crear_pool()
+        self.max_pendientes = max_pendientes
+        self.max_resultados = max_resultados
+        self.max_trabajos = max_trabajos
+        self.almacen = almacen
+        self._en_curso = {}                # clave -> Future
+        self._resultados = OrderedDict()   # clave -> resultado (LRU)
+        self._trabajos = OrderedDict()     # id -> Trabajo (LRU)
+        # Reentrante: si la tarea ya terminó, add_done_callback llama a _guardar_resultado con el lock tomado
+        self._lock = threading.RLock()
+        self.tareas_ejecutadas = 0
+        self.tareas_compartidas = 0
+        self.trabajos_compartidos = 0
+        self.tareas_almacen = 0
+        self.pools_recreados = 0
+        self.errores_almacen = 0
+        self._firma = inspect.signature(motor_centro_salud).parameters
+        # Las escrituras en el almacén van a un hilo propio: el callback de las tareas no espera a SQLite
+        self._escrituras = queue.Queue()
+        self._escritor = None
+        if almacen is not None:
+            self._escritor = threading.Thread(target=self._escribir_en_almacen, name='escritor-almacen', daemon=True)
+            self._escritor.start()
+
+    def _crear_pool(self) -> ProcessPoolExecutor:
+        # spawn: los procesos no heredan los hilos del servidor HTTP (y simulador.py se importa rápido)
+        return ProcessPoolExecutor(max_workers=self.procesos, mp_context=multiprocessing.get_context('spawn'))
+
+    def normalizar(self, escenario: dict) -> dict:
+        """Valida las claves y lleva cada parámetro del modelo al tipo del motor (3 y 3.0 son el mismo escenario)"""
+        if not isinstance(escenario, dict):
+            raise ValueError("Cada escenario debe ser un objeto JSON")
+        validas = PARAMETROS_MODELO + ['tiempo_simulacion'] + OPCIONES_CAPTURA + OPCIONES_TRABAJO
+        desconocidas = sorted(set(escenario) - set(validas))
+        if desconocidas:
+            raise ValueError(f"Parámetros desconocidos: {', '.join(desconocidas)}")
+
+        normalizado = {}
+        for nombre, valor in escenario.items():
+            if valor is None:
+                continue
+            if nombre == 'vector':
+                valor = bool(valor)
+            elif nombre == 'filtro_eventos':
+                if not isinstance(valor, list) or not all(isinstance(evento, str) and evento in EVENTOS for evento in valor):
+                    raise ValueError(f"filtro_eventos debe ser una lista de eventos: {', '.join(EVENTOS)}")
+                valor = sorted(set(valor))
+            elif nombre in OPCIONES_ENTERAS or type(self._firma[nombre].default if nombre in self._firma else None) is int:
+                valor = int(valor)
+            else:
+                valor = float(valor)
+            normalizado[nombre] = valor
+
+        if normalizado.get('semilla') is None:
+            normalizado['semilla'] = generar_semillas(1)[0]
+        maximo = MAX_TIEMPO_VECTOR if normalizado.get('vector') else MAX_TIEMPO_SIMULACION
+        if not 0 < normalizado.get('tiempo_simulacion', self._firma['tiempo_simulacion'].default) <= maximo:
+            raise ValueError(f"tiempo_simulacion debe estar entre 0 y {maximo:g} minutos")
+        if not 0 <= normalizado.get('replicaciones', 0) <= MAX_REPLICACIONES:
+            raise ValueError(f"replicaciones debe estar entre 0 y {MAX_REPLICACIONES}")
+        if normalizado.get('vector') and normalizado.get('replicaciones'):
+            raise ValueError("El vector de estado se pide para una sola corrida, sin replicaciones")
+        if not normalizado.get('vector') and any(opcion in normalizado for opcion in OPCIONES_CAPTURA):
+            raise ValueError("La ventana de captura solo aplica con \"vector\": true")
+        return normalizado
+
+    def _tarea(self, tipo: str, parametros: dict, semilla: int, guardado=None) -> Future:
+        """Con self._lock tomado. guardado: el resultado encontrado en el almacén, si estaba"""
+        clave = _clave(tipo, parametros, semilla)
+        if clave in self._resultados:
+            self._resultados.move_to_end(clave)
+            self.tareas_compartidas += 1
+            guardado = self._resultados[clave]
+        elif clave in self._en_curso:
+            self.tareas_compartidas += 1
+            return self._en_curso[clave]
+        elif guardado is not None:
+            self.tareas_almacen += 1
+        if guardado is not None:
+            futuro = Future()
+            futuro.set_result(guardado)
+            return futuro
+
+        try:
+            futuro = self._pool.submit(_ejecutar_tarea, tipo, parametros, semilla)
+        except BrokenProcessPool:
+            # Un proceso murió (p. ej. sin memoria) y el pool quedó inservible: se reemplaza por uno nuevo
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._crear_pool()
+            self.pools_recreados += 1
+            futuro = self._pool.submit(_ejecutar_tarea, tipo, parametros, semilla)
+        self._en_curso[clave] = futuro
+        self.tareas_ejecutadas += 1
+        futuro.add_done_callback(lambda terminado: self._guardar_resultado(clave, tipo, parametros, semilla, terminado))
+        return futuro
+
+    def _guardar_resultado(self, clave: str, tipo: str, parametros: dict, semilla: int, futuro: Future):
+        exito = not futuro.cancelled() and futuro.exception() is None
+        with self._lock:
+            self._en_curso.pop(clave, None)
+            # Los vectores de estado son pesados: quedan solo en su trabajo, no en los resultados compartidos
+            if tipo == 'metricas' and exito:
+                self._resultados[clave] = futuro.result()
+                while len(self._resultados) > self.max_resultados:
+                    self._resultados.popitem(last=False)
+        if self.almacen is not None and exito:
+            self._escrituras.put((tipo, parametros, semilla, futuro.result()))
+
+    def _escribir_en_almacen(self):
+        """Hilo escritor: guarda los resultados en el almacén en orden de llegada, hasta recibir None"""
+        while (escritura := self._escrituras.get()) is not None:
+            tipo, parametros, semilla, resultado = escritura
+            try:
+                if tipo == 'metricas':
+                    self.almacen.guardar_metricas([(parametros, semilla)], [resultado])
+                else:
+                    self.almacen.guardar_vector(parametros, semilla, *resultado)
+            except Exception as error:
+                # Sin almacén el servicio sigue respondiendo: solo se pierde esta escritura
+                self.errores_almacen += 1
+                print(f"No se pudo guardar un resultado en el almacén: {error!r}", file=sys.stderr, flush=True)
+
+    def _planificar(self, escenario: dict) -> tuple:
+        """(tipo, parámetros del motor, semillas) de las tareas de un escenario normalizado"""
+        parametros = {nombre: valor for nombre, valor in escenario.items() if nombre not in OPCIONES_TRABAJO}
+        if escenario.get('vector'):
+            return 'vector', parametros, [escenario['semilla']]
+        if escenario.get('replicaciones'):
+            return 'metricas', parametros, generar_semillas(escenario['replicaciones'], escenario['semilla'])
+        return 'metricas', parametros, [escenario['semilla']]
+
+    def _buscar_guardados(self, planes: list) -> list:
+        """Por cada plan, los resultados del almacén de sus tareas (None las que no están). Una sola consulta
+        para todas las métricas del lote, fuera del lock"""
+        if self.almacen is None:
+            return [[None] * len(semillas) for _, _, semillas in planes]
+        tareas = [(parametros, semilla) for tipo, parametros, semillas in planes if tipo == 'metricas' for semilla in semillas]
+        metricas = iter(self.almacen.buscar_metricas(tareas))
+        return [
+            [self.almacen.buscar_vector(parametros, semilla) if tipo == 'vector' else next(metricas) for semilla in semillas]
+            for tipo, parametros, semillas in planes
+        ]
+
+    def enviar(self, escenarios: list) -> list:
+        """Normaliza y encola un lote de escenarios (todo o nada). Devuelve los trabajos en el mismo orden"""
+        normalizados = [self.normalizar(escenario) for escenario in escenarios]
+        planes = [self._planificar(escenario) for escenario in normalizados]
+        guardados = self._buscar_guardados(planes)
+        with self._lock:
+            nuevas = sum(guardado is None for guardados_escenario in guardados for guardado in guardados_escenario)
+            if len(self._en_curso) + nuevas > self.max_pendientes:
+                raise ServicioOcupado(f"Hay {len(self._en_curso)} tareas pendientes (máximo {self.max_pendientes})")
+
+            trabajos = []
+            for escenario, (tipo, parametros, semillas), guardados_escenario in zip(normalizados, planes, guardados):
+                id = hashlib.sha256(_clave(escenario).encode()).hexdigest()[:16]
+                trabajo = self._trabajos.get(id)
+                if trabajo is not None and trabajo.errores():
+                    trabajo = None  # Un trabajo fallido no se comparte: el pedido repetido lo reintenta
+                if trabajo is not None:
+                    self.trabajos_compartidos += 1
+                else:
+                    futuros = [self._tarea(tipo, parametros, semilla, guardado)
+                               for semilla, guardado in zip(semillas, guardados_escenario)]
+                    trabajo = Trabajo(id, escenario, semillas, futuros)
+                self._trabajos[id] = trabajo
+                self._trabajos.move_to_end(id)
+                trabajos.append(trabajo)
+
+            # Se descartan los trabajos terminados más viejos (los en curso se conservan)
+            for id in list(self._trabajos):
+                if len(self._trabajos) <= self.max_trabajos:
+                    break
+                if self._trabajos[id].terminado:
+                    del self._trabajos[id]
+        return trabajos
+
+    def trabajo(self, id: str) -> Optional[Trabajo]:
+        with self._lock:
+            return self._trabajos.get(id)
+
+    def estado(self) -> dict:
+        with self._lock:
+            return {
+                'procesos': self.procesos,
+                'tareas_pendientes': len(self._en_curso),
+                'max_pendientes': self.max_pendientes,
+                'resultados_guardados': len(self._resultados),
+                'trabajos': len(self._trabajos),
+                'tareas_ejecutadas': self.tareas_ejecutadas,
+                'tareas_compartidas': self.tareas_compartidas,
+                'trabajos_compartidos': self.trabajos_compartidos,
+                'tareas_almacen': self.tareas_almacen,
+                'pools_recreados': self.pools_recreados,
+                'errores_almacen': self.errores_almacen,
+            }
+
+    def cerrar(self):
+        """Cancela las tareas encoladas y espera las que están corriendo y sus escrituras en el almacén"""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        if self._escritor is not None:
+            self._escrituras.put(None)
+            self._escritor.join()
+
+# -----------------------------------------------------------
+# 4) HTTP
+# -----------------------------------------------------------
+
+def _espera(consulta: dict) -> float:
+    """Segundos de ?esperar=, acotados a MAX_ESPERA"""
+    esperar = float(consulta.get('esperar', 0))
+    if not math.isfinite(esperar) or esperar < 0:
+        raise ValueError("esperar debe ser un número de segundos no negativo")
+    return min(esperar, MAX_ESPERA)
+
+class ManejadorSimulacion(BaseHTTPRequestHandler):
+    servicio: ServicioSimulacion = None  # Lo asigna crear_servidor
+
+    def _responder(self, codigo: int, cuerpo):
+        datos = json.dumps(_sin_nan(cuerpo), ensure_ascii=False).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def _ruta(self) -> tuple[list, dict]:
+        url = urlparse(self.path)
+        consulta = {nombre: valores[-1] for nombre, valores in parse_qs(url.query).items()}
+        return [parte for parte in url.path.split('/') if parte], consulta
+
+    def do_GET(self):
+        partes, consulta = self._ruta()
+        try:
+            if partes == ['estado']:
+                return self._responder(200, self.servicio.estado())
+            if len(partes) in (2, 3) and partes[0] == 'trabajos':
+                trabajo = self.servicio.trabajo(partes[1])
+                if trabajo is None:
+                    return self._responder(404, {'error': f"No existe el trabajo {partes[1]}"})
+                if len(partes) == 2:
+                    trabajo.esperar(_espera(consulta))
+                    return self._responder(200, trabajo.a_dict())
+                if partes[2] == 'vector':
+                    if not trabajo.escenario.get('vector'):
+                        return self._responder(400, {'error': "El trabajo no pidió el vector de estado (\"vector\": true)"})
+                    if not trabajo.terminado:
+                        return self._responder(409, trabajo.a_dict())
+                    inicio = max(int(consulta.get('inicio', 0)), 0)
+                    cantidad = min(max(int(consulta.get('cantidad', 100)), 1), MAX_FILAS_PAGINA)
+                    return self._responder(200, trabajo.pagina_vector(inicio, cantidad))
+            self._responder(404, {'error': f"Ruta desconocida: {self.path}"})
+        except ValueError as error:
+            self._responder(400, {'error': str(error)})
+        except Exception as error:
+            self._responder(500, {'error': repr(error)})
+
+    def do_POST(self):
+        partes, consulta = self._ruta()
+        if partes != ['trabajos']:
+            return self._responder(404, {'error': f"Ruta desconocida: {self.path}"})
+        try:
+            cuerpo = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            lote = isinstance(cuerpo, dict) and 'escenarios' in cuerpo
+            if lote and not isinstance(cuerpo['escenarios'], list):
+                raise ValueError("\"escenarios\" debe ser una lista de escenarios")
+            esperar = _espera(consulta)
+            trabajos = self.servicio.enviar(cuerpo['escenarios'] if lote else [cuerpo])
+            limite = time.monotonic() + esperar
+            for trabajo in trabajos:
+                trabajo.esperar(max(limite - time.monotonic(), 0))
+            respuestas = [trabajo.a_dict() for trabajo in trabajos]
+            codigo = 200 if all(r['estado'] != 'en_curso' for r in respuestas) else 202
+            self._responder(codigo, {'trabajos': respuestas} if lote else respuestas[0])
+        except ServicioOcupado as error:
+            self._responder(503, {'error': str(error)})
+        except (ValueError, TypeError, KeyError) as error:
+            self._responder(400, {'error': str(error)})
+        except Exception as error:
+            self._responder(500, {'error': repr(error)})
+
+    def log_message(self, formato, *argumentos):
+        pass  # Sin una línea por pedido en la consola
+
+def crear_servidor(puerto: int = 8765, host: str = '127.0.0.1', servicio: Optional[ServicioSimulacion] = None,
+                   **opciones) -> ThreadingHTTPServer:
+    """Servidor listo para serve_forever(). Con puerto 0 se elige uno libre (server_address lo informa)"""
+    manejador = type('Manejador', (ManejadorSimulacion,), {'servicio': servicio or ServicioSimulacion(**opciones)})
+    servidor = ThreadingHTTPServer((host, puerto), manejador)
+    servidor.daemon_threads = True
+    return servidor
+
+def main(argumentos: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON de simulación")
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--host', default='127.0.0.1', help="por defecto solo conexiones locales")
+    parser.add_argument('--procesos', type=int, help="procesos del pool (por defecto, todos los núcleos)")
+    parser.add_argument('--max_pendientes', type=int, default=10_000, help="tareas encoladas o en ejecución admitidas")
+    parser.add_argument('--almacen', help="archivo SQLite donde se guardan y se buscan los resultados")
+    argumentos = parser.parse_args(argumentos)
+
+    almacen = AlmacenResultados(argumentos.almacen) if argumentos.almacen else None
+    servidor = crear_servidor(argumentos.puerto, argumentos.host, procesos=argumentos.procesos,
+                              max_pendientes=argumentos.max_pendientes, almacen=almacen)
+    print(f"Servicio de simulación en http://{servidor.server_address[0]}:{servidor.server_address[1]}", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servidor.RequestHandlerClass.servicio.cerrar()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
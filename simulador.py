@@ -0,0 +1,2286 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de simulación – Ejercicio 72
+------------------------------------------------------------------
+Núcleo sin interfaz: motor de eventos, replicaciones, barridos, estado estacionario y exportación.
+No importa streamlit, y pandas se importa recién cuando se pide un DataFrame, así los procesos del pool
+y los trabajos por lotes arrancan rápido.
+
+    python simulador.py --tiempo_simulacion 480 --semilla 1
+    python simulador.py --replicaciones 30 --semilla 1 --media_llegada 2.5
+    python simulador.py --escenarios escenarios.json --salida resultados.csv
+    python simulador.py --replicaciones 30 --semilla 1 --almacen resultados.sqlite
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import heapq
+import importlib
+import inspect
+import io
+import json
+import math
+import multiprocessing
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from array import array
+from collections import OrderedDict, deque
+from functools import partial
+from itertools import count, product
+from statistics import NormalDist
+from typing import Optional
+import numpy as np
+
+class _ModuloPerezoso:
+    """Importa el módulo la primera vez que se usa uno de sus atributos y lo deja en su lugar como global"""
+
+    def __init__(self, modulo: str, nombre_global: str):
+        self._modulo = modulo
+        self._nombre_global = nombre_global
+    
+    def __getattr__(self, atributo):
+        modulo = importlib.import_module(self._modulo)
+        globals()[self._nombre_global] = modulo
+        return getattr(modulo, atributo)
+
+pd = _ModuloPerezoso('pandas', 'pd')
+
+# -----------------------------------------------------------
+# 1) Generadores de números aleatorios
+# -----------------------------------------------------------
+
+def gen_exponencial(media: float, u):
+    """Genera variable aleatoria exponencial negativa (u puede ser un RND o un arreglo de RNDs)"""
+    intervalo = -media * np.log(1 - u)
+    return u, intervalo
+
+def gen_uniforme(a: float, b: float, u):
+    """Genera variable aleatoria uniforme (u puede ser un RND o un arreglo de RNDs)"""
+    valor = a + (b - a) * u
+    return u, valor
+
+class FuenteVariable:
+    """Entrega (rnd, valor) de a uno. Los RNDs se piden en bloque a un numpy.random.Generator
+    y se transforman vectorizados con la función generadora; sin generadora el valor es el RND"""
+    __slots__ = ('_generador', '_generadora', '_parametros', '_tamano_bloque', '_rnds', '_valores', '_posicion')
+
+    def __init__(self, generador: np.random.Generator, generadora=None, *parametros, tamano_bloque: int = 1024):
+        self._generador = generador
+        self._generadora = generadora
+        self._parametros = parametros
+        self._tamano_bloque = tamano_bloque
+        self._rnds = []
+        self._valores = []
+        self._posicion = 0
+        
+    def _rellenar(self):
+        rnds = self._generador.random(self._tamano_bloque)
+        valores = self._generadora(*self._parametros, rnds)[1] if self._generadora is not None else rnds
+        self._rnds = rnds.tolist()
+        self._valores = valores.tolist()
+        self._posicion = 0
+    
+    def siguiente(self) -> tuple[float, float]:
+        if self._posicion == len(self._rnds):
+            self._rellenar()
+        i = self._posicion
+        self._posicion = i + 1
+        return self._rnds[i], self._valores[i]
+
+ENTRADAS_ALEATORIAS = ['llegadas', 'obra_social', 'atencion', 'abono', 'llamadas']
+
+def generadores_por_entrada(semilla: Optional[int] = None) -> dict:
+    """Un numpy.random.Generator independiente por entrada estocástica, derivados de una sola semilla"""
+    hijas = np.random.SeedSequence(semilla).spawn(len(ENTRADAS_ALEATORIAS))
+    return {entrada: np.random.default_rng(hija) for entrada, hija in zip(ENTRADAS_ALEATORIAS, hijas)}
+
+# -----------------------------------------------------------
+# 2) Clase Paciente
+# -----------------------------------------------------------
+
+class Paciente:
+    # Sin __dict__: con colas de miles de pacientes cada objeto ocupa lo mínimo
+    __slots__ = ('id', 'tiene_obra_social', 'tiempo_inicio_espera', 'primera_vez', 'vuelve_de_cooperadora',
+                 'estado_actual', 'es_inicial')
+
+    def __init__(self, id: int, reloj_llegada: float, es_inicial=False):
+        self.id = id  # Entero: positivo para P1, P2, ...; negativo para los iniciales de cooperadora CP1, CP2, ...
+        self.tiene_obra_social = None  
+        self.tiempo_inicio_espera = reloj_llegada if not es_inicial else None  # Para pacientes iniciales no sabemos cuándo empezaron
+        self.primera_vez = True
+        self.vuelve_de_cooperadora = False
+        self.estado_actual = None
+        self.es_inicial = es_inicial  # Marca si es uno de los 4 pacientes iniciales
+        
+    def set_obra_social(self, tiene_obra_social: bool):
+        self.tiene_obra_social = tiene_obra_social
+        
+    def marcar_retorno_cooperadora(self):
+        self.primera_vez = False
+        self.vuelve_de_cooperadora = True
+
+def nombre_paciente(id: int) -> str:
+    """Nombre para mostrar de un paciente a partir de su id entero"""
+    return f"P{id}" if id > 0 else f"CP{-id}"
+
+# -----------------------------------------------------------
+# 3) Clase Llamada
+# -----------------------------------------------------------
+
+class Llamada:
+    __slots__ = ('id', 'reloj_llegada', 'estado_actual')
+
+    def __init__(self, id: int, reloj_llegada: float):
+        self.id = id
+        self.reloj_llegada = reloj_llegada
+        self.estado_actual = 'ESPERANDO'  # ESPERANDO o SIENDO_ATENDIDA
+
+# -----------------------------------------------------------
+# 4) Calendario de eventos futuros
+# -----------------------------------------------------------
+
+# Orden de desempate cuando dos eventos ocurren en el mismo instante
+PRIORIDAD_EVENTOS = {
+    'llegada_paciente': 0,
+    'llegada_llamada': 1,
+    'fin_atencion': 2,
+    'fin_informe_obra_social': 3,
+    'fin_abono_consulta': 4,
+    'fin_llamada': 5,
+}
+
+class CalendarioEventos:
+    """Lista de eventos futuros ordenada por (tiempo, prioridad del evento, orden de programación)"""
+
+    def __init__(self):
+        self._heap = []
+        self._secuencia = count()
+        
+    def programar(self, tiempo: float, evento: str, datos=None):
+        """Agrega un evento en O(log n); datos viaja con el evento (p. ej. el servidor que lo atiende)"""
+        prioridad = PRIORIDAD_EVENTOS.get(evento, len(PRIORIDAD_EVENTOS))
+        heapq.heappush(self._heap, (tiempo, prioridad, next(self._secuencia), evento, datos))
+    
+    def proximo(self):
+        """Extrae el próximo evento como (tiempo, evento, datos), o None si no quedan"""
+        if not self._heap:
+            return None
+        tiempo, _, _, evento, datos = heapq.heappop(self._heap)
+        return tiempo, evento, datos
+    
+    def programados(self):
+        """Eventos pendientes como (tiempo, evento, datos), sin orden"""
+        return ((tiempo, evento, datos) for tiempo, _, _, evento, datos in self._heap)
+    
+    def __len__(self):
+        return len(self._heap)
+    
+    def __getstate__(self):
+        # itertools.count no se serializa en todas las versiones: se guarda el próximo número de secuencia
+        siguiente = next(self._secuencia)
+        self._secuencia = count(siguiente)
+        return self._heap, siguiente
+    
+    def __setstate__(self, estado):
+        self._heap, siguiente = estado
+        self._secuencia = count(siguiente)
+
+# -----------------------------------------------------------
+# 5) Registro columnar del vector de estado
+# -----------------------------------------------------------
+
+EVENTOS = [
+    'Inicializacion', 'llegada_paciente', 'llegada_llamada', 'fin_atencion',
+    'fin_informe_obra_social', 'fin_abono_consulta', 'fin_llamada'
+]
+OBRA_SOCIAL = ['Con obra social', 'Sin obra social']
+ESTADOS_MESA = ['Libre', 'Ocupado', 'AtendendoLlamada']
+ESTADOS_COOPERADORA = ['Libre', 'Ocupado']
+ESTADOS_PACIENTE = ['EAMT', 'SAMT', 'EAC', 'AC']
+
+# Tipo de cada columna: 'f' = float64, 'i' = int64, lista = categórica (se guarda el código, -1 = vacío)
+COLUMNAS_VECTOR = [
+    ('Evento', EVENTOS),
+    ('Reloj', 'f'),
+    ('RND_llegada_paciente', 'f'),
+    ('Tiempo_entre_llegadas', 'f'),
+    ('Proxima_llegada', 'f'),
+    ('RND_obra_social', 'f'),
+    ('Obra_Social', OBRA_SOCIAL),
+    ('fin_informe_obra_social', 'f'),
+    ('RND_tiempo_atencion', 'f'),
+    ('Tiempo_de_atencion', 'f'),
+    ('fin_atencion', 'f'),
+    ('RND_abono_consulta', 'f'),
+    ('Tiempo_de_abono_de_consulta', 'f'),
+    ('fin_abono_consulta', 'f'),
+    ('Proxima_llegada_llamada', 'f'),
+    ('RND_llamada', 'f'),
+    ('Tiempo_de_llamada', 'f'),
+    ('fin_llamada', 'f'),
+    ('Empleado_mesa_estado', ESTADOS_MESA),
+    ('Empleado_mesa_cola_pacientes', 'i'),
+    ('Empleado_mesa_cola_llamadas', 'i'),
+    ('Empleado_cooperadora_estado', ESTADOS_COOPERADORA),
+    ('Empleado_cooperadora_cola', 'i'),
+    ('Cantidad_de_llamadas_perdidas_por_tener_la_linea_ocupada', 'i'),
+    ('Acum_tiempo_de_espera', 'f'),
+    ('Cantidad_de_personas_que_esperan', 'i'),
+]
+
+class RegistroVectorEstado:
+    """Vector de estado guardado en arreglos tipados (uno por columna) que duplican su capacidad al llenarse.
+    Con ultimas_filas funciona como buffer circular: solo conserva las últimas N filas agregadas"""
+
+    def __init__(self, capacidad_inicial: int = 1024, ultimas_filas: Optional[int] = None):
+        self.filas = 0  # Filas agregadas en total (en modo circular o tras vaciar pueden ser más que las guardadas)
+        self._base = 0  # Valor de filas en el último vaciado
+        self.ultimas_filas = ultimas_filas
+        self._capacidad = ultimas_filas if ultimas_filas else capacidad_inicial
+        self._eventos = np.empty(self._capacidad, dtype=np.int64)  # N° de evento de cada fila (índice del DataFrame)
+        self._arreglos = []
+        self._codigos = []  # Por columna: dict categoría -> código, o None si es numérica
+        for _, tipo in COLUMNAS_VECTOR:
+            if isinstance(tipo, list):
+                self._arreglos.append(np.full(self._capacidad, -1, dtype=np.int8))
+                self._codigos.append({categoria: i for i, categoria in enumerate(tipo)})
+            else:
+                self._arreglos.append(np.empty(self._capacidad, dtype=np.float64 if tipo == 'f' else np.int64))
+                self._codigos.append(None)
+        
+        # Registro largo de pacientes activos: una entrada (evento, paciente, estado, hora) por paciente y fila
+        self._log_fila = array('q')
+        self._log_paciente = array('q')
+        self._log_estado = array('b')
+        self._log_hora = array('d')
+        self._limite_log = 4096  # En modo circular se compacta al superar este tamaño
+        self._posiciones_pacientes = {}  # id entero -> posición fija (orden de aparición)
+        self._siguiente_posicion = 0
+        self._codigos_estado_paciente = {estado: i for i, estado in enumerate(ESTADOS_PACIENTE)}
+        
+    @property
+    def cantidad_pacientes(self) -> int:
+        return self._siguiente_posicion
+    
+    @property
+    def filas_guardadas(self) -> int:
+        return min(self.filas - self._base, self._capacidad)
+    
+    def _crecer(self):
+        nueva_capacidad = self._capacidad * 2
+        for j, arreglo in enumerate(self._arreglos):
+            nuevo = np.full(nueva_capacidad, -1, dtype=arreglo.dtype) if self._codigos[j] is not None else np.empty(nueva_capacidad, dtype=arreglo.dtype)
+            nuevo[:self._capacidad] = arreglo
+            self._arreglos[j] = nuevo
+        eventos = np.empty(nueva_capacidad, dtype=np.int64)
+        eventos[:self._capacidad] = self._eventos
+        self._eventos = eventos
+        self._capacidad = nueva_capacidad
+    
+    def _compactar_log(self):
+        """Descarta las entradas de pacientes de filas que ya salieron del buffer circular"""
+        primer_evento = self._eventos[:self.filas_guardadas].min()
+        filas_log = np.frombuffer(self._log_fila, dtype=np.int64)
+        conservar = filas_log >= primer_evento
+        self._log_fila = array('q', filas_log[conservar].tobytes())
+        self._log_paciente = array('q', np.frombuffer(self._log_paciente, dtype=np.int64)[conservar].tobytes())
+        self._log_estado = array('b', np.frombuffer(self._log_estado, dtype=np.int8)[conservar].tobytes())
+        self._log_hora = array('d', np.frombuffer(self._log_hora, dtype=np.float64)[conservar].tobytes())
+        # Los pacientes que ya no aparecen no pueden volver a estar activos en filas futuras
+        vigentes = set(self._log_paciente)
+        self._posiciones_pacientes = {
+            id_paciente: posicion for id_paciente, posicion in self._posiciones_pacientes.items() if posicion in vigentes
+        }
+        self._limite_log = max(2 * len(self._log_fila), 4096)
+    
+    def agregar(self, numero_evento: int, valores: tuple, pacientes: list):
+        """Agrega una fila. valores sigue el orden de COLUMNAS_VECTOR; None se guarda como NaN"""
+        k = self.filas - self._base
+        if self.ultimas_filas:
+            n = k % self._capacidad
+        else:
+            if k == self._capacidad:
+                self._crecer()
+            n = k
+        self._eventos[n] = numero_evento
+        for arreglo, codigos, valor in zip(self._arreglos, self._codigos, valores):
+            arreglo[n] = codigos.get(valor, -1) if codigos is not None else valor
+        
+        posiciones = self._posiciones_pacientes
+        for id_paciente, estado, hora_inicio_espera in pacientes:
+            posicion = posiciones.get(id_paciente)
+            if posicion is None:
+                posicion = posiciones[id_paciente] = self._siguiente_posicion
+                self._siguiente_posicion += 1
+            self._log_fila.append(numero_evento)
+            self._log_paciente.append(posicion)
+            self._log_estado.append(self._codigos_estado_paciente.get(estado, -1))
+            self._log_hora.append(hora_inicio_espera if hora_inicio_espera is not None else np.nan)
+        self.filas += 1
+        
+        if self.ultimas_filas and len(self._log_fila) > self._limite_log:
+            self._compactar_log()
+    
+    def a_dataframe(self) -> pd.DataFrame:
+        """DataFrame tipado: float64 para tiempos y RNDs (NaN = vacío), categorías para eventos y estados.
+        El índice es el número de evento de cada fila"""
+        n = self.filas_guardadas
+        k = self.filas - self._base
+        # En modo circular la fila más vieja está en la posición siguiente a la última escrita
+        orden = np.arange(n)
+        if k > self._capacidad:
+            orden = (orden + k) % self._capacidad
+        
+        datos = {}
+        for (nombre, tipo), arreglo in zip(COLUMNAS_VECTOR, self._arreglos):
+            if isinstance(tipo, list):
+                datos[nombre] = pd.Categorical.from_codes(arreglo[orden], categories=tipo)
+            elif tipo == 'f':
+                columna = arreglo[orden]
+                columna[np.isinf(columna)] = np.nan  # Evento no programado
+                datos[nombre] = columna
+            else:
+                datos[nombre] = arreglo[orden]
+        
+        return pd.DataFrame(datos, index=pd.Index(self._eventos[orden], name='Fila'))
+    
+    def pacientes_dataframe(self) -> pd.DataFrame:
+        """Registro largo de pacientes activos: (Fila, Paciente, Columna, Estado, Hora_inicio_espera).
+        Fila es el número de evento y Columna la posición fija del paciente (orden de aparición, desde 1)"""
+        filas_log = np.frombuffer(self._log_fila, dtype=np.int64)
+        posiciones = np.frombuffer(self._log_paciente, dtype=np.int64)
+        if self.ultimas_filas and self.filas_guardadas:
+            conservar = filas_log >= self._eventos[:self.filas_guardadas].min()
+        else:
+            conservar = slice(None)
+        filas_log, posiciones = filas_log[conservar], posiciones[conservar]
+        
+        ids_por_posicion = {posicion: id_paciente for id_paciente, posicion in self._posiciones_pacientes.items()}
+        unicas, codigos = np.unique(posiciones, return_inverse=True)
+        return pd.DataFrame({
+            'Fila': filas_log,
+            'Paciente': pd.Categorical.from_codes(codigos, categories=[nombre_paciente(ids_por_posicion[p]) for p in unicas]),
+            'Columna': posiciones + 1,
+            'Estado': pd.Categorical.from_codes(np.frombuffer(self._log_estado, dtype=np.int8)[conservar], categories=ESTADOS_PACIENTE),
+            'Hora_inicio_espera': np.frombuffer(self._log_hora, dtype=np.float64)[conservar].copy(),
+        })
+    
+    def vaciar(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Devuelve las filas guardadas (vector y registro de pacientes) y vacía el registro para seguir agregando.
+        Solo se conservan las posiciones de los pacientes activos en la última fila: son los únicos que pueden
+        aparecer en filas siguientes, y así mantienen su número de columna"""
+        df_vector, df_pacientes = self.a_dataframe(), self.pacientes_dataframe()
+        if len(df_vector):
+            en_ultima_fila = df_pacientes['Fila'].to_numpy() == df_vector.index[-1]
+            activos = set((df_pacientes['Columna'].to_numpy()[en_ultima_fila] - 1).tolist())
+            self._posiciones_pacientes = {
+                id_paciente: posicion for id_paciente, posicion in self._posiciones_pacientes.items() if posicion in activos
+            }
+        self._base = self.filas
+        self._log_fila = array('q')
+        self._log_paciente = array('q')
+        self._log_estado = array('b')
+        self._log_hora = array('d')
+        self._limite_log = 4096
+        return df_vector, df_pacientes
+
+def pacientes_en_columnas(df_pacientes: pd.DataFrame, filas) -> pd.DataFrame:
+    """Arma la vista ancha (Paciente_i_Estado / Paciente_i_Hora_inicio_espera) solo para las filas pedidas,
+    con una columna por cada paciente activo en alguna de ellas"""
+    filas = pd.Index(filas)
+    # El registro está ordenado por fila: se recorta el rango pedido antes de filtrar
+    fila_log = df_pacientes['Fila'].to_numpy()
+    if len(filas):
+        desde = np.searchsorted(fila_log, filas.min(), side='left')
+        hasta = np.searchsorted(fila_log, filas.max(), side='right')
+    else:
+        desde = hasta = 0
+    activos = df_pacientes.iloc[desde:hasta]
+    activos = activos[activos['Fila'].isin(filas)]
+    columnas = activos['Columna'].to_numpy()
+    numeros = np.unique(columnas)
+    
+    indice_fila = filas.get_indexer(activos['Fila'])
+    indice_columna = np.searchsorted(numeros, columnas)
+    estados = np.full((len(filas), len(numeros)), -1, dtype=np.int8)
+    horas = np.full((len(filas), len(numeros)), np.nan)
+    estados[indice_fila, indice_columna] = activos['Estado'].cat.codes.to_numpy()
+    horas[indice_fila, indice_columna] = activos['Hora_inicio_espera'].to_numpy()
+    
+    datos = {}
+    for k, numero in enumerate(numeros):
+        datos[f'Paciente_{numero}_Estado'] = pd.Categorical.from_codes(estados[:, k], categories=ESTADOS_PACIENTE)
+        datos[f'Paciente_{numero}_Hora_inicio_espera'] = horas[:, k]
+    return pd.DataFrame(datos, index=filas)
+
+def vector_estado_ancho(df_vector: pd.DataFrame, df_pacientes: pd.DataFrame, filas=None) -> pd.DataFrame:
+    """Vector de estado con las columnas de pacientes, construido solo para las filas a mostrar"""
+    if filas is None:
+        filas = df_vector.index
+    return pd.concat([df_vector.loc[filas], pacientes_en_columnas(df_pacientes, filas)], axis=1)
+
+# -----------------------------------------------------------
+# 6) Simulación del centro de salud   
+# -----------------------------------------------------------
+
+class PerfilMotor:
+    """Instrumentación opcional: cantidad y tiempo acumulado por tipo de evento, tiempo en registrar_estado
+    y secciones medidas aparte (armado de DataFrames, multi-índice). Sin perfil el motor no mide nada"""
+
+    def __init__(self):
+        self.cantidad = dict.fromkeys(PRIORIDAD_EVENTOS, 0)
+        self.segundos = dict.fromkeys(PRIORIDAD_EVENTOS, 0.0)
+        self.llamadas_registro = {}
+        self.segundos_registro = {}
+        self.secciones = {}
+        
+    def evento(self, evento: str, segundos: float):
+        self.cantidad[evento] += 1
+        self.segundos[evento] += segundos
+    
+    def registro(self, evento: str, segundos: float):
+        self.llamadas_registro[evento] = self.llamadas_registro.get(evento, 0) + 1
+        self.segundos_registro[evento] = self.segundos_registro.get(evento, 0.0) + segundos
+    
+    @contextmanager
+    def medir(self, seccion: str):
+        """Acumula el tiempo del bloque en secciones[seccion]"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.secciones[seccion] = self.secciones.get(seccion, 0.0) + time.perf_counter() - inicio
+    
+    def a_dict(self) -> dict:
+        """Resumen serializable. El tiempo de cada tipo de evento incluye su registrar_estado, que también se informa aparte"""
+        return {
+            'eventos': {
+                evento: {
+                    'cantidad': self.cantidad[evento],
+                    'segundos': self.segundos[evento],
+                    'segundos_registrar_estado': self.segundos_registro.get(evento, 0.0),
+                }
+                for evento in PRIORIDAD_EVENTOS
+            },
+            'registrar_estado': {
+                'llamadas': sum(self.llamadas_registro.values()),
+                'segundos': sum(self.segundos_registro.values()),
+            },
+            'secciones': dict(self.secciones),
+        }
+    
+    def a_dataframe(self) -> pd.DataFrame:
+        """Tabla por tipo de evento: cantidad, tiempo total, tiempo del manejador sin registro y microsegundos por evento"""
+        df = pd.DataFrame(self.a_dict()['eventos']).T
+        df['segundos_manejador'] = df['segundos'] - df['segundos_registrar_estado']
+        df['microsegundos_por_evento'] = df['segundos'] / df['cantidad'].where(df['cantidad'] > 0) * 1e6
+        df.index.name = 'Evento'
+        return df.astype({'cantidad': np.int64})
+
+def medir(perfil: Optional[PerfilMotor], seccion: str):
+    """perfil.medir(seccion), o un contexto vacío si no hay perfil"""
+    return perfil.medir(seccion) if perfil is not None else nullcontext()
+
+# Parámetros del modelo: un checkpoint solo se puede reanudar con los mismos (el horizonte y la captura pueden cambiar)
+PARAMETROS_MODELO = ['media_llegada', 'a1', 'b1', 'a2', 'b2', 'p_sin_obra', 'tiempo_informe', 'intervalo_llamadas',
+                     'c1', 'c2', 'ini_pacientes_mesa', 'ini_pacientes_coop', 'minutos_proxima_llamada', 'semilla',
+                     'empleados_mesa', 'cajeros_cooperadora', 'lineas_telefonicas']
+VERSION_CHECKPOINT = 4
+
+class CheckpointMotor:
+    """Estado completo del motor después de un evento: reloj, calendario, colas, servidores, acumuladores,
+    fuentes aleatorias (generador y buffer de RNDs) y pacientes activos. Se serializa al crearlo, así no cambia
+    aunque la corrida siga, y se puede guardar en disco. El registro del vector de estado, si lo había, va aparte"""
+
+    def __init__(self, parametros: dict, horizonte: float, reloj: float, estado: bytes, registro: Optional[bytes]):
+        self.version = VERSION_CHECKPOINT
+        self.parametros = parametros  # Los de PARAMETROS_MODELO
+        self.horizonte = horizonte    # tiempo_simulacion de la corrida que lo generó
+        self.reloj = reloj
+        self.estado = estado
+        self.registro = registro
+    
+    def registro_vector(self) -> Optional[RegistroVectorEstado]:
+        """Copia del registro del vector de estado hasta el checkpoint (None si la corrida no lo armaba)"""
+        return pickle.loads(self.registro) if self.registro is not None else None
+    
+    def guardar(self, ruta: str):
+        with open(ruta, 'wb') as archivo:
+            pickle.dump(self, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    @staticmethod
+    def cargar(ruta: str) -> 'CheckpointMotor':
+        """Lee un checkpoint guardado. Usa pickle: abrir solo archivos propios"""
+        with open(ruta, 'rb') as archivo:
+            checkpoint = pickle.load(archivo)
+        if getattr(checkpoint, 'version', None) != VERSION_CHECKPOINT:
+            raise ValueError(f"{ruta} no es un checkpoint compatible con esta versión del motor")
+        return checkpoint
+
+def motor_centro_salud(
+    media_llegada: float = 3.0,
+    a1: float = 1.0, b1: float = 3.0,  # Mesa de turnos
+    a2: float = 0.8, b2: float = 2.4,  # Cooperadora
+    p_sin_obra: float = 0.45,  # 45% sin obra social
+    tiempo_informe: float = 0.1667,  # 10 segundos = 0.1667 min
+    intervalo_llamadas: float = 3.0,
+    c1: float = 0.5, c2: float = 1.5,  # Duración llamadas
+    ini_pacientes_mesa: int = 4,
+    ini_pacientes_coop: int = 2,
+    minutos_proxima_llamada: float = 2.0,
+    tiempo_simulacion: float = 60.0,
+    semilla: Optional[int] = None,  # None: corrida no reproducible
+    # Capacidad: cantidad de servidores de cada tipo
+    empleados_mesa: int = 1,
+    cajeros_cooperadora: int = 1,
+    lineas_telefonicas: int = 1,
+    # Ventana de captura del vector de estado (la última fila se guarda siempre)
+    desde_evento: int = 0,
+    desde_tiempo: float = 0.0,
+    max_filas: Optional[int] = None,
+    filtro_eventos: Optional[list] = None,  # Tipos de evento a capturar (None = todos)
+    registro: Optional[RegistroVectorEstado] = None,  # None: solo estadísticas, no se arma el vector de estado
+    observador=None,  # Llamado después de cada evento con (reloj, largo_colas, espera_acumulada, personas_esperaron, perdidas)
+    perfil: Optional[PerfilMotor] = None,  # Instrumentación por tipo de evento (None = sin costo)
+    # Checkpoints: al_checkpoint(CheckpointMotor) se llama al terminar y, con checkpoint_cada, cada tantos eventos
+    reanudar: Optional[CheckpointMotor] = None,  # Sigue desde ese estado en lugar de las condiciones iniciales
+    al_checkpoint=None,
+    checkpoint_cada: Optional[int] = None
+):
+    """Lógica de eventos del centro de salud como generador. Después de cada evento entrega
+    (reloj, tiempo_promedio_espera, llamadas_perdidas) y las filas capturadas quedan en registro.
+    Al terminar devuelve (tiempo_promedio_espera, llamadas_perdidas, indicadores ponderados en el tiempo).
+    Reanudar un checkpoint hasta un horizonte mayor da el mismo resultado que una sola corrida larga"""
+    parametros_modelo = {nombre: valor for nombre, valor in locals().items() if nombre in PARAMETROS_MODELO}
+    if reanudar is not None and reanudar.parametros != parametros_modelo:
+        raise ValueError("El checkpoint es de una corrida con otros parámetros del modelo")
+    if checkpoint_cada is not None and (al_checkpoint is None or checkpoint_cada < 1):
+        raise ValueError("checkpoint_cada necesita al_checkpoint y un número de eventos positivo")
+    
+    # INICIALIZACIÓN
+    reloj = 0.0
+    contador_pacientes = count(start=1)
+    contador_cooperadora = count(start=1)
+    contador_llamadas = count(start=1)
+    
+    # Variables aleatorias: un sub-stream independiente y un buffer por cada entrada estocástica.
+    # Con la misma semilla, dos escenarios usan los mismos RNDs para cada entrada (números aleatorios comunes)
+    generadores = generadores_por_entrada(semilla)
+    fuente_llegadas = FuenteVariable(generadores['llegadas'], gen_exponencial, media_llegada)
+    fuente_obra_social = FuenteVariable(generadores['obra_social'])
+    fuente_atencion = FuenteVariable(generadores['atencion'], gen_uniforme, a1, b1)
+    fuente_abono = FuenteVariable(generadores['abono'], gen_uniforme, a2, b2)
+    fuente_llamadas = FuenteVariable(generadores['llamadas'], gen_uniforme, c1, c2)
+    
+    # Eventos programados (las variables se mantienen para el vector de estado)
+    calendario = CalendarioEventos()
+    rnd_primera_llegada, tiempo_primera_llegada = fuente_llegadas.siguiente()
+    prox_llegada_paciente = reloj + tiempo_primera_llegada
+    prox_llegada_llamada = minutos_proxima_llamada
+    calendario.programar(prox_llegada_paciente, 'llegada_paciente')
+    calendario.programar(prox_llegada_llamada, 'llegada_llamada')
+    
+    # Estados de servidores: un lugar por empleado / cajero y una pila con los libres,
+    # así asignar y liberar un servidor es O(1) sin importar cuántos haya
+    empleados_mesa, cajeros_cooperadora, lineas_telefonicas = int(empleados_mesa), int(cajeros_cooperadora), int(lineas_telefonicas)
+    if min(empleados_mesa, cajeros_cooperadora, lineas_telefonicas) < 1:
+        raise ValueError("Se necesita al menos un empleado de mesa, un cajero y una línea telefónica")
+    en_mesa = [None] * empleados_mesa             # Paciente o Llamada que atiende cada empleado
+    mesa_libres = list(range(empleados_mesa - 1, -1, -1))  # Pila: se ocupa primero el de menor número
+    mesa_en_llamada = 0
+    # Con varios empleados, el paciente que llega o vuelve de cooperadora pasa directo a uno libre. Con uno solo
+    # se conserva el modelo del enunciado (espera en la cola al próximo evento de la mesa) y su traza de referencia
+    asignacion_inmediata = empleados_mesa > 1
+    en_cooperadora = [None] * cajeros_cooperadora
+    cooperadora_libres = list(range(cajeros_cooperadora - 1, -1, -1))
+    llamadas_en_linea = 0  # Llamadas esperando o siendo atendidas: cada una ocupa una línea
+    
+    # Solo con vector de estado: un heap de fines pendientes por tipo (el próximo es el tope) y los pacientes
+    # en servicio, así armar una fila no recorre los servidores
+    con_vector = registro is not None
+    fines_pendientes = {evento: [] for evento in ('fin_atencion', 'fin_informe_obra_social', 'fin_llamada', 'fin_abono_consulta')}
+    pacientes_en_mesa = {}
+    pacientes_en_cooperadora = {}
+    
+    # COLAS SEPARADAS (FIFO: agregar y sacar en O(1))
+    cola_pacientes_mesa_normal = deque()    # Pacientes nuevos esperando turno
+    cola_pacientes_mesa_retorno = deque()   # Pacientes que vuelven de cooperadora
+    cola_cooperadora = deque()              # Pacientes esperando pagar
+    cola_llamadas = deque()                 # Llamadas esperando en la línea a que se libere un empleado
+    
+    # Conjunto DINÁMICO de todos los objetos activos (dict ordenado: alta y baja en O(1))
+    objetos_activos = {}
+    
+    # Variables para tracking de RNDs
+    ultimo_rnd_llegada = rnd_primera_llegada
+    ultimo_tiempo_entre_llegadas = tiempo_primera_llegada
+    ultimo_rnd_obra_social = None
+    ultimo_obra_social_str = ""
+    ultimo_rnd_atencion = None
+    ultimo_tiempo_atencion = None
+    ultimo_rnd_abono = None
+    ultimo_tiempo_abono = None
+    ultimo_rnd_llamada = None
+    ultimo_tiempo_llamada = None
+    
+    # Estadísticas CORREGIDAS
+    llamadas_perdidas = 0
+    tiempo_espera_acumulado = 0.0
+    cantidad_personas_esperaron = 0
+    
+    # Áreas bajo la curva (valor x tiempo) sin trabajo por evento: cada vez que una cantidad sube (baja) en uno
+    # se resta (suma) el reloj, y al final el área es eso más valor final x reloj final
+    area_cola_mesa = 0.0
+    area_cola_cooperadora = 0.0
+    area_mesa_ocupada = 0.0
+    area_mesa_en_llamada = 0.0
+    area_cooperadora_ocupada = 0.0
+    area_linea_ocupada = 0.0
+    
+    # Funciones auxiliares de los servidores (siempre sobre un empleado / cajero concreto)
+    def iniciar_atencion_paciente(servidor: int, paciente: Paciente):
+        nonlocal ultimo_rnd_obra_social, ultimo_obra_social_str, ultimo_rnd_atencion, ultimo_tiempo_atencion
+        en_mesa[servidor] = paciente
+        paciente.estado_actual = 'SAMT'
+        
+        if paciente.tiene_obra_social is None:
+            ultimo_rnd_obra_social, _ = fuente_obra_social.siguiente()
+            tiene_obra_social = ultimo_rnd_obra_social >= p_sin_obra
+            paciente.set_obra_social(tiene_obra_social)
+            ultimo_obra_social_str = "Con obra social" if tiene_obra_social else "Sin obra social"
+        
+        if paciente.tiene_obra_social or paciente.vuelve_de_cooperadora:
+            ultimo_rnd_atencion, ultimo_tiempo_atencion = fuente_atencion.siguiente()
+            fin, evento = reloj + ultimo_tiempo_atencion, 'fin_atencion'
+        else:
+            fin, evento = reloj + tiempo_informe, 'fin_informe_obra_social'
+            ultimo_rnd_atencion = None
+            ultimo_tiempo_atencion = None
+        calendario.programar(fin, evento, servidor)
+        if con_vector:
+            heapq.heappush(fines_pendientes[evento], fin)
+            pacientes_en_mesa[paciente] = None
+    
+    def iniciar_llamada(servidor: int, llamada: Llamada):
+        nonlocal ultimo_rnd_llamada, ultimo_tiempo_llamada, mesa_en_llamada, area_mesa_en_llamada
+        en_mesa[servidor] = llamada
+        llamada.estado_actual = 'SIENDO_ATENDIDA'
+        mesa_en_llamada += 1
+        area_mesa_en_llamada -= reloj
+        ultimo_rnd_llamada, ultimo_tiempo_llamada = fuente_llamadas.siguiente()
+        fin = reloj + ultimo_tiempo_llamada
+        calendario.programar(fin, 'fin_llamada', servidor)
+        if con_vector:
+            heapq.heappush(fines_pendientes['fin_llamada'], fin)
+    
+    def iniciar_abono(cajero: int, paciente: Paciente):
+        nonlocal ultimo_rnd_abono, ultimo_tiempo_abono
+        en_cooperadora[cajero] = paciente
+        paciente.estado_actual = 'AC'
+        ultimo_rnd_abono, ultimo_tiempo_abono = fuente_abono.siguiente()
+        fin = reloj + ultimo_tiempo_abono
+        calendario.programar(fin, 'fin_abono_consulta', cajero)
+        if con_vector:
+            heapq.heappush(fines_pendientes['fin_abono_consulta'], fin)
+            pacientes_en_cooperadora[paciente] = None
+    
+    def atender_siguiente_en_mesa(servidor: int):
+        """LÓGICA   : Prioridad Llamadas > Pacientes Retorno > Pacientes Normales, para el empleado que se liberó"""
+        nonlocal ultimo_rnd_obra_social, ultimo_obra_social_str, ultimo_rnd_atencion, ultimo_tiempo_atencion
+        nonlocal tiempo_espera_acumulado, cantidad_personas_esperaron, area_cola_mesa, area_mesa_ocupada
+        
+        # PRIORIDAD 1: Llamada esperando en línea
+        if cola_llamadas:
+            iniciar_llamada(servidor, cola_llamadas.popleft())
+            return
+        
+        # PRIORIDAD 2: Pacientes de retorno (NO ESPERAN - van directo)
+        paciente_a_atender = None
+        if cola_pacientes_mesa_retorno:
+            paciente_a_atender = cola_pacientes_mesa_retorno.popleft()
+            # PACIENTES DE RETORNO NO ESPERAN - no se cuenta tiempo
+        # PRIORIDAD 3: Pacientes normales
+        elif cola_pacientes_mesa_normal:
+            paciente_a_atender = cola_pacientes_mesa_normal.popleft()
+            # CÁLCULO CORREGIDO: Solo si no es paciente inicial
+            if not paciente_a_atender.es_inicial and paciente_a_atender.tiempo_inicio_espera is not None:
+                tiempo_espera = reloj - paciente_a_atender.tiempo_inicio_espera
+                tiempo_espera_acumulado += tiempo_espera
+                cantidad_personas_esperaron += 1
+        
+        if paciente_a_atender:
+            area_cola_mesa += reloj
+            iniciar_atencion_paciente(servidor, paciente_a_atender)
+        else:
+            en_mesa[servidor] = None
+            mesa_libres.append(servidor)
+            area_mesa_ocupada += reloj
+            ultimo_rnd_obra_social = None
+            ultimo_obra_social_str = ""
+            ultimo_rnd_atencion = None
+            ultimo_tiempo_atencion = None
+    
+    def atender_siguiente_paciente_cooperadora(cajero: int):
+        nonlocal ultimo_rnd_abono, ultimo_tiempo_abono, area_cola_cooperadora, area_cooperadora_ocupada
+        
+        if cola_cooperadora:
+            area_cola_cooperadora += reloj
+            iniciar_abono(cajero, cola_cooperadora.popleft())
+        else:
+            en_cooperadora[cajero] = None
+            cooperadora_libres.append(cajero)
+            area_cooperadora_ocupada += reloj
+            ultimo_rnd_abono = None
+            ultimo_tiempo_abono = None
+    
+    # CONDICIONES INICIALES CORREGIDAS (al reanudar se reemplazan por el estado del checkpoint, más abajo).
+    # Ocurren con reloj 0: no suman a las áreas
+    
+    # 4 pacientes esperando para sacar turno: los primeros pasan INMEDIATAMENTE a los empleados libres
+    for i in range(ini_pacientes_mesa if reanudar is None else 0):
+        pac = Paciente(next(contador_pacientes), 0.0, es_inicial=True)
+        objetos_activos[pac] = None
+        if mesa_libres:
+            iniciar_atencion_paciente(mesa_libres.pop(), pac)
+        else:
+            pac.estado_actual = 'EAMT'
+            cola_pacientes_mesa_normal.append(pac)
+    
+    # 2 pacientes esperando pagar consulta: los primeros pasan INMEDIATAMENTE a pagar
+    for i in range(ini_pacientes_coop if reanudar is None else 0):
+        pac = Paciente(-next(contador_cooperadora), 0.0, es_inicial=True)
+        pac.set_obra_social(False)
+        pac.primera_vez = False
+        objetos_activos[pac] = None
+        if cooperadora_libres:
+            iniciar_abono(cooperadora_libres.pop(), pac)
+        else:
+            pac.estado_actual = 'EAC'
+            cola_cooperadora.append(pac)
+    
+    # Vector de estado
+    eventos_capturados = set(filtro_eventos) if filtro_eventos is not None else None
+    numero_evento = -1
+    ultimo_evento = None
+    ultimo_evento_guardado = -1
+    
+    def obtener_pacientes_activos():
+        """Obtiene SOLO los PACIENTES activos como (id, estado, hora_inicio_espera)"""
+        pacientes = []
+        
+        # 1. Pacientes siendo atendidos en mesa
+        for atendido in pacientes_en_mesa:
+            pacientes.append((atendido.id, atendido.estado_actual, atendido.tiempo_inicio_espera))
+        
+        # 2. Pacientes en cola mesa (retorno NO tiene hora inicio porque no esperan)
+        for pac in cola_pacientes_mesa_retorno:
+            pacientes.append((pac.id, pac.estado_actual, None))  # NO ESPERAN - van directo
+                
+        for pac in cola_pacientes_mesa_normal:
+            pacientes.append((pac.id, pac.estado_actual, pac.tiempo_inicio_espera))
+        
+        # 3. Pacientes en cooperadora
+        for pac in pacientes_en_cooperadora:
+            pacientes.append((pac.id, pac.estado_actual, None))  # No esperan en cooperadora
+            
+        # 4. Pacientes en cola cooperadora
+        for pac in cola_cooperadora:
+            pacientes.append((pac.id, pac.estado_actual, None))  # No esperan en cooperadora
+                
+        return pacientes
+    
+    def proximo_fin(evento: str) -> float:
+        """Fin más próximo de ese tipo entre los servidores (inf si ninguno lo tiene programado)"""
+        pendientes = fines_pendientes[evento]
+        return pendientes[0] if pendientes else float('inf')
+    
+    def registrar_fila(evento: str):
+        nonlocal numero_evento, ultimo_evento
+        numero_evento += 1
+        ultimo_evento = evento
+        
+        # Ventana de captura: fuera de ella no se arma la fila
+        if numero_evento < desde_evento or reloj < desde_tiempo:
+            return
+        if eventos_capturados is not None and evento not in eventos_capturados:
+            return
+        if max_filas is not None and registro.filas >= max_filas:
+            return
+        guardar_fila(evento)
+    
+    def guardar_fila(evento: str):
+        nonlocal ultimo_evento_guardado
+        ultimo_evento_guardado = numero_evento
+        
+        # Determinar estado de mesa (CORREGIDO). Con varios empleados: Libre si hay alguno libre,
+        # AtendendoLlamada si todos están en una llamada, Ocupado en otro caso
+        estado_mesa = 'Libre'
+        if not mesa_libres:
+            estado_mesa = 'AtendendoLlamada' if mesa_en_llamada == empleados_mesa else 'Ocupado'
+        
+        # Valores crudos en el orden de COLUMNAS_VECTOR (el formato se aplica al mostrar)
+        registro.agregar(numero_evento, (
+            evento,
+            reloj,
+            ultimo_rnd_llegada,
+            ultimo_tiempo_entre_llegadas,
+            prox_llegada_paciente,
+            ultimo_rnd_obra_social,
+            ultimo_obra_social_str,
+            proximo_fin('fin_informe_obra_social'),
+            ultimo_rnd_atencion,
+            ultimo_tiempo_atencion,
+            proximo_fin('fin_atencion'),
+            ultimo_rnd_abono,
+            ultimo_tiempo_abono,
+            proximo_fin('fin_abono_consulta'),
+            prox_llegada_llamada,
+            ultimo_rnd_llamada,
+            ultimo_tiempo_llamada,
+            proximo_fin('fin_llamada'),
+            
+            # Estados de empleados
+            estado_mesa,
+            len(cola_pacientes_mesa_retorno) + len(cola_pacientes_mesa_normal),
+            len(cola_llamadas),
+            'Libre' if cooperadora_libres else 'Ocupado',
+            len(cola_cooperadora),
+            
+            llamadas_perdidas,
+            tiempo_espera_acumulado,
+            cantidad_personas_esperaron
+        ), obtener_pacientes_activos())
+    
+    def no_registrar(evento: str):
+        pass
+    
+    # Sin vector de estado solo se mantienen los acumuladores
+    registrar_estado = registrar_fila if registro is not None else no_registrar
+    
+    if perfil is not None:
+        registrar_sin_medir = registrar_estado
+        reloj_perfil = time.perf_counter
+        
+        def registrar_midiendo(evento: str):
+            inicio = reloj_perfil()
+            registrar_sin_medir(evento)
+            perfil.registro(evento, reloj_perfil() - inicio)
+        
+        registrar_estado = registrar_midiendo
+    
+    def capturar_checkpoint() -> CheckpointMotor:
+        """Serializa todo el estado mutable en un solo pickle: así los pacientes compartidos entre colas,
+        servidores y objetos_activos siguen siendo el mismo objeto al reanudar"""
+        nonlocal contador_pacientes, contador_cooperadora, contador_llamadas
+        # itertools.count no se serializa en todas las versiones: se guarda el próximo id y se recrea
+        ids = (next(contador_pacientes), next(contador_cooperadora), next(contador_llamadas))
+        contador_pacientes, contador_cooperadora, contador_llamadas = (count(i) for i in ids)
+        estado = (
+            reloj, ids, fuente_llegadas, fuente_obra_social, fuente_atencion, fuente_abono, fuente_llamadas,
+            calendario, prox_llegada_paciente, prox_llegada_llamada,
+            en_mesa, mesa_libres, mesa_en_llamada, en_cooperadora, cooperadora_libres, llamadas_en_linea,
+            cola_pacientes_mesa_normal, cola_pacientes_mesa_retorno, cola_cooperadora, cola_llamadas, objetos_activos,
+            ultimo_rnd_llegada, ultimo_tiempo_entre_llegadas, ultimo_rnd_obra_social, ultimo_obra_social_str,
+            ultimo_rnd_atencion, ultimo_tiempo_atencion, ultimo_rnd_abono, ultimo_tiempo_abono,
+            ultimo_rnd_llamada, ultimo_tiempo_llamada,
+            llamadas_perdidas, tiempo_espera_acumulado, cantidad_personas_esperaron,
+            area_cola_mesa, area_cola_cooperadora, area_mesa_ocupada, area_mesa_en_llamada,
+            area_cooperadora_ocupada, area_linea_ocupada,
+            numero_evento, ultimo_evento, ultimo_evento_guardado,
+        )
+        return CheckpointMotor(
+            parametros_modelo, tiempo_simulacion, reloj,
+            pickle.dumps(estado, protocol=pickle.HIGHEST_PROTOCOL),
+            pickle.dumps(registro, protocol=pickle.HIGHEST_PROTOCOL) if registro is not None else None,
+        )
+    
+    if reanudar is None:
+        # Registrar estado inicial
+        registrar_estado("Inicializacion")
+        if observador is not None:
+            observador(reloj, len(cola_pacientes_mesa_normal) + len(cola_pacientes_mesa_retorno) + len(cola_cooperadora),
+                       tiempo_espera_acumulado, cantidad_personas_esperaron, llamadas_perdidas)
+    else:
+        # Mismo orden que en capturar_checkpoint
+        (
+            reloj, ids, fuente_llegadas, fuente_obra_social, fuente_atencion, fuente_abono, fuente_llamadas,
+            calendario, prox_llegada_paciente, prox_llegada_llamada,
+            en_mesa, mesa_libres, mesa_en_llamada, en_cooperadora, cooperadora_libres, llamadas_en_linea,
+            cola_pacientes_mesa_normal, cola_pacientes_mesa_retorno, cola_cooperadora, cola_llamadas, objetos_activos,
+            ultimo_rnd_llegada, ultimo_tiempo_entre_llegadas, ultimo_rnd_obra_social, ultimo_obra_social_str,
+            ultimo_rnd_atencion, ultimo_tiempo_atencion, ultimo_rnd_abono, ultimo_tiempo_abono,
+            ultimo_rnd_llamada, ultimo_tiempo_llamada,
+            llamadas_perdidas, tiempo_espera_acumulado, cantidad_personas_esperaron,
+            area_cola_mesa, area_cola_cooperadora, area_mesa_ocupada, area_mesa_en_llamada,
+            area_cooperadora_ocupada, area_linea_ocupada,
+            numero_evento, ultimo_evento, ultimo_evento_guardado,
+        ) = pickle.loads(reanudar.estado)
+        contador_pacientes, contador_cooperadora, contador_llamadas = (count(i) for i in ids)
+        if con_vector:
+            # No van en el checkpoint: se reconstruyen desde el calendario y los servidores
+            for fin, evento, _ in calendario.programados():
+                if evento in fines_pendientes:
+                    fines_pendientes[evento].append(fin)
+            for pendientes in fines_pendientes.values():
+                heapq.heapify(pendientes)
+            pacientes_en_mesa.update((atendido, None) for atendido in en_mesa if isinstance(atendido, Paciente))
+            pacientes_en_cooperadora.update((pac, None) for pac in en_cooperadora if pac is not None)
+    eventos_desde_checkpoint = 0
+    
+    # MOTOR DE SIMULACIÓN CORREGIDO
+    while reloj < tiempo_simulacion:
+        
+        # Encontrar próximo evento
+        siguiente = calendario.proximo()
+        
+        if siguiente is None:
+            break
+            
+        momento_evento, proximo_evento, servidor = siguiente
+        reloj = momento_evento
+        if con_vector and servidor is not None:
+            heapq.heappop(fines_pendientes[proximo_evento])  # Los fines de un tipo se procesan en orden
+        if perfil is not None:
+            inicio_evento = reloj_perfil()
+        
+        # PROCESAMIENTO DE EVENTOS CORREGIDO
+        if proximo_evento == 'llegada_paciente':
+            # Generar próxima llegada
+            ultimo_rnd_llegada, ultimo_tiempo_entre_llegadas = fuente_llegadas.siguiente()
+            prox_llegada_paciente = reloj + ultimo_tiempo_entre_llegadas
+            calendario.programar(prox_llegada_paciente, 'llegada_paciente')
+            
+            # Crear nuevo paciente DINÁMICAMENTE
+            nuevo_pac = Paciente(next(contador_pacientes), reloj)
+            objetos_activos[nuevo_pac] = None
+            if asignacion_inmediata and mesa_libres:
+                # Empleado libre -> se atiende sin esperar (cuenta como espera nula)
+                cantidad_personas_esperaron += 1
+                area_mesa_ocupada -= reloj
+                iniciar_atencion_paciente(mesa_libres.pop(), nuevo_pac)
+            else:
+                nuevo_pac.estado_actual = 'EAMT'
+                cola_pacientes_mesa_normal.append(nuevo_pac)
+                area_cola_mesa -= reloj
+            
+            registrar_estado("llegada_paciente")
+            
+        elif proximo_evento == 'llegada_llamada':
+            # Programar próxima llamada
+            prox_llegada_llamada = reloj + intervalo_llamadas
+            calendario.programar(prox_llegada_llamada, 'llegada_llamada')
+            
+            # LÓGICA    SEGÚN ESPECIFICACIONES:
+            if llamadas_en_linea == lineas_telefonicas:
+                # Todas las líneas YA están ocupadas (llamadas siendo atendidas O esperando) -> SE PIERDE
+                llamadas_perdidas += 1
+                ultimo_rnd_llamada = None
+                ultimo_tiempo_llamada = None
+            else:
+                nueva_llamada = Llamada(next(contador_llamadas), reloj)
+                objetos_activos[nueva_llamada] = None
+                llamadas_en_linea += 1
+                area_linea_ocupada -= reloj
+                if mesa_libres:
+                    # Hay un empleado libre -> atender llamada inmediatamente
+                    area_mesa_ocupada -= reloj
+                    iniciar_llamada(mesa_libres.pop(), nueva_llamada)
+                else:
+                    # Empleados ocupados pero hay línea libre -> llamada ESPERA en la línea
+                    nueva_llamada.estado_actual = 'ESPERANDO'
+                    cola_llamadas.append(nueva_llamada)
+                    ultimo_rnd_llamada = None
+                    ultimo_tiempo_llamada = None
+            registrar_estado("llegada_llamada")
+                
+        elif proximo_evento == 'fin_llamada':
+            # TERMINA LLAMADA - LIBERAR LÍNEA
+            del objetos_activos[en_mesa[servidor]]  # REMOVER de objetos activos
+            mesa_en_llamada -= 1
+            llamadas_en_linea -= 1  # LIBERAR LÍNEA
+            area_mesa_en_llamada += reloj
+            area_linea_ocupada += reloj
+            ultimo_rnd_llamada = None
+            ultimo_tiempo_llamada = None
+            
+            atender_siguiente_en_mesa(servidor)
+            
+            registrar_estado("fin_llamada")
+            
+        elif proximo_evento == 'fin_atencion':
+            # TERMINA ATENCIÓN DE PACIENTE - DESTRUIR COMPLETAMENTE (no se reutiliza)
+            del objetos_activos[en_mesa[servidor]]  # REMOVER de objetos activos
+            if con_vector:
+                del pacientes_en_mesa[en_mesa[servidor]]
+            atender_siguiente_en_mesa(servidor)
+            registrar_estado("fin_atencion")
+            
+        elif proximo_evento == 'fin_informe_obra_social':
+            # PACIENTE SIN OBRA SOCIAL VA A COOPERADORA (MANTIENE EL MISMO OBJETO)
+            paciente = en_mesa[servidor]
+            if con_vector:
+                del pacientes_en_mesa[paciente]
+            if cooperadora_libres:
+                # Va directo a ser atendido en cooperadora
+                area_cooperadora_ocupada -= reloj
+                iniciar_abono(cooperadora_libres.pop(), paciente)
+            else:
+                # Va a cola de cooperadora
+                paciente.estado_actual = 'EAC'
+                cola_cooperadora.append(paciente)
+                area_cola_cooperadora -= reloj
+            
+            atender_siguiente_en_mesa(servidor)
+            registrar_estado("fin_informe_obra_social")
+            
+        elif proximo_evento == 'fin_abono_consulta':
+            # PACIENTE VUELVE A COLA DE MESA DE TURNOS (MANTIENE EL MISMO OBJETO)
+            paciente = en_cooperadora[servidor]
+            if con_vector:
+                del pacientes_en_cooperadora[paciente]
+            paciente.marcar_retorno_cooperadora()
+            # NO SE ASIGNA tiempo_inicio_espera porque los de retorno NO ESPERAN
+            if asignacion_inmediata and mesa_libres:
+                area_mesa_ocupada -= reloj
+                iniciar_atencion_paciente(mesa_libres.pop(), paciente)
+            else:
+                paciente.estado_actual = 'EAMT'
+                cola_pacientes_mesa_retorno.append(paciente)
+                area_cola_mesa -= reloj
+            
+            atender_siguiente_paciente_cooperadora(servidor)
+            registrar_estado("fin_abono_consulta")
+        
+        if perfil is not None:
+            perfil.evento(proximo_evento, reloj_perfil() - inicio_evento)
+        if observador is not None:
+            observador(reloj, len(cola_pacientes_mesa_normal) + len(cola_pacientes_mesa_retorno) + len(cola_cooperadora),
+                       tiempo_espera_acumulado, cantidad_personas_esperaron, llamadas_perdidas)
+        if checkpoint_cada is not None:
+            eventos_desde_checkpoint += 1
+            if eventos_desde_checkpoint == checkpoint_cada:
+                eventos_desde_checkpoint = 0
+                al_checkpoint(capturar_checkpoint())
+        yield reloj, (tiempo_espera_acumulado / cantidad_personas_esperaron if cantidad_personas_esperaron > 0 else 0.0), llamadas_perdidas
+    
+    # PROCESAMIENTO DE RESULTADOS
+    tiempo_promedio_espera = tiempo_espera_acumulado / cantidad_personas_esperaron if cantidad_personas_esperaron > 0 else 0.0
+    duracion = reloj if reloj > 0 else float('nan')
+    indicadores = {
+        'Tiempo_simulado': reloj,
+        'Largo_promedio_cola_mesa': (area_cola_mesa + (len(cola_pacientes_mesa_normal) + len(cola_pacientes_mesa_retorno)) * reloj) / duracion,
+        'Largo_promedio_cola_cooperadora': (area_cola_cooperadora + len(cola_cooperadora) * reloj) / duracion,
+        # Con varios servidores: fracción de la capacidad total ocupada
+        'Utilizacion_mesa': (area_mesa_ocupada + (empleados_mesa - len(mesa_libres)) * reloj) / (duracion * empleados_mesa),
+        'Utilizacion_mesa_llamadas': (area_mesa_en_llamada + mesa_en_llamada * reloj) / (duracion * empleados_mesa),
+        'Utilizacion_cooperadora': (area_cooperadora_ocupada + (cajeros_cooperadora - len(cooperadora_libres)) * reloj) / (duracion * cajeros_cooperadora),
+        'Fraccion_linea_ocupada': (area_linea_ocupada + llamadas_en_linea * reloj) / (duracion * lineas_telefonicas),
+    }
+    
+    # Checkpoint final antes de la fila forzada: al reanudar, el vector sigue igual que en una corrida larga
+    if al_checkpoint is not None:
+        al_checkpoint(capturar_checkpoint())
+    
+    # La fila final se guarda siempre, aunque haya quedado fuera de la ventana
+    if registro is not None and ultimo_evento_guardado != numero_evento:
+        guardar_fila(ultimo_evento)
+    
+    return tiempo_promedio_espera, llamadas_perdidas, indicadores
+
+def agotar_motor(motor) -> tuple[float, int, dict]:
+    """Corre el generador del motor hasta el final y devuelve su resultado"""
+    siguiente = motor.__next__
+    try:
+        while True:
+            siguiente()
+    except StopIteration as fin:
+        return fin.value
+
+def simular_centro_salud(solo_estadisticas: bool = False, ultimas_filas: Optional[int] = None, **parametros):
+    """Simulación    del centro de salud. parametros: los de motor_centro_salud (media_llegada, a1, b1, ..., semilla
+    y ventana de captura). ultimas_filas: buffer circular con las últimas N filas capturadas.
+    Devuelve (vector de estado, tiempo promedio de espera, llamadas perdidas, registro largo de pacientes,
+    indicadores ponderados en el tiempo)"""
+    reanudar = parametros.get('reanudar')
+    if solo_estadisticas:
+        registro = None
+    elif reanudar is not None and reanudar.registro is not None:
+        registro = reanudar.registro_vector()  # El vector sigue desde las filas ya capturadas
+    else:
+        registro = RegistroVectorEstado(ultimas_filas=ultimas_filas)
+    perfil = parametros.get('perfil')
+    tiempo_promedio_espera, llamadas_perdidas, indicadores = agotar_motor(motor_centro_salud(registro=registro, **parametros))
+    
+    if registro is None:
+        return None, tiempo_promedio_espera, llamadas_perdidas, None, indicadores
+    with medir(perfil, 'armado_dataframes'):
+        df_vector, df_pacientes = registro.a_dataframe(), registro.pacientes_dataframe()
+    return df_vector, tiempo_promedio_espera, llamadas_perdidas, df_pacientes, indicadores
+
+def continuar_centro_salud(checkpoint: CheckpointMotor, tiempo_simulacion: float, **opciones):
+    """Sigue una corrida desde un checkpoint hasta un horizonte mayor, sin repetir lo ya simulado.
+    opciones: las de simular_centro_salud (captura, al_checkpoint, ...). Mismo resultado que una sola corrida larga"""
+    if tiempo_simulacion < checkpoint.horizonte:
+        raise ValueError(f"El horizonte ({tiempo_simulacion}) no puede ser menor que el del checkpoint ({checkpoint.horizonte})")
+    return simular_centro_salud(**checkpoint.parametros, tiempo_simulacion=tiempo_simulacion, reanudar=checkpoint, **opciones)
+
+def iterar_centro_salud(tamano_lote: int = 100, **parametros):
+    """Generador: corre la simulación y entrega el vector de estado por lotes a medida que avanza.
+    Cada lote es (df_vector, df_pacientes, (reloj, tiempo_promedio_espera, llamadas_perdidas)) con las filas
+    capturadas desde el lote anterior, así la memoria no depende del largo de la corrida.
+    En el último lote el avance agrega un cuarto elemento: los indicadores ponderados en el tiempo.
+    Se puede cortar en cualquier momento (break o close())"""
+    registro = RegistroVectorEstado(capacidad_inicial=tamano_lote)
+    perfil = parametros.get('perfil')
+    motor = motor_centro_salud(registro=registro, **parametros)
+    avance = (0.0, 0.0, 0)
+    try:
+        while True:
+            avance = next(motor)
+            if registro.filas_guardadas >= tamano_lote:
+                with medir(perfil, 'armado_dataframes'):
+                    lote = registro.vaciar()
+                yield lote + (avance,)
+    except StopIteration as fin:
+        tiempo_promedio_espera, llamadas_perdidas, indicadores = fin.value
+        with medir(perfil, 'armado_dataframes'):
+            lote = registro.vaciar()
+        yield lote + ((avance[0], tiempo_promedio_espera, llamadas_perdidas, indicadores),)
+
+FILAS_PAGINA_PERFIL = 100  # Página típica de la interfaz, para medir el armado del multi-índice
+
+def perfilar_centro_salud(**parametros) -> dict:
+    """Corre la simulación con instrumentación y devuelve el perfil como dict (ver PerfilMotor.a_dict)"""
+    perfil = PerfilMotor()
+    df_vector, _, _, df_pacientes, _ = simular_centro_salud(perfil=perfil, **parametros)
+    if df_vector is not None:
+        with perfil.medir('multiindice'):
+            armar_vector_mostrado(df_vector, df_pacientes, df_vector.index[:FILAS_PAGINA_PERFIL])
+    return perfil.a_dict()
+
+def simular_estadisticas(**parametros) -> tuple[float, int]:
+    """Corre la simulación sin vector de estado. Devuelve (tiempo_promedio_espera, llamadas_perdidas)"""
+    _, tiempo_promedio_espera, llamadas_perdidas, _, _ = simular_centro_salud(solo_estadisticas=True, **parametros)
+    return tiempo_promedio_espera, llamadas_perdidas
+
+def simular_indicadores(**parametros) -> dict:
+    """Corre la simulación sin vector de estado y devuelve todas las métricas en un dict:
+    las dos del enunciado más los indicadores ponderados en el tiempo (colas, utilizaciones, línea)"""
+    _, tiempo_promedio_espera, llamadas_perdidas, _, indicadores = simular_centro_salud(solo_estadisticas=True, **parametros)
+    return {'Tiempo_promedio_espera': tiempo_promedio_espera, 'Llamadas_perdidas': llamadas_perdidas, **indicadores}
+
+# -----------------------------------------------------------
+# 7) Replicaciones independientes e intervalos de confianza
+# -----------------------------------------------------------
+
+METRICAS = ['Tiempo_promedio_espera', 'Llamadas_perdidas']
+
+def cuantil_t(p: float, grados_libertad: int) -> float:
+    """Cuantil de la t de Student (exacto para 1 y 2 grados de libertad, expansión de Cornish-Fisher para el resto)"""
+    if grados_libertad == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if grados_libertad == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = NormalDist().inv_cdf(p)
+    v = grados_libertad
+    return (z
+            + (z**3 + z) / (4 * v)
+            + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * v**2)
+            + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * v**3)
+            + (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / (92160 * v**4))
+
+def intervalo_confianza(valores, nivel_confianza: float = 0.95) -> dict:
+    """Media, desvío estándar muestral e intervalo t de Student para la media"""
+    valores = np.asarray(valores, dtype=np.float64)
+    n = len(valores)
+    media = float(valores.mean()) if n else float('nan')
+    desvio = float(valores.std(ddof=1)) if n > 1 else float('nan')
+    semiamplitud = cuantil_t(0.5 + nivel_confianza / 2, n - 1) * desvio / math.sqrt(n) if n > 1 else float('nan')
+    return {
+        'Media': media,
+        'Desvio': desvio,
+        'IC_inferior': media - semiamplitud,
+        'IC_superior': media + semiamplitud,
+        'Semiamplitud': semiamplitud,
+    }
+
+def generar_semillas(cantidad: int, semilla: Optional[int] = None) -> list[int]:
+    """Semillas independientes derivadas de una semilla base (SeedSequence.spawn)"""
+    return [int(hija.generate_state(1)[0]) for hija in np.random.SeedSequence(semilla).spawn(cantidad)]
+
+def _pool_procesos(procesos: int) -> ProcessPoolExecutor:
+    """Pool con procesos nuevos (spawn): hacer fork desde un proceso con hilos (Streamlit, el servicio HTTP)
+    puede copiar locks tomados y colgar al hijo"""
+    return ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context('spawn'))
+
+def _mapear_en_pool(funcion, tareas: list, procesos: Optional[int] = None) -> list:
+    """Aplica funcion a cada tarea en un pool de procesos (o en serie si hay un solo proceso), conservando el orden"""
+    procesos = min(procesos or os.cpu_count() or 1, len(tareas))
+    if procesos <= 1:
+        return [funcion(tarea) for tarea in tareas]
+    with _pool_procesos(procesos) as pool:
+        return list(pool.map(funcion, tareas, chunksize=max(1, len(tareas) // (procesos * 4))))
+
+def _correr_replicacion(argumentos: tuple) -> tuple[float, int]:
+    """Una replicación en un proceso del pool: semilla propia y solo estadísticas"""
+    parametros, semilla = argumentos
+    tiempo_promedio_espera, llamadas_perdidas = simular_estadisticas(semilla=semilla, **parametros)
+    return float(tiempo_promedio_espera), llamadas_perdidas
+
+def correr_replicaciones(
+    parametros: dict,
+    replicaciones: int = 30,
+    semilla: Optional[int] = None,
+    nivel_confianza: float = 0.95,
+    procesos: Optional[int] = None,
+    almacen: Optional[AlmacenResultados] = None
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Corre N replicaciones independientes en un pool de procesos (con almacén, solo las que no estén guardadas).
+    Devuelve (métricas por replicación, resumen con media, desvío e intervalo de confianza por métrica)"""
+    semillas = generar_semillas(replicaciones, semilla)
+    resultados = _replicar([(parametros, s) for s in semillas], almacen, partial(_mapear_en_pool, procesos=procesos))
+    return _resumir_replicaciones(semillas, resultados, nivel_confianza)
+
+def _resumir_replicaciones(semillas: list, resultados: list, nivel_confianza: float) -> tuple[pd.DataFrame, pd.DataFrame]:
+    df_replicaciones = pd.DataFrame(resultados, columns=METRICAS)
+    df_replicaciones.insert(0, 'Semilla', semillas)
+    df_replicaciones.index = pd.RangeIndex(1, len(semillas) + 1, name='Replicacion')
+    
+    df_resumen = pd.DataFrame(
+        {metrica: intervalo_confianza(df_replicaciones[metrica], nivel_confianza) for metrica in METRICAS}
+    ).T
+    # Semiamplitud relativa a la media (una media nula solo cuenta como precisa si no hay dispersión)
+    df_resumen['Semiamplitud_relativa'] = [
+        abs(fila['Semiamplitud'] / fila['Media']) if fila['Media'] != 0
+        else (0.0 if fila['Semiamplitud'] == 0 else float('inf'))
+        for _, fila in df_resumen.iterrows()
+    ]
+    return df_replicaciones, df_resumen
+
+def correr_replicaciones_secuenciales(
+    parametros: dict,
+    precision_relativa: float = 0.05,
+    nivel_confianza: float = 0.95,
+    replicaciones_iniciales: int = 10,
+    tamano_lote: Optional[int] = None,
+    max_replicaciones: int = 1000,
+    max_segundos: Optional[float] = None,
+    semilla: Optional[int] = None,
+    procesos: Optional[int] = None,
+    almacen: Optional[AlmacenResultados] = None
+) -> tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """Lanza replicaciones en lotes paralelos hasta que la semiamplitud relativa del intervalo de confianza
+    de todas las métricas quede por debajo de precision_relativa, o hasta agotar max_replicaciones / max_segundos.
+    Devuelve (métricas por replicación, resumen, informe con replicaciones usadas, segundos y motivo de corte)"""
+    inicio = time.perf_counter()
+    procesos = procesos or os.cpu_count() or 1
+    tamano_lote = tamano_lote or max(2 * procesos, 4)
+    # Las semillas hijas se generan a demanda: las primeras n coinciden con generar_semillas(n, semilla)
+    secuencia = np.random.SeedSequence(semilla)
+    semillas, resultados = [], []
+    
+    pool = _pool_procesos(procesos) if procesos > 1 else None
+    try:
+        while True:
+            cantidad = replicaciones_iniciales if not semillas else tamano_lote
+            cantidad = min(cantidad, max_replicaciones - len(semillas))
+            nuevas = [int(hija.generate_state(1)[0]) for hija in secuencia.spawn(cantidad)]
+            tareas = [(parametros, s) for s in nuevas]
+            if pool is not None:
+                mapear = lambda funcion, t: pool.map(funcion, t, chunksize=max(1, len(t) // (procesos * 2)))
+            else:
+                mapear = map
+            resultados.extend(_replicar(tareas, almacen, mapear))
+            semillas.extend(nuevas)
+            
+            df_replicaciones, df_resumen = _resumir_replicaciones(semillas, resultados, nivel_confianza)
+            if (df_resumen['Semiamplitud_relativa'] <= precision_relativa).all():
+                motivo = 'precision'
+                break
+            if len(semillas) >= max_replicaciones:
+                motivo = 'max_replicaciones'
+                break
+            if max_segundos is not None and time.perf_counter() - inicio >= max_segundos:
+                motivo = 'max_segundos'
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    
+    informe = {
+        'Replicaciones': len(semillas),
+        'Segundos': time.perf_counter() - inicio,
+        'Precision_alcanzada': motivo == 'precision',
+        'Motivo': motivo,
+    }
+    return df_replicaciones, df_resumen, informe
+
+def comparar_escenarios(
+    parametros_a: dict,
+    parametros_b: dict,
+    replicaciones: int = 30,
+    semilla: Optional[int] = None,
+    nivel_confianza: float = 0.95,
+    procesos: Optional[int] = None,
+    almacen: Optional[AlmacenResultados] = None
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Comparación pareada de dos escenarios con números aleatorios comunes (A y B con la misma semilla).
+    Devuelve (métricas A, B y diferencia A - B por replicación, intervalo de confianza de cada diferencia)"""
+    semillas = generar_semillas(replicaciones, semilla)
+    tareas = [(parametros_a, s) for s in semillas] + [(parametros_b, s) for s in semillas]
+    metricas = _replicar(tareas, almacen, partial(_mapear_en_pool, procesos=procesos))
+    resultados = [a + b for a, b in zip(metricas[:replicaciones], metricas[replicaciones:])]
+    
+    df_pares = pd.DataFrame(resultados, columns=[f'{m}_A' for m in METRICAS] + [f'{m}_B' for m in METRICAS])
+    for metrica in METRICAS:
+        df_pares[f'{metrica}_diferencia'] = df_pares[f'{metrica}_A'] - df_pares[f'{metrica}_B']
+    df_pares.insert(0, 'Semilla', semillas)
+    df_pares.index = pd.RangeIndex(1, replicaciones + 1, name='Replicacion')
+    
+    df_resumen = pd.DataFrame(
+        {metrica: intervalo_confianza(df_pares[f'{metrica}_diferencia'], nivel_confianza) for metrica in METRICAS}
+    ).T
+    return df_pares, df_resumen
+
+# -----------------------------------------------------------
+# 8) Barrido de parámetros
+# -----------------------------------------------------------
+
+def _resumir_punto(punto: dict, resultados: list, nivel_confianza: float) -> dict:
+    """Fila de resultados de un punto de la grilla: media e intervalo de confianza por métrica"""
+    fila = dict(punto)
+    fila['Replicaciones'] = len(resultados)
+    for k, metrica in enumerate(METRICAS):
+        ic = intervalo_confianza([r[k] for r in resultados], nivel_confianza)
+        fila[f'{metrica}_media'] = ic['Media']
+        fila[f'{metrica}_IC_inferior'] = ic['IC_inferior']
+        fila[f'{metrica}_IC_superior'] = ic['IC_superior']
+    return fila
+
+def barrer_parametros(
+    parametros_base: dict,
+    grilla: dict,
+    replicaciones: int = 10,
+    semilla: Optional[int] = None,
+    nivel_confianza: float = 0.95,
+    procesos: Optional[int] = None,
+    almacen: Optional[AlmacenResultados] = None
+):
+    """Generador: corre el producto cartesiano de la grilla ({parámetro: valores}) x replicaciones
+    en un pool de procesos y entrega la fila resumen de cada punto apenas terminan todas sus replicaciones.
+    Todos los puntos usan las mismas semillas (números aleatorios comunes entre puntos).
+    Con almacén, los puntos ya guardados salen primero sin simular y solo se corren las replicaciones nuevas"""
+    nombres = list(grilla)
+    puntos = [dict(zip(nombres, valores)) for valores in product(*(grilla[n] for n in nombres))]
+    semillas = generar_semillas(replicaciones, semilla)
+    tareas = [(i, k, {**parametros_base, **punto}, s)
+              for i, punto in enumerate(puntos) for k, s in enumerate(semillas)]
+    
+    # Cada resultado va en la posición de su semilla: el resumen suma siempre en el mismo orden,
+    # sin importar el orden en que terminen las tareas ni cuáles salgan del almacén
+    resultados = [[None] * replicaciones for _ in puntos]
+    completas = [0] * len(puntos)
+    if almacen is not None:
+        guardados = almacen.buscar_metricas([(parametros, s) for _, _, parametros, s in tareas])
+        for (i, k, _, _), valor in zip(tareas, guardados):
+            if valor is not None:
+                resultados[i][k] = _metricas_replicacion(valor)
+                completas[i] += 1
+        tareas = [tarea for tarea, valor in zip(tareas, guardados) if valor is None]
+        for i, punto in enumerate(puntos):
+            if completas[i] == replicaciones:
+                yield _resumir_punto(punto, resultados[i], nivel_confianza)
+    funcion = _correr_replicacion if almacen is None else _correr_indicadores
+    por_guardar = []  # ((parametros, semilla), métricas) simuladas y todavía no guardadas
+
+    def registrar(i: int, k: int, parametros: dict, s: int, valor) -> bool:
+        """Guarda el resultado en su punto y semilla. True si con él el punto quedó completo"""
+        if almacen is not None:
+            por_guardar.append(((parametros, s), valor))
+            valor = _metricas_replicacion(valor)
+        resultados[i][k] = valor
+        completas[i] += 1
+        return completas[i] == replicaciones
+
+    def guardar():
+        if por_guardar:
+            almacen.guardar_metricas(*zip(*por_guardar))
+            por_guardar.clear()
+
+    procesos = min(procesos or os.cpu_count() or 1, len(tareas))
+    try:
+        if procesos <= 1:
+            for i, k, parametros, s in tareas:
+                if registrar(i, k, parametros, s, funcion((parametros, s))):
+                    guardar()
+                    yield _resumir_punto(puntos[i], resultados[i], nivel_confianza)
+            return
+
+        with _pool_procesos(procesos) as pool:
+            futuros = {pool.submit(funcion, (parametros, s)): (i, k, parametros, s) for i, k, parametros, s in tareas}
+            try:
+                for futuro in as_completed(futuros):
+                    i, k, parametros, s = futuros[futuro]
+                    if registrar(i, k, parametros, s, futuro.result()):
+                        guardar()
+                        yield _resumir_punto(puntos[i], resultados[i], nivel_confianza)
+            finally:
+                # Si el consumidor corta el generador, no se lanzan las tareas pendientes
+                for futuro in futuros:
+                    futuro.cancel()
+    finally:
+        # Las replicaciones ya corridas de puntos incompletos también quedan guardadas
+        guardar()
+
+def correr_barrido(parametros_base: dict, grilla: dict, **opciones) -> pd.DataFrame:
+    """Barrido completo como DataFrame, ordenado según la grilla"""
+    df = pd.DataFrame(list(barrer_parametros(parametros_base, grilla, **opciones)))
+    return df.sort_values(list(grilla)).reset_index(drop=True)
+
+# -----------------------------------------------------------
+# 9) Corrida larga en estado estacionario
+# -----------------------------------------------------------
+
+METRICAS_ESTACIONARIO = ['Tiempo_promedio_espera', 'Llamadas_perdidas_por_hora', 'Largo_promedio_colas']
+
+class ObservadorEstacionario:
+    """Acumula por intervalos fijos de tiempo el área bajo el largo de las colas, las esperas y las llamadas
+    perdidas. La memoria depende de la cantidad de intervalos, no del largo de la corrida"""
+    __slots__ = ('horizonte', 'ancho', 'intervalos', 'area_colas', 'suma_esperas', 'cantidad_esperas',
+                 'perdidas', '_reloj', '_largo', '_espera', '_esperaron', '_perdidas')
+
+    def __init__(self, horizonte: float, intervalos: int = 1000):
+        self.horizonte = horizonte
+        self.ancho = horizonte / intervalos
+        self.intervalos = intervalos
+        self.area_colas = [0.0] * intervalos
+        self.suma_esperas = [0.0] * intervalos
+        self.cantidad_esperas = [0] * intervalos
+        self.perdidas = [0] * intervalos
+        self._reloj = 0.0
+        self._largo = 0
+        self._espera = 0.0
+        self._esperaron = 0
+        self._perdidas = 0
+
+    def __call__(self, reloj: float, largo_colas: int, espera_acumulada: float, personas_esperaron: int, perdidas: int):
+        reloj = min(reloj, self.horizonte)
+        ultimo = self.intervalos - 1
+        # El largo anterior se mantuvo constante hasta este evento: se reparte entre los intervalos que abarca
+        i = int(self._reloj / self.ancho)
+        while reloj > self._reloj:
+            fin = min((i + 1) * self.ancho, reloj)
+            self.area_colas[min(i, ultimo)] += self._largo * (fin - self._reloj)
+            self._reloj = fin
+            i += 1
+        self._largo = largo_colas
+
+        j = min(int(reloj / self.ancho), ultimo)
+        if personas_esperaron != self._esperaron:
+            self.suma_esperas[j] += espera_acumulada - self._espera
+            self.cantidad_esperas[j] += personas_esperaron - self._esperaron
+            self._espera = espera_acumulada
+            self._esperaron = personas_esperaron
+        if perdidas != self._perdidas:
+            self.perdidas[j] += perdidas - self._perdidas
+            self._perdidas = perdidas
+
+def detectar_calentamiento(serie, ventana: Optional[int] = None) -> tuple[int, np.ndarray]:
+    """Estilo Welch: suaviza la serie con una media móvil y toma como fin del calentamiento el primer
+    punto desde el cual la curva ya no sale de la banda que recorre en la segunda mitad de la corrida.
+    Devuelve (intervalos a descartar, media móvil). El descarte se limita a la primera mitad"""
+    serie = np.asarray(serie, dtype=float)
+    n = len(serie)
+    ventana = ventana or max(1, n // 50)
+    acumulada = np.concatenate(([0.0], np.cumsum(serie)))
+    # Media móvil centrada; en los bordes la ventana se acorta
+    desde = np.maximum(np.arange(n) - ventana, 0)
+    hasta = np.minimum(np.arange(n) + ventana + 1, n)
+    media_movil = (acumulada[hasta] - acumulada[desde]) / (hasta - desde)
+
+    mitad = n // 2
+    referencia = media_movil[mitad:]
+    fuera = (media_movil[:mitad] < referencia.min()) | (media_movil[:mitad] > referencia.max())
+    indices = np.flatnonzero(fuera)
+    return (int(indices[-1]) + 1 if len(indices) else 0), media_movil
+
+def _autocorrelacion(valores) -> float:
+    """Autocorrelación de orden 1: cerca de 0 indica lotes aproximadamente independientes"""
+    valores = np.asarray(valores, dtype=float)
+    desvios = valores - valores.mean()
+    denominador = float(desvios @ desvios)
+    return float(desvios[1:] @ desvios[:-1]) / denominador if denominador > 0 else float('nan')
+
+def correr_estado_estacionario(
+    parametros: dict,
+    tiempo_simulacion: float = 1_000_000.0,
+    lotes: int = 20,
+    intervalos: int = 1000,
+    nivel_confianza: float = 0.95,
+    semilla: Optional[int] = None,
+    al_avanzar=None
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, dict]:
+    """Una sola corrida larga sin vector de estado. Se descarta el calentamiento detectado sobre el largo
+    de las colas y el resto se divide en lotes de igual duración (medias por lotes).
+    al_avanzar(reloj) se llama cada ~1% del horizonte. Sin semilla se usa la de parametros, si la trae.
+    Devuelve (serie por intervalo, medias por lote, resumen con intervalos de confianza, informe)"""
+    inicio = time.perf_counter()
+    parametros = {**parametros, 'tiempo_simulacion': tiempo_simulacion}
+    semilla_parametros = parametros.pop('semilla', None)
+    if semilla is None:
+        semilla = semilla_parametros
+    observador = ObservadorEstacionario(tiempo_simulacion, intervalos)
+    motor = motor_centro_salud(semilla=semilla, observador=observador, **parametros)
+
+    eventos = 0
+    siguiente = motor.__next__
+    paso_aviso = tiempo_simulacion / 100
+    proximo_aviso = paso_aviso
+    try:
+        while True:
+            reloj = siguiente()[0]
+            eventos += 1
+            if al_avanzar is not None and reloj >= proximo_aviso:
+                al_avanzar(reloj)
+                proximo_aviso = reloj + paso_aviso
+    except StopIteration:
+        pass
+
+    ancho = observador.ancho
+    df_serie = pd.DataFrame({
+        'Desde': np.arange(intervalos) * ancho,
+        'Largo_promedio_colas': np.asarray(observador.area_colas) / ancho,
+        'Suma_esperas': observador.suma_esperas,
+        'Cantidad_esperas': observador.cantidad_esperas,
+        'Llamadas_perdidas': observador.perdidas,
+    })
+    df_serie.index.name = 'Intervalo'
+    descarte, media_movil = detectar_calentamiento(df_serie['Largo_promedio_colas'])
+    df_serie['Media_movil'] = media_movil
+
+    # Lotes de igual cantidad de intervalos; el resto se descarta junto con el calentamiento
+    por_lote = (intervalos - descarte) // lotes
+    if por_lote == 0:
+        raise ValueError(f"Quedan {intervalos - descarte} intervalos tras el calentamiento: no alcanzan para {lotes} lotes")
+    descarte = intervalos - por_lote * lotes
+    agrupado = df_serie.iloc[descarte:].groupby(np.arange(por_lote * lotes) // por_lote)
+    sumas = agrupado[['Suma_esperas', 'Cantidad_esperas', 'Llamadas_perdidas']].sum()
+
+    df_lotes = pd.DataFrame({
+        'Desde': agrupado['Desde'].first(),
+        'Tiempo_promedio_espera': sumas['Suma_esperas'] / sumas['Cantidad_esperas'].replace(0, np.nan),
+        'Llamadas_perdidas_por_hora': sumas['Llamadas_perdidas'] / (por_lote * ancho) * 60,
+        'Largo_promedio_colas': agrupado['Largo_promedio_colas'].mean(),
+    })
+    df_lotes.index = pd.RangeIndex(1, lotes + 1, name='Lote')
+
+    df_resumen = pd.DataFrame(
+        {metrica: intervalo_confianza(df_lotes[metrica].dropna(), nivel_confianza) for metrica in METRICAS_ESTACIONARIO}
+    ).T
+    df_resumen['Autocorrelacion_lotes'] = [_autocorrelacion(df_lotes[metrica].dropna()) for metrica in METRICAS_ESTACIONARIO]
+
+    informe = {
+        'Tiempo_simulado': tiempo_simulacion,
+        'Calentamiento_min': descarte * ancho,
+        'Intervalos_descartados': descarte,
+        'Lotes': lotes,
+        'Duracion_lote_min': por_lote * ancho,
+        'Eventos': eventos,
+        'Segundos': time.perf_counter() - inicio,
+        # Si el descarte llega a la mitad, la cola probablemente no se estabiliza (sistema saturado)
+        'Calentamiento_truncado': descarte >= intervalos // 2,
+    }
+    return df_serie, df_lotes, df_resumen, informe
+
+# -----------------------------------------------------------
+# 10) Exportación por lotes a disco y lectura perezosa
+# -----------------------------------------------------------
+
+# parquet necesita pyarrow y xlsx necesita openpyxl; csv no tiene dependencias
+FORMATOS_EXPORTACION = ['parquet', 'csv', 'xlsx']
+TABLAS_EXPORTACION = {
+    'vector': ['Fila'] + [nombre for nombre, _ in COLUMNAS_VECTOR],
+    'pacientes': ['Fila', 'Paciente', 'Columna', 'Estado', 'Hora_inicio_espera'],
+}
+LIMITE_FILAS_EXCEL = 1_048_575  # Filas de datos por hoja (la primera es el encabezado)
+
+def _importar_opcional(modulo: str, formato: str):
+    try:
+        return __import__(modulo, fromlist=['_'])
+    except ImportError as error:
+        raise ImportError(f"El formato {formato} requiere {modulo.split('.')[0]} (pip install {modulo.split('.')[0]})") from error
+
+def _restaurar_tipos(df_vector: pd.DataFrame, df_pacientes: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Devuelve a un lote leído de disco los tipos de RegistroVectorEstado (categorías, float64, int64)"""
+    df_vector = df_vector.set_index('Fila')
+    df_vector.index = df_vector.index.astype(np.int64)
+    for nombre, tipo in COLUMNAS_VECTOR:
+        if isinstance(tipo, list):
+            df_vector[nombre] = pd.Categorical(df_vector[nombre].astype(object), categories=tipo)
+        else:
+            df_vector[nombre] = df_vector[nombre].astype(np.float64 if tipo == 'f' else np.int64)
+    df_pacientes = df_pacientes.astype({'Fila': np.int64, 'Columna': np.int64, 'Hora_inicio_espera': np.float64})
+    df_pacientes['Paciente'] = df_pacientes['Paciente'].astype(str).astype('category')
+    df_pacientes['Estado'] = pd.Categorical(df_pacientes['Estado'].astype(object), categories=ESTADOS_PACIENTE)
+    return df_vector, df_pacientes.reset_index(drop=True)
+
+class _EscritorParquet:
+    """Un row group por lote: el lector toma solo los grupos de la página pedida"""
+
+    def __init__(self, carpeta: str):
+        self._pa = _importar_opcional('pyarrow', 'parquet')
+        self._pq = _importar_opcional('pyarrow.parquet', 'parquet')
+        self._carpeta = carpeta
+        self._escritores = {}
+        self._grupos = dict.fromkeys(TABLAS_EXPORTACION, 0)
+
+    def escribir(self, tablas: dict) -> dict:
+        ubicacion = {}
+        for tabla, df in tablas.items():
+            if not len(df):
+                ubicacion[tabla] = None
+                continue
+            if tabla == 'pacientes':
+                # Las categorías de pacientes cambian entre lotes: se guardan como texto
+                df = df.astype({'Paciente': str})
+            datos = self._pa.Table.from_pandas(df, preserve_index=False)
+            if tabla not in self._escritores:
+                self._escritores[tabla] = self._pq.ParquetWriter(
+                    os.path.join(self._carpeta, f'{tabla}.parquet'), datos.schema, compression='zstd'
+                )
+            escritor = self._escritores[tabla]
+            escritor.write_table(datos.cast(escritor.schema), row_group_size=len(datos))
+            ubicacion[tabla] = self._grupos[tabla]
+            self._grupos[tabla] += 1
+        return ubicacion
+
+    def cerrar(self):
+        for escritor in self._escritores.values():
+            escritor.close()
+
+class _EscritorCSV:
+    """Un archivo por tabla; se anota el desplazamiento en bytes de cada lote para leerlo sin recorrer el resto"""
+
+    def __init__(self, carpeta: str):
+        self._archivos = {}
+        for tabla, columnas in TABLAS_EXPORTACION.items():
+            archivo = open(os.path.join(carpeta, f'{tabla}.csv'), 'wb')
+            archivo.write((','.join(columnas) + '\n').encode('utf-8'))
+            self._archivos[tabla] = archivo
+
+    def escribir(self, tablas: dict) -> dict:
+        ubicacion = {}
+        for tabla, df in tablas.items():
+            archivo = self._archivos[tabla]
+            contenido = df.to_csv(header=False, index=False, lineterminator='\n').encode('utf-8')
+            ubicacion[tabla] = [archivo.tell(), len(contenido)]
+            archivo.write(contenido)
+        return ubicacion
+
+    def cerrar(self):
+        for archivo in self._archivos.values():
+            archivo.close()
+
+class _EscritorExcel:
+    """Libro en modo solo escritura: una hoja por tabla, con hojas de continuación al llegar al límite de filas"""
+
+    def __init__(self, carpeta: str):
+        openpyxl = _importar_opcional('openpyxl', 'xlsx')
+        self._ruta = os.path.join(carpeta, 'corrida.xlsx')
+        self._libro = openpyxl.Workbook(write_only=True)
+        self._hojas = {}  # tabla -> [hoja, nombre, número de hoja, filas escritas]
+        for tabla in TABLAS_EXPORTACION:
+            self._nueva_hoja(tabla, 1)
+
+    def _nueva_hoja(self, tabla: str, numero: int):
+        nombre = tabla if numero == 1 else f'{tabla}_{numero}'
+        hoja = self._libro.create_sheet(nombre)
+        hoja.append(TABLAS_EXPORTACION[tabla])
+        self._hojas[tabla] = [hoja, nombre, numero, 0]
+
+    def escribir(self, tablas: dict) -> dict:
+        ubicacion = {}
+        for tabla, df in tablas.items():
+            if self._hojas[tabla][3] + len(df) > LIMITE_FILAS_EXCEL:
+                self._nueva_hoja(tabla, self._hojas[tabla][2] + 1)
+            hoja, nombre, _, escritas = self._hojas[tabla]
+            ubicacion[tabla] = [nombre, escritas + 2]  # Fila de Excel del primer dato del lote
+            for fila in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+                hoja.append(fila)
+            self._hojas[tabla][3] += len(df)
+        return ubicacion
+
+    def cerrar(self):
+        self._libro.save(self._ruta)
+
+ESCRITORES = {'parquet': _EscritorParquet, 'csv': _EscritorCSV, 'xlsx': _EscritorExcel}
+DEPENDENCIAS_EXPORTACION = {'parquet': ['pyarrow', 'pyarrow.parquet'], 'csv': [], 'xlsx': ['openpyxl']}
+
+def _valor_json(valor):
+    """Lleva un valor a tipos que acepta json: conjuntos a listas ordenadas y escalares de numpy a los de Python"""
+    if isinstance(valor, dict):
+        return {clave: _valor_json(v) for clave, v in valor.items()}
+    if isinstance(valor, (set, frozenset)):
+        return sorted(_valor_json(v) for v in valor)
+    if isinstance(valor, (list, tuple)):
+        return [_valor_json(v) for v in valor]
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+def exportar_centro_salud(carpeta: str, formato: str = 'csv', tamano_lote: int = 10_000, al_avanzar=None, **parametros) -> dict:
+    """Corre la simulación y va escribiendo el vector de estado y el registro de pacientes en carpeta,
+    de a lotes de tamano_lote filas: la memoria no depende del largo de la corrida.
+    parametros: los de motor_centro_salud. al_avanzar(avance) se llama después de cada lote.
+    Devuelve los metadatos guardados en carpeta/metadatos.json"""
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato desconocido: {formato} (opciones: {', '.join(FORMATOS_EXPORTACION)})")
+    # Se comprueba antes de simular: un error al final dejaría los lotes en disco sin metadatos,
+    # y una dependencia faltante, una carpeta vacía
+    parametros_json = _valor_json(parametros)
+    json.dumps(parametros_json)
+    for modulo in DEPENDENCIAS_EXPORTACION[formato]:
+        _importar_opcional(modulo, formato)
+    os.makedirs(carpeta, exist_ok=True)
+    escritor = ESCRITORES[formato](carpeta)
+    lotes = []
+    try:
+        for df_vector, df_pacientes, avance in iterar_centro_salud(tamano_lote=tamano_lote, **parametros):
+            if len(df_vector):
+                ubicacion = escritor.escribir({'vector': df_vector.reset_index(), 'pacientes': df_pacientes})
+                lotes.append({
+                    'filas': len(df_vector),
+                    'filas_pacientes': len(df_pacientes),
+                    'desde_fila': int(df_vector.index[0]), 'hasta_fila': int(df_vector.index[-1]),
+                    'desde_reloj': float(df_vector['Reloj'].iloc[0]), 'hasta_reloj': float(df_vector['Reloj'].iloc[-1]),
+                    **ubicacion,
+                })
+            if al_avanzar is not None:
+                al_avanzar(avance)
+    finally:
+        escritor.cerrar()
+
+    _, tiempo_promedio_espera, llamadas_perdidas, indicadores = avance
+    metadatos = _valor_json({
+        'formato': formato,
+        'parametros': parametros_json,
+        'tiempo_promedio_espera': tiempo_promedio_espera,
+        'llamadas_perdidas': llamadas_perdidas,
+        'indicadores': indicadores,
+        'lotes': lotes,
+    })
+    # Archivo temporal y rename: CorridaGuardada nunca ve un metadatos.json a medio escribir
+    ruta = os.path.join(carpeta, 'metadatos.json')
+    with open(ruta + '.tmp', 'w', encoding='utf-8') as archivo:
+        json.dump(metadatos, archivo, indent=1)
+    os.replace(ruta + '.tmp', ruta)
+    return metadatos
+
+class CorridaGuardada:
+    """Corrida exportada con exportar_centro_salud, abierta en forma perezosa:
+    solo se leen de disco los lotes que tocan la página pedida (y se recuerdan los últimos)"""
+
+    def __init__(self, carpeta: str, lotes_en_memoria: int = 4):
+        with open(os.path.join(carpeta, 'metadatos.json'), encoding='utf-8') as archivo:
+            self.metadatos = json.load(archivo)
+        self.carpeta = carpeta
+        self.formato = self.metadatos['formato']
+        self._lotes = self.metadatos['lotes']
+        self._inicios = np.cumsum([0] + [lote['filas'] for lote in self._lotes])  # Posición de la primera fila de cada lote
+        self._hasta_fila = np.array([lote['hasta_fila'] for lote in self._lotes])
+        self._hasta_reloj = np.array([lote['hasta_reloj'] for lote in self._lotes])
+        self._leidos = OrderedDict()
+        self._lotes_en_memoria = lotes_en_memoria
+        self._libro = None
+
+    @property
+    def total(self) -> int:
+        return int(self._inicios[-1])
+
+    def _leer_parquet(self, tabla: str, lote: dict) -> pd.DataFrame:
+        pq = _importar_opcional('pyarrow.parquet', 'parquet')
+        if lote[tabla] is None:
+            return pd.DataFrame(columns=TABLAS_EXPORTACION[tabla])
+        archivo = pq.ParquetFile(os.path.join(self.carpeta, f'{tabla}.parquet'), memory_map=True)
+        return archivo.read_row_group(lote[tabla]).to_pandas()
+
+    def _leer_csv(self, tabla: str, lote: dict) -> pd.DataFrame:
+        desde, largo = lote[tabla]
+        with open(os.path.join(self.carpeta, f'{tabla}.csv'), 'rb') as archivo:
+            archivo.seek(desde)
+            contenido = archivo.read(largo)
+        if not contenido:
+            return pd.DataFrame(columns=TABLAS_EXPORTACION[tabla])
+        return pd.read_csv(io.BytesIO(contenido), header=None, names=TABLAS_EXPORTACION[tabla], float_precision='round_trip')
+
+    def _leer_xlsx(self, tabla: str, lote: dict) -> pd.DataFrame:
+        if self._libro is None:
+            openpyxl = _importar_opcional('openpyxl', 'xlsx')
+            self._libro = openpyxl.load_workbook(os.path.join(self.carpeta, 'corrida.xlsx'), read_only=True)
+        hoja, desde = lote[tabla]
+        cantidad = lote['filas'] if tabla == 'vector' else lote['filas_pacientes']
+        filas = self._libro[hoja].iter_rows(min_row=desde, max_row=desde + cantidad - 1, values_only=True) if cantidad else []
+        return pd.DataFrame(list(filas), columns=TABLAS_EXPORTACION[tabla]).fillna(np.nan)
+
+    def leer_lote(self, i: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """(vector, registro de pacientes) del lote i, con los mismos tipos que simular_centro_salud"""
+        if i in self._leidos:
+            self._leidos.move_to_end(i)
+            return self._leidos[i]
+        leer = getattr(self, f'_leer_{self.formato}')
+        lote = self._lotes[i]
+        resultado = _restaurar_tipos(leer('vector', lote), leer('pacientes', lote))
+        self._leidos[i] = resultado
+        if len(self._leidos) > self._lotes_en_memoria:
+            self._leidos.popitem(last=False)
+        return resultado
+
+    def leer(self, inicio: int, cantidad: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Filas [inicio, inicio + cantidad) del vector y las entradas de pacientes de esas filas"""
+        primero = int(np.searchsorted(self._inicios, inicio, side='right')) - 1
+        ultimo = int(np.searchsorted(self._inicios, inicio + cantidad, side='left'))
+        partes = [self.leer_lote(i) for i in range(max(primero, 0), min(ultimo, len(self._lotes)))]
+        if not partes:
+            return _restaurar_tipos(pd.DataFrame(columns=TABLAS_EXPORTACION['vector']),
+                                    pd.DataFrame(columns=TABLAS_EXPORTACION['pacientes']))
+        desde = inicio - int(self._inicios[max(primero, 0)])
+        df_vector = pd.concat([vector for vector, _ in partes]).iloc[desde:desde + cantidad]
+        df_pacientes = pd.concat([pacientes for _, pacientes in partes], ignore_index=True)
+        df_pacientes = df_pacientes[df_pacientes['Fila'].isin(df_vector.index)].reset_index(drop=True)
+        df_pacientes['Paciente'] = df_pacientes['Paciente'].astype(str).astype('category')
+        return df_vector, df_pacientes
+
+    def _posicion(self, limites: np.ndarray, valor, columna) -> int:
+        i = int(np.searchsorted(limites, valor, side='left'))
+        if i == len(self._lotes):
+            return self.total
+        df_vector, _ = self.leer_lote(i)
+        valores = df_vector.index if columna is None else df_vector[columna]
+        return int(self._inicios[i]) + int(valores.searchsorted(valor, side='left'))
+
+    def posicion_evento(self, numero_evento: int) -> int:
+        """Posición de la primera fila guardada con número de evento >= numero_evento"""
+        return self._posicion(self._hasta_fila, numero_evento, None)
+
+    def posicion_minuto(self, minuto: float) -> int:
+        """Posición de la primera fila guardada con reloj >= minuto"""
+        return self._posicion(self._hasta_reloj, minuto, 'Reloj')
+
+# -----------------------------------------------------------
+# Formato de presentación (solo al mostrar)
+# -----------------------------------------------------------
+
+def formatear_numero(num):
+    if num is None or num != num or num == float('inf') or num == float('-inf'):
+        return ""
+    if isinstance(num, (int, float)):
+        return f"{num:.4f}" if num != int(num) else f"{int(num)}"
+    return str(num)
+
+def formatear_vector_estado(df: pd.DataFrame) -> pd.DataFrame:
+    """Convierte el vector tipado a texto con 4 decimales; NaN y categorías vacías se muestran en blanco"""
+    columnas = {}
+    for nombre in df.columns:
+        serie = df[nombre]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            columnas[nombre] = serie.astype(object).where(serie.notna(), "")
+        elif pd.api.types.is_float_dtype(serie.dtype):
+            columnas[nombre] = serie.map(formatear_numero)
+        else:
+            columnas[nombre] = serie
+    return pd.DataFrame(columnas, index=df.index)
+
+def armar_vector_mostrado(df_resultado: pd.DataFrame, df_pacientes: pd.DataFrame, filas=None) -> pd.DataFrame:
+    """Vector de estado con formato y multi-índice de tres niveles, tal como se muestra en la interfaz"""
+    # Crear DataFrame con multi-índice completo (columnas de pacientes y formato de 4 decimales recién acá)
+    df_multi = formatear_vector_estado(vector_estado_ancho(df_resultado, df_pacientes, filas))
+    numeros_pacientes = [
+        int(col.split('_')[1]) for col in df_multi.columns
+        if col.startswith('Paciente_') and col.endswith('_Estado')
+    ]
+
+    # Crear las columnas con multi-índice
+    nuevas_columnas = []
+
+    # Columnas básicas (nivel 1 solo)
+    nuevas_columnas.extend([
+        ('','', 'Evento'),
+        ('','', 'Reloj')
+    ])
+
+    # Llegada paciente
+    nuevas_columnas.extend([
+        ('', 'llegada_paciente', 'RND llegada paciente'),
+        ('', 'llegada_paciente', 'Tiempo entre llegadas'),
+        ('', 'llegada_paciente', 'Proxima llegada')
+    ])
+
+    # Obra social
+    nuevas_columnas.extend([
+        ('Obra Social','', 'RND obra social'),
+        ('Obra Social','', 'Obra Social'),
+        ('','', 'fin_informe_obra_social')
+    ])
+
+    # Atención
+    nuevas_columnas.extend([
+        ('', 'fin_atencion', 'RND tiempo atencion'),
+        ('','fin_atencion', 'Tiempo de atencion'),
+        ('','fin_atencion', 'fin de atencion')
+    ])
+
+    # Cooperadora
+    nuevas_columnas.extend([
+        ('','fin_abono_consulta', 'RND abono consulta'),
+        ('','fin_abono_consulta', 'Tiempo de abono de consulta'),
+        ('','fin_abono_consulta', 'fin abono consulta')
+    ])
+
+    # Llamadas
+    nuevas_columnas.extend([
+        ('','', 'Proxima llegada llamada'),
+        ('','fin_llamada', 'RND llamada'),
+        ('','fin_llamada', 'Tiempo de llamada'),
+        ('','fin_llamada', 'fin llamada')
+    ])
+
+    # Objetos permanentes
+    nuevas_columnas.extend([
+        ('', 'Empleado mesa de turno', 'Estado'),
+        ('', 'Empleado mesa de turno', 'Cola Pacientes'),
+        ('', 'Empleado mesa de turno', 'Cola Llamadas'),
+        ('', 'Empleado cooperadora', 'Estado'),
+        ('', 'Empleado cooperadora', 'Cola')
+    ])
+
+    # Estadísticas
+    nuevas_columnas.extend([
+        ('', 'Estadística A)', 'Cantidad de llamadas perdidas por tener la línea ocupada'),
+        ('', 'Estadística B)', 'Acum tiempo de espera'),
+        ('', 'Estadística B)', 'Cantidad de personas que esperan')
+    ])
+
+    # Objetos temporales DINÁMICOS - Solo los pacientes presentes en las filas mostradas
+    for i in numeros_pacientes:
+        etiqueta = f"Paciente {i}"
+        nuevas_columnas.extend([
+            ('', etiqueta, 'Estado'),
+            ('', etiqueta, 'Hora inicio espera')
+        ])
+
+    # Crear mapeo de columnas originales a nuevas
+    columnas_originales = [
+        'Evento', 'Reloj',
+        'RND_llegada_paciente', 'Tiempo_entre_llegadas', 'Proxima_llegada',
+        'RND_obra_social', 'Obra_Social', 'fin_informe_obra_social',
+        'RND_tiempo_atencion', 'Tiempo_de_atencion', 'fin_atencion',
+        'RND_abono_consulta', 'Tiempo_de_abono_de_consulta', 'fin_abono_consulta',
+        'Proxima_llegada_llamada', 'RND_llamada', 'Tiempo_de_llamada', 'fin_llamada',
+        'Empleado_mesa_estado', 'Empleado_mesa_cola_pacientes', 'Empleado_mesa_cola_llamadas',
+        'Empleado_cooperadora_estado', 'Empleado_cooperadora_cola',
+        'Cantidad_de_llamadas_perdidas_por_tener_la_linea_ocupada',
+        'Acum_tiempo_de_espera', 'Cantidad_de_personas_que_esperan'
+    ]
+
+    # Agregar columnas de pacientes temporales dinámicamente
+    for i in numeros_pacientes:
+        columnas_originales.extend([
+            f'Paciente_{i}_Estado',
+            f'Paciente_{i}_Hora_inicio_espera'
+        ])
+
+    # Filtrar solo las columnas que existen
+    columnas_existentes = [col for col in columnas_originales if col in df_multi.columns]
+    nuevas_columnas_filtradas = nuevas_columnas[:len(columnas_existentes)]
+
+    # Crear DataFrame con multi-índice
+    df_reordenado = df_multi[columnas_existentes].copy()
+
+    # Crear el multi-índice
+    multi_index = pd.MultiIndex.from_tuples(nuevas_columnas_filtradas)
+    df_reordenado.columns = multi_index
+    
+    return df_reordenado
+
+# -----------------------------------------------------------
+# 11) Almacén persistente de resultados
+# -----------------------------------------------------------
+
+# Subirla cuando un cambio del motor altere los resultados: lo guardado con otra versión deja de encontrarse
+VERSION_MOTOR = 3
+OPCIONES_CAPTURA = ['desde_evento', 'desde_tiempo', 'max_filas', 'filtro_eventos', 'ultimas_filas']
+CLAVES_POR_CONSULTA = 500  # Límite de variables por sentencia de SQLite
+FRACCION_TRAS_DESCARTE = 0.9  # Al superar max_bytes se descarta hasta quedar en esta fracción
+
+_DEFECTOS_MOTOR = {nombre: parametro.default for nombre, parametro in inspect.signature(motor_centro_salud).parameters.items()}
+_DEFECTOS_CAPTURA = {'desde_evento': 0, 'desde_tiempo': 0.0, 'max_filas': None, 'filtro_eventos': None, 'ultimas_filas': None}
+
+def clave_resultado(parametros: dict, semilla: Optional[int], tipo: str = 'metricas') -> Optional[str]:
+    """Hash del conjunto completo de parámetros (los ausentes con su valor por defecto, 3 y 3.0 iguales),
+    la semilla, el tipo de resultado ('metricas' o 'vector', que suma la ventana de captura) y VERSION_MOTOR.
+    None si la corrida no se puede guardar: sin semilla o con opciones que no son del modelo"""
+    modelo = [nombre for nombre in PARAMETROS_MODELO if nombre != 'semilla'] + ['tiempo_simulacion']
+    admitidos = set(modelo) | (set(OPCIONES_CAPTURA) if tipo == 'vector' else set())
+    if semilla is None or not set(parametros) <= admitidos:
+        return None
+    completo = {}
+    for nombre in modelo:
+        defecto = _DEFECTOS_MOTOR[nombre]
+        completo[nombre] = (int if isinstance(defecto, int) else float)(parametros.get(nombre, defecto))
+    if tipo == 'vector':
+        for nombre, defecto in _DEFECTOS_CAPTURA.items():
+            valor = parametros.get(nombre, defecto)
+            if valor is not None:
+                valor = sorted(set(valor)) if nombre == 'filtro_eventos' else (float if nombre == 'desde_tiempo' else int)(valor)
+            completo[nombre] = valor
+    contenido = json.dumps([VERSION_MOTOR, tipo, int(semilla), completo], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+class AlmacenResultados:
+    """Resultados de corridas en un archivo SQLite, direccionados por clave_resultado: las métricas de cada
+    replicación y, si se piden, vectores de estado comprimidos. Cuando el archivo supera max_bytes se
+    descartan los resultados usados hace más tiempo. Varios procesos pueden compartir el archivo (modo WAL);
+    cada hilo y cada proceso abre su propia conexión, así la instancia se puede pasar a otros procesos"""
+
+    def __init__(self, ruta: str, max_bytes: int = 512 * 2**20):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        carpeta = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(carpeta, exist_ok=True)
+        self._conexion()
+
+    def __getstate__(self):
+        return {'ruta': self.ruta, 'max_bytes': self.max_bytes}
+
+    def __setstate__(self, estado: dict):
+        self.__init__(**estado)
+
+    def _conexion(self) -> sqlite3.Connection:
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is not None and self._local.pid == os.getpid():
+            return conexion
+        # Sin transacciones implícitas: las escrituras abren BEGIN IMMEDIATE y esperan su turno (timeout)
+        conexion = sqlite3.connect(self.ruta, timeout=60, isolation_level=None)
+        conexion.execute('PRAGMA journal_mode=WAL')
+        conexion.execute('PRAGMA synchronous=NORMAL')
+        # executescript confirma antes cualquier transacción abierta: la del esquema va dentro del script
+        conexion.executescript('''
+            BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS resultados (
+                clave TEXT PRIMARY KEY, metricas TEXT NOT NULL, vector BLOB, bytes INTEGER NOT NULL, uso REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS resultados_uso ON resultados (uso);
+            CREATE TABLE IF NOT EXISTS total (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+            INSERT OR IGNORE INTO total VALUES (0, 0);
+            CREATE TRIGGER IF NOT EXISTS sumar_bytes AFTER INSERT ON resultados
+                BEGIN UPDATE total SET bytes = bytes + NEW.bytes; END;
+            CREATE TRIGGER IF NOT EXISTS restar_bytes AFTER DELETE ON resultados
+                BEGIN UPDATE total SET bytes = bytes - OLD.bytes; END;
+            COMMIT;
+        ''')
+        self._local.conexion, self._local.pid = conexion, os.getpid()
+        return conexion
+
+    @staticmethod
+    @contextmanager
+    def _transaccion(conexion: sqlite3.Connection):
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            conexion.execute('ROLLBACK')
+            raise
+        conexion.execute('COMMIT')
+
+    def _buscar(self, claves: list, con_vector: bool) -> dict:
+        """{clave: (métricas, vector)} de las claves guardadas; marca su uso para el descarte"""
+        conexion = self._conexion()
+        buscadas = sorted({clave for clave in claves if clave is not None})
+        encontrados = {}
+        with self._transaccion(conexion):
+            for inicio in range(0, len(buscadas), CLAVES_POR_CONSULTA):
+                lote = buscadas[inicio:inicio + CLAVES_POR_CONSULTA]
+                marcas = ','.join('?' * len(lote))
+                columnas = 'clave, metricas, vector' if con_vector else 'clave, metricas, NULL'
+                for clave, metricas, vector in conexion.execute(
+                        f'SELECT {columnas} FROM resultados WHERE clave IN ({marcas})', lote):
+                    encontrados[clave] = (metricas, vector)
+                conexion.execute(f'UPDATE resultados SET uso = ? WHERE clave IN ({marcas})', [time.time(), *lote])
+        return encontrados
+
+    def _guardar(self, filas: list):
+        """Guarda filas (clave, métricas en JSON, vector comprimido o None) y descarta si se supera max_bytes"""
+        filas = [fila for fila in filas if fila[0] is not None]
+        if not filas:
+            return
+        ahora = time.time()
+        conexion = self._conexion()
+        with self._transaccion(conexion):
+            # La clave depende solo del contenido: si otro proceso ya la guardó, es el mismo resultado
+            conexion.executemany(
+                'INSERT OR IGNORE INTO resultados VALUES (?, ?, ?, ?, ?)',
+                [(clave, metricas, vector, len(clave) + len(metricas) + len(vector or b''), ahora)
+                 for clave, metricas, vector in filas]
+            )
+            total = conexion.execute('SELECT bytes FROM total').fetchone()[0]
+            if total > self.max_bytes:
+                exceso = total - int(self.max_bytes * FRACCION_TRAS_DESCARTE)
+                descartadas = []
+                for clave, tamano in conexion.execute('SELECT clave, bytes FROM resultados ORDER BY uso'):
+                    descartadas.append((clave,))
+                    exceso -= tamano
+                    if exceso <= 0:
+                        break
+                conexion.executemany('DELETE FROM resultados WHERE clave = ?', descartadas)
+
+    def buscar_metricas(self, tareas: list) -> list:
+        """Métricas guardadas de cada tarea (parametros, semilla), o None si no está"""
+        claves = [clave_resultado(parametros, semilla) for parametros, semilla in tareas]
+        encontrados = self._buscar(claves, con_vector=False)
+        return [json.loads(encontrados[clave][0]) if clave in encontrados else None for clave in claves]
+
+    def guardar_metricas(self, tareas: list, resultados: list):
+        """Guarda el dict de métricas de cada tarea (parametros, semilla)"""
+        self._guardar([(clave_resultado(parametros, semilla), json.dumps(metricas), None)
+                       for (parametros, semilla), metricas in zip(tareas, resultados)])
+
+    def buscar_vector(self, parametros: dict, semilla: Optional[int]) -> Optional[tuple]:
+        """(métricas, df_vector, df_pacientes) guardados para esos parámetros y ventana de captura, o None.
+        Usa pickle: compartir el archivo solo entre procesos propios"""
+        clave = clave_resultado(parametros, semilla, 'vector')
+        encontrado = self._buscar([clave], con_vector=True).get(clave)
+        if encontrado is None:
+            return None
+        metricas, vector = encontrado
+        return (json.loads(metricas), *pickle.loads(zlib.decompress(vector)))
+
+    def guardar_vector(self, parametros: dict, semilla: Optional[int], metricas: dict,
+                       df_vector: pd.DataFrame, df_pacientes: pd.DataFrame):
+        vector = zlib.compress(pickle.dumps((df_vector, df_pacientes), protocol=pickle.HIGHEST_PROTOCOL))
+        self._guardar([(clave_resultado(parametros, semilla, 'vector'), json.dumps(metricas), vector)])
+
+    def resumen(self) -> dict:
+        conexion = self._conexion()
+        entradas = conexion.execute('SELECT COUNT(*) FROM resultados').fetchone()[0]
+        total = conexion.execute('SELECT bytes FROM total').fetchone()[0]
+        return {'entradas': entradas, 'bytes': total, 'max_bytes': self.max_bytes}
+
+    def vaciar(self):
+        conexion = self._conexion()
+        with self._transaccion(conexion):
+            conexion.execute('DELETE FROM resultados')
+
+def _correr_indicadores(argumentos: tuple) -> dict:
+    """Una replicación en un proceso del pool, con todas las métricas (las que guarda el almacén)"""
+    parametros, semilla = argumentos
+    return simular_indicadores(semilla=semilla, **parametros)
+
+def _metricas_replicacion(indicadores: dict) -> tuple[float, int]:
+    return float(indicadores['Tiempo_promedio_espera']), indicadores['Llamadas_perdidas']
+
+def indicadores_replicaciones(tareas: list, almacen: Optional[AlmacenResultados] = None, mapear=map) -> list:
+    """Métricas (dict) de cada tarea (parametros, semilla). Las que están en el almacén no se simulan;
+    el resto se corre con mapear(funcion, tareas) (map en serie, o el de un pool) y se guarda"""
+    indicadores = almacen.buscar_metricas(tareas) if almacen is not None else [None] * len(tareas)
+    faltantes = [i for i, valor in enumerate(indicadores) if valor is None]
+    if faltantes:
+        nuevos = list(mapear(_correr_indicadores, [tareas[i] for i in faltantes]))
+        if almacen is not None:
+            almacen.guardar_metricas([tareas[i] for i in faltantes], nuevos)
+        for i, valor in zip(faltantes, nuevos):
+            indicadores[i] = valor
+    return indicadores
+
+def _replicar(tareas: list, almacen: Optional[AlmacenResultados], mapear) -> list:
+    """(tiempo_promedio_espera, llamadas_perdidas) de cada tarea; sin almacén, como siempre"""
+    if almacen is None:
+        return list(mapear(_correr_replicacion, tareas))
+    return [_metricas_replicacion(valor) for valor in indicadores_replicaciones(tareas, almacen, mapear)]
+
+# -----------------------------------------------------------
+# 12) Línea de comandos
+# -----------------------------------------------------------
+
+def correr_escenario(escenario: dict, replicaciones: Optional[int] = None, nivel_confianza: float = 0.95,
+                     procesos: Optional[int] = None, almacen: Optional[AlmacenResultados] = None) -> dict:
+    """Métricas de un escenario (dict con los parámetros del motor y opcionalmente 'nombre', 'replicaciones'
+    y 'nivel_confianza'). Con una sola corrida: todas las métricas e indicadores. Con replicaciones:
+    media e intervalo de confianza de cada métrica, como en el barrido. No necesita pandas"""
+    parametros = dict(escenario)
+    nombre = parametros.pop('nombre', None)
+    replicaciones = parametros.pop('replicaciones', replicaciones)
+    nivel_confianza = parametros.pop('nivel_confianza', nivel_confianza)
+    semilla = parametros.pop('semilla', None)
+    if semilla is None:
+        semilla = generar_semillas(1)[0]  # Se informa, así la corrida se puede repetir
+    
+    fila = {'Escenario': nombre, 'Semilla': semilla}
+    if not replicaciones:
+        return {**fila, **indicadores_replicaciones([(parametros, semilla)], almacen)[0]}
+    semillas = generar_semillas(replicaciones, semilla)
+    resultados = _replicar([(parametros, s) for s in semillas], almacen, partial(_mapear_en_pool, procesos=procesos))
+    return _resumir_punto(fila, resultados, nivel_confianza)
+
+def _escribir_filas(filas: list, ruta: Optional[str]):
+    """JSON por salida estándar, o archivo .json / .csv según la extensión"""
+    if ruta is None:
+        json.dump(filas, sys.stdout, indent=1, ensure_ascii=False)
+        print()
+    elif ruta.endswith('.csv'):
+        columnas = list(dict.fromkeys(columna for fila in filas for columna in fila))
+        with open(ruta, 'w', newline='', encoding='utf-8') as archivo:
+            escritor = csv.DictWriter(archivo, fieldnames=columnas)
+            escritor.writeheader()
+            escritor.writerows(filas)
+    else:
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(filas, archivo, indent=1, ensure_ascii=False)
+
+def main(argumentos: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulación del centro de salud sin interfaz")
+    # Un argumento por parámetro del modelo, con el tipo y el valor por defecto del motor
+    firma = inspect.signature(motor_centro_salud)
+    for nombre in PARAMETROS_MODELO + ['tiempo_simulacion']:
+        defecto = firma.parameters[nombre].default
+        parser.add_argument(f'--{nombre}', type=float if isinstance(defecto, float) else int, default=None,
+                            help=f"por defecto {defecto}")
+    parser.add_argument('--escenarios', help="archivo JSON con un escenario (objeto) o varios (lista); "
+                                             "los parámetros de la línea de comandos completan los que falten")
+    parser.add_argument('--replicaciones', type=int, help="replicaciones por escenario (sin esto, una sola corrida)")
+    parser.add_argument('--nivel_confianza', type=float, default=0.95)
+    parser.add_argument('--procesos', type=int, help="procesos para las replicaciones (por defecto, todos los núcleos)")
+    parser.add_argument('--salida', help="archivo .json o .csv (por defecto, JSON por salida estándar)")
+    parser.add_argument('--almacen', help="archivo SQLite de resultados: las replicaciones ya guardadas no se vuelven a simular")
+    argumentos = parser.parse_args(argumentos)
+    
+    base = {nombre: getattr(argumentos, nombre) for nombre in PARAMETROS_MODELO + ['tiempo_simulacion']
+            if getattr(argumentos, nombre) is not None}
+    escenarios = [{}]
+    if argumentos.escenarios:
+        with open(argumentos.escenarios, encoding='utf-8') as archivo:
+            escenarios = json.load(archivo)
+        if isinstance(escenarios, dict):
+            escenarios = [escenarios]
+    
+    almacen = AlmacenResultados(argumentos.almacen) if argumentos.almacen else None
+    filas = [
+        correr_escenario({**base, **escenario}, argumentos.replicaciones, argumentos.nivel_confianza,
+                         argumentos.procesos, almacen)
+        for escenario in escenarios
+    ]
+    _escribir_filas(filas, argumentos.salida)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas del almacén persistente de resultados (simulador.AlmacenResultados)
+
+    python -m unittest discover -s tests
+"""
+
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+import simulador
+
+PARAMETROS = {'media_llegada': 2.5, 'tiempo_simulacion': 120}
+
+def _escribir_en_almacen(argumentos: tuple) -> int:
+    """En otro proceso: resuelve replicaciones superpuestas contra el mismo archivo"""
+    ruta, desde = argumentos
+    almacen = simulador.AlmacenResultados(ruta)
+    tareas = [({'tiempo_simulacion': 30}, semilla) for semilla in range(desde, desde + 20)]
+    return len(simulador.indicadores_replicaciones(tareas, almacen))
+
+class PruebasAlmacen(unittest.TestCase):
+
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.carpeta.name, 'resultados.sqlite')
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    def test_clave_completa_los_valores_por_defecto(self):
+        self.assertEqual(simulador.clave_resultado({'media_llegada': 3}, 1), simulador.clave_resultado({}, 1))
+        self.assertNotEqual(simulador.clave_resultado({}, 1), simulador.clave_resultado({}, 2))
+        self.assertIsNone(simulador.clave_resultado({}, None))
+        self.assertIsNone(simulador.clave_resultado({'observador': print}, 1))
+
+    def test_replicaciones_iguales_con_y_sin_almacen(self):
+        almacen = simulador.AlmacenResultados(self.ruta)
+        df_sin, resumen_sin = simulador.correr_replicaciones(PARAMETROS, 8, semilla=3, procesos=1)
+        for _ in range(2):  # La segunda vez todo sale del almacén
+            df_con, resumen_con = simulador.correr_replicaciones(PARAMETROS, 8, semilla=3, procesos=1, almacen=almacen)
+            self.assertTrue(df_sin.equals(df_con))
+            self.assertTrue(resumen_sin.equals(resumen_con))
+        self.assertEqual(almacen.resumen()['entradas'], 8)
+
+    def test_barrido_reproducible_con_almacen_parcial(self):
+        grilla = {'media_llegada': [2.0, 3.0]}
+        referencia = simulador.correr_barrido(PARAMETROS, grilla, replicaciones=4, semilla=1, procesos=1)
+        almacen = simulador.AlmacenResultados(self.ruta)
+        simulador.correr_barrido(PARAMETROS, {'media_llegada': [3.0]}, replicaciones=4, semilla=1, procesos=1, almacen=almacen)
+        with mock.patch.object(simulador, '_correr_indicadores', wraps=simulador._correr_indicadores) as corrida:
+            barrido = simulador.correr_barrido(PARAMETROS, grilla, replicaciones=4, semilla=1, procesos=1, almacen=almacen)
+        self.assertTrue(referencia.equals(barrido))
+        self.assertEqual(corrida.call_count, 4)  # Solo el punto nuevo
+
+    def test_descarte_por_tamano(self):
+        almacen = simulador.AlmacenResultados(self.ruta, max_bytes=20_000)
+        tareas = [({'tiempo_simulacion': 30}, semilla) for semilla in range(100)]
+        simulador.indicadores_replicaciones(tareas[:10], almacen)
+        almacen.buscar_metricas(tareas[:1])  # La primera pasa a ser la más reciente
+        simulador.indicadores_replicaciones(tareas[10:], almacen)
+
+        resumen = almacen.resumen()
+        self.assertLessEqual(resumen['bytes'], almacen.max_bytes)
+        self.assertLess(resumen['entradas'], len(tareas))
+        guardadas = almacen.buscar_metricas(tareas)
+        self.assertIsNotNone(guardadas[-1])
+        self.assertIsNone(guardadas[1])
+
+    def test_version_del_motor_invalida_lo_guardado(self):
+        almacen = simulador.AlmacenResultados(self.ruta)
+        tareas = [(PARAMETROS, 1)]
+        simulador.indicadores_replicaciones(tareas, almacen)
+        self.assertIsNotNone(almacen.buscar_metricas(tareas)[0])
+        with mock.patch.object(simulador, 'VERSION_MOTOR', simulador.VERSION_MOTOR + 1):
+            self.assertIsNone(almacen.buscar_metricas(tareas)[0])
+
+    def test_vector_comprimido(self):
+        almacen = simulador.AlmacenResultados(self.ruta)
+        parametros = {'tiempo_simulacion': 60, 'max_filas': 30}
+        df_vector, espera, _, df_pacientes, _ = simulador.simular_centro_salud(semilla=4, **parametros)
+        almacen.guardar_vector(parametros, 4, {'Tiempo_promedio_espera': espera}, df_vector, df_pacientes)
+
+        metricas, df_vector_guardado, df_pacientes_guardado = almacen.buscar_vector(parametros, 4)
+        self.assertEqual(metricas['Tiempo_promedio_espera'], espera)
+        self.assertTrue(df_vector.equals(df_vector_guardado))
+        self.assertTrue(df_pacientes.equals(df_pacientes_guardado))
+        self.assertIsNone(almacen.buscar_vector({'tiempo_simulacion': 60}, 4))
+
+    def test_varios_procesos_sobre_el_mismo_archivo(self):
+        simulador.AlmacenResultados(self.ruta)
+        with ProcessPoolExecutor(max_workers=4, mp_context=multiprocessing.get_context('spawn')) as pool:
+            cantidades = list(pool.map(_escribir_en_almacen, [(self.ruta, 5 * k) for k in range(8)]))
+        self.assertEqual(cantidades, [20] * 8)
+
+        resumen = simulador.AlmacenResultados(self.ruta).resumen()
+        self.assertEqual(resumen['entradas'], 5 * 7 + 20)
+        with sqlite3.connect(self.ruta) as conexion:
+            self.assertEqual(conexion.execute('SELECT SUM(bytes) FROM resultados').fetchone()[0], resumen['bytes'])
+
+if __name__ == '__main__':
+    unittest.main()
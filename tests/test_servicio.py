@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas del servicio HTTP/JSON de simulación (servicio.py), contra un servidor local en un puerto libre
+
+    python -m unittest discover -s tests
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+import servicio
+import simulador
+
+class PruebasServicio(unittest.TestCase):
+
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.iniciar(simulador.AlmacenResultados(os.path.join(self.carpeta.name, 'resultados.sqlite')))
+
+    def tearDown(self):
+        self.detener()
+        self.carpeta.cleanup()
+
+    def iniciar(self, almacen=None, **opciones):
+        self.servicio = servicio.ServicioSimulacion(procesos=1, almacen=almacen, **opciones)
+        self.servidor = servicio.crear_servidor(0, servicio=self.servicio)
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.servidor.server_address[1]}"
+
+    def detener(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        self.servicio.cerrar()
+
+    def pedir(self, ruta: str, cuerpo=None) -> tuple:
+        datos = json.dumps(cuerpo).encode('utf-8') if cuerpo is not None else None
+        pedido = urllib.request.Request(self.base + ruta, data=datos, headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(pedido) as respuesta:
+                return respuesta.status, json.loads(respuesta.read())
+        except urllib.error.HTTPError as error:
+            return error.code, json.loads(error.read())
+
+    def test_metricas_como_el_simulador(self):
+        codigo, respuesta = self.pedir('/trabajos?esperar=30', {'semilla': 1, 'tiempo_simulacion': 120})
+        self.assertEqual(codigo, 200)
+        self.assertEqual(respuesta['metricas'], simulador.simular_indicadores(semilla=1, tiempo_simulacion=120))
+
+    def test_trabajos_identicos_se_comparten(self):
+        escenario = {'semilla': 5, 'replicaciones': 6, 'tiempo_simulacion': 60}
+        _, primero = self.pedir('/trabajos?esperar=30', escenario)
+        _, segundo = self.pedir('/trabajos?esperar=30', {**escenario, 'tiempo_simulacion': 60.0})
+        self.assertEqual(primero['id'], segundo['id'])
+        # Las semillas de 4 replicaciones son las primeras 4 de las 6 anteriores
+        _, menor = self.pedir('/trabajos?esperar=30', {**escenario, 'replicaciones': 4})
+        self.assertEqual(menor['estado'], 'terminado')
+
+        estado = self.pedir('/estado')[1]
+        self.assertEqual(estado['tareas_ejecutadas'], 6)
+        self.assertEqual(estado['trabajos_compartidos'], 1)
+        self.assertEqual(estado['tareas_compartidas'], 4)
+
+    def test_rechazo_con_la_cola_llena(self):
+        self.detener()
+        self.iniciar(max_pendientes=3)
+        codigo, respuesta = self.pedir('/trabajos', {'semilla': 1, 'replicaciones': 5})
+        self.assertEqual(codigo, 503)
+        self.assertIn('error', respuesta)
+        self.assertEqual(self.pedir('/estado')[1]['tareas_pendientes'], 0)
+
+    def test_pedidos_invalidos(self):
+        invalidos = [
+            ('/trabajos', {'semilla': 1, 'foo': 2}),
+            ('/trabajos', {'semilla': 1, 'vector': True, 'filtro_eventos': 'fin_atencion'}),
+            ('/trabajos', {'semilla': 1, 'vector': True, 'filtro_eventos': ['no_existe']}),
+            ('/trabajos', {'escenarios': {'semilla': 1}}),
+            ('/trabajos', {'semilla': 1, 'max_filas': 10}),
+            ('/trabajos?esperar=nan', {'semilla': 1}),
+            ('/trabajos?esperar=-1', {'semilla': 1}),
+            ('/trabajos', {'semilla': 1, 'tiempo_simulacion': servicio.MAX_TIEMPO_SIMULACION + 1}),
+            ('/trabajos', {'semilla': 1, 'tiempo_simulacion': servicio.MAX_TIEMPO_VECTOR + 1, 'vector': True}),
+            ('/trabajos', {'semilla': 1, 'tiempo_simulacion': 0}),
+        ]
+        for ruta, cuerpo in invalidos:
+            with self.subTest(ruta=ruta, cuerpo=cuerpo):
+                self.assertEqual(self.pedir(ruta, cuerpo)[0], 400)
+        self.assertEqual(self.pedir('/trabajos/no_existe')[0], 404)
+
+    def test_trabajo_fallido_se_reintenta(self):
+        escenario = {'semilla': 1, 'tiempo_simulacion': 60, 'empleados_mesa': 0}  # El motor lo rechaza
+        for _ in range(2):
+            codigo, respuesta = self.pedir('/trabajos?esperar=30', escenario)
+            self.assertEqual((codigo, respuesta['estado']), (200, 'error'))
+        estado = self.pedir('/estado')[1]
+        self.assertEqual((estado['tareas_ejecutadas'], estado['trabajos_compartidos']), (2, 0))
+
+    def test_pool_roto_se_reemplaza(self):
+        self.pedir('/trabajos?esperar=30', {'semilla': 1, 'tiempo_simulacion': 30})
+        pool = self.servicio._pool
+        for proceso in list(pool._processes.values()):
+            proceso.kill()
+        limite = time.monotonic() + 30
+        while not pool._broken and time.monotonic() < limite:
+            time.sleep(0.05)
+        codigo, respuesta = self.pedir('/trabajos?esperar=30', {'semilla': 2, 'tiempo_simulacion': 30})
+        self.assertEqual((codigo, respuesta['estado']), (200, 'terminado'))
+        self.assertEqual(self.pedir('/estado')[1]['pools_recreados'], 1)
+
+    def test_vector_paginado(self):
+        escenario = {'semilla': 3, 'tiempo_simulacion': 60, 'vector': True, 'max_filas': 40,
+                     'filtro_eventos': ['fin_atencion', 'llegada_paciente', 'fin_atencion']}
+        codigo, respuesta = self.pedir('/trabajos?esperar=30', escenario)
+        self.assertEqual(codigo, 200)
+        self.assertEqual(respuesta['escenario']['filtro_eventos'], ['fin_atencion', 'llegada_paciente'])
+        codigo, pagina = self.pedir(f"/trabajos/{respuesta['id']}/vector?inicio=2&cantidad=5")
+        self.assertEqual(codigo, 200)
+        self.assertEqual(pagina['total'], respuesta['filas'])
+        self.assertEqual(len(pagina['filas']), 5)
+
+    def test_resultados_del_almacen_tras_reiniciar(self):
+        escenario = {'escenarios': [{'semilla': 2, 'replicaciones': 3, 'tiempo_simulacion': 60}]}
+        _, antes = self.pedir('/trabajos?esperar=30', escenario)
+        almacen = self.servicio.almacen
+        self.detener()
+        self.iniciar(almacen)
+        codigo, despues = self.pedir('/trabajos', escenario)  # Sin esperar: ya está terminado
+        self.assertEqual(codigo, 200)
+        self.assertEqual(antes['trabajos'][0]['resumen'], despues['trabajos'][0]['resumen'])
+        estado = self.pedir('/estado')[1]
+        self.assertEqual((estado['tareas_ejecutadas'], estado['tareas_almacen']), (0, 3))
+
+if __name__ == '__main__':
+    unittest.main()